@@ -0,0 +1,161 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+from content.background import BackgroundExecutor
+
+
+class TestBackgroundExecutor:
+    """Test cases for the bounded executor of the background's work"""
+
+    def test_work_is_completed(self):
+        """Test that the functions and the coroutine's functions are run"""
+        executor = BackgroundExecutor(max_workers=2, queue_size=10)
+        results = []
+
+        async def coroutine_work(value):
+            results.append(value)
+
+        assert executor.submit(results.append, args=(1,))
+        assert executor.submit(coroutine_work, kwargs={"value": 2})
+        assert executor.drain(timeout=5)
+
+        assert sorted(results) == [1, 2]
+        metrics = executor.get_metrics()
+        assert metrics["completed"] == 2
+        assert metrics["pending"] == 0
+
+    def test_full_queue_rejects(self):
+        """Test the backpressure: the work over the limit is rejected"""
+        executor = BackgroundExecutor(max_workers=1, queue_size=1, submit_timeout=0.01)
+        release = threading.Event()
+
+        assert executor.submit(release.wait)
+        assert executor.submit(release.wait)
+        assert not executor.submit(release.wait)
+
+        release.set()
+        assert executor.drain(timeout=5)
+        metrics = executor.get_metrics()
+        assert metrics["rejected"] == 1
+        assert metrics["max_pending"] == 2
+
+    def test_shutdown_drains(self):
+        """Test that the queued work is completed at shutdown and the new work is rejected"""
+        executor = BackgroundExecutor(max_workers=1, queue_size=10)
+        results = []
+        for index in range(5):
+            executor.submit(results.append, args=(index,))
+
+        executor.shutdown(timeout=5)
+
+        assert results == [0, 1, 2, 3, 4]
+        assert not executor.submit(results.append, args=(5,))
+
+    def test_failed_work(self):
+        """Test that the error of work is counted and doesn't break the pool"""
+        executor = BackgroundExecutor(max_workers=1, queue_size=1)
+
+        def broken():
+            raise ValueError("broken")
+
+        executor.submit(broken)
+        executor.submit(lambda: None)
+        executor.drain(timeout=5)
+
+        metrics = executor.get_metrics()
+        assert metrics["failed"] == 1
+        assert metrics["completed"] == 1
+
+    def test_submit_nowait_does_not_wait(self):
+        """Test that the full queue rejects the work at once (the async views)"""
+        executor = BackgroundExecutor(max_workers=1, queue_size=0, submit_timeout=5)
+        release = threading.Event()
+        executor.submit(release.wait)
+
+        started = threading.Event()
+        result = []
+
+        def submit():
+            started.set()
+            result.append(executor.submit_nowait(release.wait))
+
+        thread = threading.Thread(target=submit)
+        thread.start()
+        thread.join(timeout=1)
+
+        assert started.is_set() and not thread.is_alive()
+        assert result == [False]
+        assert executor.get_metrics()["rejected"] == 1
+        release.set()
+        executor.drain(timeout=5)
+
+    def test_exit_drain_timeout(self):
+        """Test that the drain at the process's exit has the timeout (the rest of queue is cancelled)"""
+        script = textwrap.dedent(
+            """
+            import time
+            from content.background import BackgroundExecutor, register_shutdown
+
+            executor = BackgroundExecutor(max_workers=1, queue_size=10, name="exit")
+            register_shutdown(executor, timeout=0.2)
+            for index in range(5):
+                executor.submit(lambda i=index: (time.sleep(0.3), print(i, flush=True)))
+            """
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            timeout=30,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        )
+
+        assert result.returncode == 0, result.stderr
+        # The first work was running at the exit, the queued work was cancelled
+        assert result.stdout.split() == ["0"]
+
+    def test_exit_without_private_hook(self):
+        """Test the fallback ('atexit') without 'threading._register_atexit': the queued work is completed"""
+        script = textwrap.dedent(
+            """
+            import concurrent.futures.thread
+            import threading
+            import time
+
+            # The exit's hook of 'ThreadPoolExecutor' is registered already
+            del threading._register_atexit
+            from content.background import BackgroundExecutor, register_shutdown
+
+            executor = BackgroundExecutor(max_workers=1, queue_size=10, name="exit")
+            register_shutdown(executor, timeout=0.2)
+            for index in range(3):
+                executor.submit(lambda i=index: (time.sleep(0.1), print(i, flush=True)))
+            """
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            timeout=30,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        )
+
+        assert result.returncode == 0, result.stderr
+        # The workers are joined before the 'atexit' hook - nothing is lost, the timeout doesn't work
+        assert result.stdout.split() == ["0", "1", "2"]
+
+    def test_worker_shutdown(self, monkeypatch):
+        """Test that the stop of the celery's worker drains the background's work explicitly"""
+        from celery.signals import worker_shutdown
+
+        from content import tasks
+
+        calls = []
+        monkeypatch.setattr(tasks.background, "shutdown", lambda: calls.append(True))
+
+        worker_shutdown.send(sender=None)
+
+        assert calls == [True]
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+from django.core.cache import caches
+
+TWO_TIER_CACHES = {
+    "default": {
+        "BACKEND": "content.cache_backends.TwoTierCache",
+        "OPTIONS": {"L2_ALIAS": "shared", "L1_MAX_ENTRIES": 2, "L1_TIMEOUT": 1},
+    },
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+# The shared redis is not available (nothing listens on the port)
+L2_DOWN_CACHES = {
+    "default": TWO_TIER_CACHES["default"],
+    "shared": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://127.0.0.1:1/3,redis://127.0.0.1:2/3",
+        "OPTIONS": {"SOCKET_CONNECT_TIMEOUT": 0.1},
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def two_tier_caches(settings):
+    settings.CACHES = TWO_TIER_CACHES
+
+
+class TestTwoTierCache:
+    """Test cases for the two-tier cache (in-process LRU + shared cache)"""
+
+    def test_l2_hit_is_promoted(self):
+        """Test that the entry from the shared cache is served from L1 next time"""
+        cache = caches["default"]
+        caches["shared"].set("page_data_1", "body")
+
+        assert cache.get("page_data_1") == "body"
+        assert cache.get("page_data_1") == "body"
+
+        stats = cache.get_stats()
+        assert stats["l2_hits"] == 1
+        assert stats["l1_hits"] == 1
+
+    def test_l1_is_bounded(self):
+        """Test that the oldest entries are demoted to the shared cache only"""
+        cache = caches["default"]
+        for index in range(5):
+            cache.set(f"page_data_{index}", index)
+
+        assert cache.get_stats()["l1_entries"] == 2
+        assert cache.get("page_data_0") == 0
+        assert cache.get_stats()["l2_hits"] == 1
+
+    def test_l1_ttl(self):
+        """Test that L1 keeps the entry only for the short TTL"""
+        cache = caches["default"]
+        cache.set("page_data_1", "old")
+        caches["shared"].set("page_data_1", "new")
+
+        assert cache.get("page_data_1") == "old"
+        time.sleep(1.1)
+        assert cache.get("page_data_1") == "new"
+
+    def test_async_methods(self):
+        """Test that the async methods use the same tiers as the sync methods"""
+        cache = caches["default"]
+
+        async def main():
+            await cache.aset("page_data_1", "body")
+            assert await cache.aadd("page_data_1", "other") is False
+            caches["shared"].set("page_data_2", "shared_body")
+            return (
+                await cache.aget("page_data_1"),
+                await cache.aget_many(["page_data_1", "page_data_2"]),
+            )
+
+        value, values = asyncio.run(main())
+
+        assert value == "body"
+        assert values == {"page_data_1": "body", "page_data_2": "shared_body"}
+        assert cache.get("page_data_2") == "shared_body"
+        assert cache.get_stats()["l1_hits"] >= 2
+
+    def test_delete_if_equal(self):
+        """Test that the key is deleted only by the owner's value"""
+        cache = caches["default"]
+
+        async def main():
+            await cache.aadd("single_flight_lock_/", "owner", timeout=10)
+            other = await cache.adelete_if_equal("single_flight_lock_/", "other")
+            value = await cache.aget("single_flight_lock_/")
+            owner = await cache.adelete_if_equal("single_flight_lock_/", "owner")
+            return other, value, owner, await cache.aget("single_flight_lock_/")
+
+        assert asyncio.run(main()) == (False, "owner", True, None)
+
+    def test_incr(self):
+        """Test that the counter is incremented into L2 and the missing key is ValueError"""
+        cache = caches["default"]
+        cache.set("counter_1", 1)
+
+        assert cache.incr("counter_1", 2) == 3
+        assert cache.get("counter_1") == 3
+        with pytest.raises(ValueError):
+            cache.incr("counter_2")
+        assert cache.get_stats()["l2_errors"] == 0
+
+
+class TestTwoTierCacheL2Down:
+    """Test cases for the two-tier cache when the shared redis is not available"""
+
+    def test_location_of_async_client(self, settings):
+        """Test that the async client takes the first server of the alias's 'LOCATION'"""
+        settings.CACHES = L2_DOWN_CACHES
+
+        assert caches["default"]._al2._url == "redis://127.0.0.1:1/3"
+
+    def test_incr(self, settings):
+        """Test that the failed L2 is counted and logged, how the other methods"""
+        settings.CACHES = L2_DOWN_CACHES
+        cache = caches["default"]
+
+        with pytest.raises(ValueError):
+            cache.incr("counter_1")
+        assert cache.get_stats()["l2_errors"] == 1
@@ -0,0 +1,80 @@
+import pytest
+from asgiref.sync import async_to_sync
+
+from content.cache_tags import (
+    aget_tag_versions,
+    bump_tags,
+    content_tag,
+    dumps_tagged,
+    get_tag_versions,
+    loads_tagged,
+    page_tag,
+    tags_of_data,
+)
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+# The shared cache is down (nothing is listening on the port)
+L2_DOWN_CACHES = {
+    "default": {
+        "BACKEND": "content.cache_backends.TwoTierCache",
+        "OPTIONS": {"L2_ALIAS": "shared", "L1_MAX_ENTRIES": 64, "L1_TIMEOUT": 60},
+    },
+    "shared": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://127.0.0.1:1/1",
+        "OPTIONS": {"SOCKET_CONNECT_TIMEOUT": 0.1, "SOCKET_TIMEOUT": 0.1},
+    },
+}
+
+PAGE = {
+    "id": 2,
+    "contents": [{"id": 5, "content_type": "video", "counter": 0}],
+    "title": "New page",
+}
+PAGE_OTHER = {"id": 3, "contents": [], "title": "Other page"}
+
+
+@pytest.fixture(autouse=True)
+def locmem_caches(settings):
+    settings.CACHES = LOCMEM_CACHES
+
+
+class TestCacheTags:
+    """Test cases for the tag/version-based invalidation"""
+
+    def test_tags_of_data(self):
+        """Test that the list has the tags of its pages and contents"""
+        tags = tags_of_data({"count": 2, "results": [PAGE, PAGE_OTHER]})
+
+        assert tags == ["pages", "page:2", "content:video:5", "page:3"]
+
+    def test_bump_invalidates_only_affected_entries(self):
+        """Test that the bump of the content's tag invalidates the entries with it"""
+        entry_page = dumps_tagged(PAGE)
+        entry_other = dumps_tagged(PAGE_OTHER)
+
+        assert loads_tagged(entry_page) == PAGE
+        bump_tags([content_tag("video", 5), page_tag(2)])
+
+        assert loads_tagged(entry_page) is None
+        assert loads_tagged(entry_other) == PAGE_OTHER
+
+
+class TestCacheTagsL2Down:
+    """Test cases for the versions of tags when the shared cache is down"""
+
+    def test_version_is_kept_by_l1(self, settings):
+        """Test that each read doesn't create the new version (the entries are not stale on each read)"""
+        settings.CACHES = L2_DOWN_CACHES
+        tags = [page_tag(2), content_tag("video", 5)]
+
+        first = get_tag_versions(tags)
+        second = get_tag_versions(tags)
+        third = async_to_sync(aget_tag_versions)(tags)
+
+        assert first == second == third
+        entry = dumps_tagged(PAGE)
+        assert loads_tagged(entry) == PAGE
@@ -1,10 +1,23 @@
 import json
 import logging
 import pytest
+import time
+from asgiref.sync import async_to_sync
 
+from django.core.cache import cache
+from django.db import connection
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from content import cache_tags
+from content.cache_tags import bump_tags, page_tag
+from content.content_api.contents import _video_rows
+from content.content_api.export import aiter_export
+from content.content_api.fieldsets import Fieldset, canonical_path
+from content.content_api.filters import ContentFilter
 from content.models import PageModel  # Adjust based on your actual model
+from content.models_content_files import AudioContentModel, VideoContentModel
 from model_bakery import baker
 from logs import configure_logging
 
@@ -78,3 +91,403 @@ class TestContentPageAPIPerformance:
 
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data["results"]) <= 10  # Assuming default pagination size
+
+
+class TestConditionalGet:
+    """Test cases for ETag / Last-Modified / 304 of the content's API"""
+
+    @pytest.mark.django_db
+    def test_if_none_match(self, api_client, content_page):
+        """Test that the actual ETag gets 304 without the page's loading"""
+        cache.clear()
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+
+        response = api_client.get(url)
+        etag = response["ETag"]
+        assert response.status_code == status.HTTP_200_OK
+        assert "Last-Modified" in response
+
+        with CaptureQueriesContext(connection) as context:
+            not_modified = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not_modified["ETag"] == etag
+        assert not not_modified.content
+        assert len(context.captured_queries) == 0
+
+    @pytest.mark.django_db
+    def test_changed_page(self, api_client, content_page):
+        """Test that the page's saving changes the ETag"""
+        cache.clear()
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+        etag = api_client.get(url)["ETag"]
+
+        bump_tags([page_tag(content_page.pk)])
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    @pytest.mark.django_db
+    def test_if_modified_since(self, api_client, content_page):
+        """Test that 'If-Modified-Since' gets 304 when the page was not changed"""
+        cache.clear()
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+        last_modified = api_client.get(url)["Last-Modified"]
+
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert "Accept" in response["Vary"]
+
+    @pytest.mark.django_db
+    def test_if_modified_since_after_bump(self, api_client, content_page, monkeypatch):
+        """Test that the bump of the tags (the content's change, 'updated_at' is the same) moves 'Last-Modified'"""
+        cache.clear()
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+        last_modified = api_client.get(url)["Last-Modified"]
+
+        # 'Last-Modified' is accurate to the second - the new version is 2 seconds later
+        later = time.time_ns() + 2 * 10**9
+        monkeypatch.setattr(cache_tags, "_new_version", lambda: "%s-0f0f0f0f" % later)
+        bump_tags([page_tag(content_page.pk)])
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Last-Modified"] != last_modified
+
+
+class TestContentNegotiation:
+    """Test cases for the representations of the content's API"""
+
+    @pytest.mark.django_db
+    def test_msgpack(self, api_client, content_page):
+        """Test that 'Accept: application/msgpack' gets the msgpack's body"""
+        msgpack = pytest.importorskip("msgpack")
+        cache.clear()
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+
+        json_response = api_client.get(url)
+        response = api_client.get(url, HTTP_ACCEPT="application/msgpack")
+
+        assert response["Content-Type"] == "application/msgpack"
+        data = msgpack.unpackb(response.content)
+        assert data["id"] == content_page.pk
+        assert data.keys() == json.loads(json_response.content).keys()
+        assert response["ETag"] != json_response["ETag"]
+
+
+class TestSparseFieldsets:
+    """Test cases for '?fields=', '?content_fields=', '?include='"""
+
+    @pytest.mark.django_db
+    def test_page_fields(self, api_client, content_page):
+        """Test that only requested fields are returned and selected"""
+        cache.clear()
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url, {"fields": "title,url"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data.keys()) == {"id", "title", "url"}
+        page_queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if 'FROM "content_pagemodel"' in query["sql"]
+        ]
+        assert page_queries and all('"text"' not in sql for sql in page_queries)
+
+    @pytest.mark.django_db
+    def test_content_fields(self, api_client, content_page):
+        """Test the content's fields (id and content_type are returned always)"""
+        cache.clear()
+        VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=content_page, order=1)]
+        )
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+
+        response = api_client.get(
+            url, {"content_fields": "title,video_url", "include": "contents"}
+        )
+
+        assert "text" not in response.data
+        assert set(response.data["contents"][0].keys()) == {
+            "id",
+            "content_type",
+            "title",
+            "video_url",
+        }
+
+    @pytest.mark.django_db
+    def test_unknown_field(self, api_client, content_page):
+        """Test that the unknown field is 400"""
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+
+        response = api_client.get(url, {"fields": "title,password"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_canonical_cache_key(self):
+        """Test that the same fieldset has the same cache's key"""
+        first = QueryDict("include=contents&fields=title,id&page=2")
+        second = QueryDict("page=2&fields=title,title")
+
+        assert canonical_path(
+            "/api/", first, Fieldset.from_query_params(first)
+        ) == canonical_path("/api/", second, Fieldset.from_query_params(second))
+
+
+class TestContentFilter:
+    """Test cases for '?content_type=', '?is_active='"""
+
+    @pytest.mark.django_db
+    def test_is_active(self, api_client, content_page):
+        """Test that only the active contents are returned"""
+        cache.clear()
+        VideoContentModel.objects.bulk_create(
+            [
+                baker.prepare(
+                    VideoContentModel,
+                    page=content_page,
+                    title="Active video",
+                    order=2,
+                    is_active=True,
+                ),
+                baker.prepare(
+                    VideoContentModel,
+                    page=content_page,
+                    title="Inactive video",
+                    order=1,
+                    is_active=False,
+                ),
+            ]
+        )
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+
+        active = api_client.get(url, {"is_active": "true"})
+        inactive = api_client.get(url, {"is_active": "0", "content_type": "video"})
+        audio = api_client.get(url, {"content_type": "audio"})
+
+        assert [c["title"] for c in active.data["contents"]] == ["Active video"]
+        assert [c["title"] for c in inactive.data["contents"]] == ["Inactive video"]
+        assert audio.data["contents"] == []
+
+    @pytest.mark.django_db
+    def test_content_type_is_model(self, api_client, content_page):
+        """Test that '?content_type=' selects the model (the audio's rows have 'content_type' = 'video')"""
+        cache.clear()
+        VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=content_page, title="Video", order=1)]
+        )
+        AudioContentModel.objects.bulk_create(
+            [
+                baker.prepare(
+                    AudioContentModel,
+                    page=content_page,
+                    title="Audio",
+                    order=1,
+                    content_type="video",
+                )
+            ]
+        )
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+
+        with CaptureQueriesContext(connection) as context:
+            audio = api_client.get(url, {"content_type": "audio"})
+        video = api_client.get(url, {"content_type": "video"})
+        both = api_client.get(url)
+
+        assert [c["title"] for c in audio.data["contents"]] == ["Audio"]
+        assert [c["title"] for c in video.data["contents"]] == ["Video"]
+        assert [c["title"] for c in both.data["contents"]] == ["Video", "Audio"]
+        # The other model is not queried
+        assert not any(
+            VideoContentModel._meta.db_table in query["sql"]
+            for query in context.captured_queries
+        )
+
+    @pytest.mark.django_db
+    def test_invalid_filter(self, api_client, content_page):
+        """Test that the unknown type and the not boolean 'is_active' are 400"""
+        url = reverse("api_keys:contents-list")
+
+        assert (
+            api_client.get(url, {"content_type": "text"}).status_code
+            == status.HTTP_400_BAD_REQUEST
+        )
+        assert (
+            api_client.get(url, {"is_active": "yes"}).status_code
+            == status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_canonical_cache_key(self):
+        """Test that the same filter has the same cache's key"""
+        first = QueryDict("is_active=1&content_type=VIDEO")
+        second = QueryDict("content_type=video&is_active=true")
+
+        assert canonical_path(
+            "/api/",
+            first,
+            Fieldset.from_query_params(first),
+            ContentFilter.from_query_params(first),
+        ) == canonical_path(
+            "/api/",
+            second,
+            Fieldset.from_query_params(second),
+            ContentFilter.from_query_params(second),
+        )
+
+    @pytest.mark.django_db
+    def test_query_plan(self):
+        """Test that the contents of the page are read by the index '(page, order)'"""
+        pages = PageModel.objects.bulk_create(
+            [baker.prepare(PageModel, title="Page %s" % i) for i in range(50)]
+        )
+        VideoContentModel.objects.bulk_create(
+            [
+                baker.prepare(
+                    VideoContentModel,
+                    page=page,
+                    title="Video %s %s" % (page.pk, i),
+                    order=i,
+                    is_active=i % 2 == 0,
+                )
+                for page in pages
+                for i in range(40)
+            ]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        plan = _video_rows([pages[0].pk]).explain()
+        active_plan = _video_rows(
+            [pages[0].pk], content_filter=ContentFilter(is_active=True)
+        ).explain()
+
+        assert "content_video_page_order_idx" in plan
+        assert "content_video_active_idx" in active_plan
+
+
+class TestBatchRetrieve:
+    """Test cases for the batch's endpoint ('?ids=')"""
+
+    @pytest.mark.django_db
+    def test_batch(self, api_client, multiple_content_pages):
+        """Test the pages in the request's order by the constant quantity of queries"""
+        cache.clear()
+        pages = multiple_content_pages[:3]
+        VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=page, order=1) for page in pages]
+        )
+        url = reverse("api_keys:contents-batch")
+        ids = "%s,%s,999999,%s" % (pages[2].pk, pages[0].pk, pages[1].pk)
+
+        with CaptureQueriesContext(connection) as first:
+            response = api_client.get(url, {"ids": ids})
+        with CaptureQueriesContext(connection) as second:
+            cached = api_client.get(url, {"ids": ids})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [page["id"] for page in response.data["results"]] == [
+            pages[2].pk,
+            pages[0].pk,
+            pages[1].pk,
+        ]
+        assert response.data["not_found"] == [999999]
+        assert all(len(page["contents"]) == 1 for page in response.data["results"])
+        # The pages and the contents (the union). The live counters are seeded by the loaded values
+        assert len(first.captured_queries) == 2
+        # Only the not found page is checked again (it's not cached)
+        assert len(second.captured_queries) == 1
+        # The counters are live (the views of the first request could be counted already)
+        assert self._without_counters(cached.data) == self._without_counters(response.data)
+
+    @staticmethod
+    def _without_counters(data: dict) -> list:
+        return [
+            dict(
+                page,
+                contents=[
+                    {name: value for name, value in content.items() if name != "counter"}
+                    for content in page["contents"]
+                ],
+            )
+            for page in data["results"]
+        ]
+
+    @pytest.mark.django_db
+    def test_shared_with_retrieve(self, api_client, content_page):
+        """Test that the batch's entries are the entries of 'retrieve'"""
+        cache.clear()
+        api_client.get(reverse("api_keys:contents-batch"), {"ids": content_page.pk})
+        url = reverse("api_keys:contents-detail", kwargs={"pk": content_page.pk})
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not [
+            query
+            for query in context.captured_queries
+            if 'FROM "content_pagemodel"' in query["sql"]
+        ]
+
+    @pytest.mark.django_db
+    def test_invalid_ids(self, api_client):
+        """Test that the empty, not integer and too long '?ids=' are 400"""
+        url = reverse("api_keys:contents-batch")
+
+        for ids in ("", "1,a", ",".join(str(i) for i in range(1, 1000))):
+            response = api_client.get(url, {"ids": ids})
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestExport:
+    """Test cases for the streaming export"""
+
+    @pytest.mark.django_db
+    def test_ndjson_and_json(self, api_client, multiple_content_pages):
+        """Test that both outputs have all pages with their contents"""
+        VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=multiple_content_pages[0], order=1)]
+        )
+        url = reverse("api_keys:contents-export")
+
+        ndjson = api_client.get(url)
+        array = api_client.get(url, {"output": "json", "include": "contents"})
+
+        assert ndjson.status_code == status.HTTP_200_OK
+        assert ndjson["Content-Type"] == "application/x-ndjson"
+        lines = b"".join(ndjson).decode().splitlines()
+        pages = [json.loads(line) for line in lines]
+        assert sorted(page["id"] for page in pages) == sorted(
+            page.pk for page in multiple_content_pages
+        )
+        assert len(pages[0]["contents"]) == 1
+        data = json.loads(b"".join(array))
+        assert [page["id"] for page in data] == [page["id"] for page in pages]
+        assert "text" not in data[0]
+
+    @pytest.mark.django_db
+    def test_chunks(self, multiple_content_pages):
+        """Test that each chunk of pages is rendered with one query of contents"""
+        fieldset = Fieldset()
+
+        async def _collect():
+            return [chunk async for chunk in aiter_export(fieldset, chunk_size=2)]
+
+        with CaptureQueriesContext(connection) as context:
+            chunks = async_to_sync(_collect)()
+
+        assert len(chunks) == 3
+        assert sum(chunk.count(b"\n") for chunk in chunks) == 5
+        union_queries = [
+            query for query in context.captured_queries if "UNION" in query["sql"]
+        ]
+        assert len(union_queries) == 3
+
+    def test_unknown_output(self, api_client):
+        """Test that the unknown output is 400"""
+        response = api_client.get(reverse("api_keys:contents-export"), {"output": "xml"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,150 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from content.counters import (
+    LocalCounterBackend,
+    ViewCounterAggregator,
+    flatten_content_keys,
+)
+from content.models import PageModel
+from content.models_content_files import VideoContentModel
+
+
+class TestViewCounterAggregator:
+    """Test cases for the write-coalescing of the view-counters"""
+
+    def test_flatten_content_keys(self):
+        """Test that the single page and the list of pages give the flat list"""
+        data_numbers_list = [
+            {"content_type": "video", "id": 1},
+            [{"content_type": "Audio", "id": "2"}, {"content_type": "video", "id": 3}],
+            [[{"content_type": "video", "id": 1}]],
+        ]
+
+        keys = flatten_content_keys(data_numbers_list)
+
+        assert keys == [("video", 1), ("audio", 2), ("video", 3), ("video", 1)]
+
+    def test_add_coalesces_deltas(self):
+        """Test that many requests give the one delta per content"""
+        aggregator = ViewCounterAggregator(backend_name="local", threshold=10**6)
+
+        for _ in range(100):
+            aggregator.add([("video", 1), ("video", 2)])
+
+        assert aggregator.backend.size() == 2
+        assert aggregator.backend.take() == {"video:1": 100, "video:2": 100}
+
+    def test_not_acked_deltas_are_kept(self):
+        """Test that the broken flush doesn't lose the increments"""
+        backend = LocalCounterBackend()
+        backend.incr_many({"video:1": 3})
+
+        assert backend.take() == {"video:1": 3}
+        backend.incr_many({"video:1": 1})
+        # The flush was broken, the next flush gets the same deltas
+        assert backend.take() == {"video:1": 3}
+        backend.ack()
+        assert backend.take() == {"video:1": 1}
+
+    @pytest.mark.django_db
+    def test_overlay_live_counters(self):
+        """Test that the cached data gets the live counters and is not increased twice"""
+        page = baker.make(PageModel)
+        # 'bulk_create' - the model's 'save' starts the file's upload
+        video = VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=page, counter=7)]
+        )[0]
+        aggregator = ViewCounterAggregator(backend_name="local", threshold=10**6)
+        content = {"id": video.id, "content_type": "video", "counter": 7}
+        cached = {"results": [{"contents": [dict(content)]}]}
+
+        aggregator.overlay(cached)
+        aggregator.add([("video", video.id)])
+        aggregator.add([("video", video.id)])
+        data = aggregator.overlay({"contents": [dict(content)]})
+
+        assert data["contents"][0]["counter"] == 9
+
+    @pytest.mark.django_db
+    def test_seed_from_db_not_from_cache(self):
+        """Test that the empty store (redis's flush, failover) is seeded by the db, not by the old cache"""
+        page = baker.make(PageModel)
+        video = VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=page, counter=50)]
+        )[0]
+        aggregator = ViewCounterAggregator(backend_name="local", threshold=10**6)
+        aggregator.add([("video", video.id)])
+        # The cached JSON was rendered when the counter was 3
+        stale = {"contents": [{"id": video.id, "content_type": "video", "counter": 3}]}
+
+        data = async_to_sync(aggregator.aoverlay)(stale)
+
+        # The db's value plus the pending delta
+        assert data["contents"][0]["counter"] == 51
+
+    @pytest.mark.django_db
+    def test_seed_from_loaded_data(self):
+        """Test that the data which was just loaded from the db seeds the store without the query"""
+        aggregator = ViewCounterAggregator(backend_name="local", threshold=10**6)
+        aggregator.add([("video", 7)])
+        loaded = {"contents": [{"id": 7, "content_type": "video", "counter": 20}]}
+
+        with CaptureQueriesContext(connection) as context:
+            data = async_to_sync(aggregator.aoverlay)(loaded, loaded=[loaded])
+
+        assert data["contents"][0]["counter"] == 21
+        assert len(context.captured_queries) == 0
+
+    @pytest.mark.django_db
+    def test_flush_evicts_live_counters(self):
+        """Test that the flushed fields are evicted and are seeded from the db again"""
+        page = baker.make(PageModel)
+        video = VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=page, counter=10)]
+        )[0]
+        aggregator = ViewCounterAggregator(backend_name="local", threshold=10**6)
+        field = "video:%s" % video.id
+        content = {"id": video.id, "content_type": "video", "counter": 10}
+        aggregator.overlay({"contents": [dict(content)]})
+        for _ in range(3):
+            aggregator.add([("video", video.id)])
+
+        aggregator.flush()
+
+        assert aggregator.backend.totals_many([field]) == {field: None}
+        aggregator.add([("video", video.id)])
+        data = aggregator.overlay({"contents": [dict(content)]})
+        assert data["contents"][0]["counter"] == 14
+
+    @pytest.mark.django_db
+    def test_flush_records_counters(self):
+        """Test that the flush records the collected deltas to the db"""
+        page = baker.make(PageModel)
+        # 'bulk_create' - the model's 'save' starts the file's upload
+        video = VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=page, content_type="video")]
+        )[0]
+        aggregator = ViewCounterAggregator(backend_name="local", threshold=10**6)
+        for _ in range(5):
+            aggregator.add([("video", video.id)])
+
+        aggregator.flush()
+
+        video.refresh_from_db()
+        assert video.counter == 5
+        assert aggregator.backend.take() == {}
+
+    def test_queued_task_is_added_to_aggregator(self, monkeypatch):
+        """Test that the old task (the message which is queued already) adds the views into the aggregator"""
+        from content import counters, tasks
+
+        added = []
+        monkeypatch.setattr(counters.counter_aggregator, "add", added.extend)
+
+        tasks.increment_content_counter([[{"content_type": "video", "id": 1}]])
+
+        assert added == [("video", 1)]
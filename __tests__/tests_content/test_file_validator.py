@@ -0,0 +1,175 @@
+import hashlib
+import os
+
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from content.file_validator import FileDuplicateChecker
+from content.models import ContentFileHashModel, PageModel
+from content.models_content_files import AudioContentModel, VideoContentModel
+
+
+@pytest.fixture
+def media_dir(tmp_path, monkeypatch):
+    # The paths of the index are relative ('media/...')
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("media/2025/01/01/video")
+    return tmp_path
+
+
+def _write(path: str, data: bytes) -> str:
+    with open(path, "wb") as file:
+        file.write(data)
+    return hashlib.md5(data).hexdigest()
+
+
+class TestTieredDuplicate:
+    """Test cases for the size -> fingerprint -> MD5 narrowing of the candidates"""
+
+    @pytest.mark.django_db
+    def test_unique_size_is_not_hashed(self, media_dir, monkeypatch):
+        """Test that the file with the unique size is not read for the fingerprint and the MD5"""
+        checker = FileDuplicateChecker()
+        _write("media/2025/01/01/video/old.mp4", b"old")
+        checker.add_file_hash("media/2025/01/01/video/old.mp4", None, "video", 1)
+        _write("media/new.mp4", b"the new file")
+        read_paths = []
+        monkeypatch.setattr(checker, "calculate_md5", read_paths.append)
+        monkeypatch.setattr(checker, "calculate_fingerprint", read_paths.append)
+
+        assert checker.check_duplicate("media/new.mp4") is None
+        assert read_paths == []
+
+    @pytest.mark.django_db
+    def test_other_fingerprint_is_not_hashed(self, media_dir, monkeypatch):
+        """Test that the same size with the other fingerprint doesn't read the whole files"""
+        checker = FileDuplicateChecker()
+        block = 4
+        monkeypatch.setattr(
+            checker,
+            "calculate_fingerprint",
+            lambda path, size=None: FileDuplicateChecker.calculate_fingerprint(
+                checker, path, size, block_size=block
+            ),
+        )
+        old_path = "media/2025/01/01/video/old.mp4"
+        _write(old_path, b"HEAD" + b"x" * 20 + b"TAIL")
+        checker.add_file_hash(old_path, None, "video", 1)
+        _write("media/new.mp4", b"HEAD" + b"x" * 20 + b"LIAT")
+        read_paths = []
+        monkeypatch.setattr(checker, "calculate_md5", read_paths.append)
+
+        assert checker.check_duplicate("media/new.mp4") is None
+        assert read_paths == []
+        # The fingerprint of the candidate is saved for the next checks
+        assert ContentFileHashModel.objects.get().fingerprint is not None
+
+    @pytest.mark.django_db
+    def test_same_fingerprint_by_md5(self, media_dir):
+        """Test that the same fingerprint is checked by the whole MD5 and the MD5 is saved"""
+        checker = FileDuplicateChecker()
+        old_path = "media/2025/01/01/video/old.mp4"
+        # Only the middle's bytes are different (they are not into the fingerprint)
+        data = b"a" * 300000
+        old_md5 = _write(old_path, data)
+        checker.add_file_hash(old_path, None, "video", 1)
+        _write("media/other.mp4", data[:100000] + b"b" + data[100001:])
+        _write("media/same.mp4", data)
+
+        assert checker.check_duplicate("media/other.mp4") is None
+        assert checker.check_duplicate("media/same.mp4") == old_path
+        assert ContentFileHashModel.objects.get().digest == old_md5
+
+
+class TestContentHashIndex:
+    """Test cases for the index of the files' hashes"""
+
+    @pytest.mark.django_db
+    def test_duplicate_by_one_query(self, media_dir, django_assert_num_queries):
+        """Test that the duplicate is found by one query without the reading of files"""
+        checker = FileDuplicateChecker()
+        path = "media/2025/01/01/video/film.mp4"
+        file_md5 = _write(path, b"film")
+        checker.add_file_hash(path, file_md5, "video", 5)
+        checker.clear_cache()
+
+        with django_assert_num_queries(1):
+            duplicate_path = checker.check_duplicate(
+                "media/other.mp4", file_md5=file_md5, size=4
+            )
+        other_size = FileDuplicateChecker().check_duplicate(
+            "media/other.mp4", file_md5=file_md5, size=5
+        )
+
+        assert duplicate_path == path
+        assert other_size is None
+        assert ContentFileHashModel.objects.get(content_id=5).size == 4
+
+    @pytest.mark.django_db
+    def test_removed_file(self, media_dir):
+        """Test that the line of the removed file is deleted"""
+        ContentFileHashModel.objects.create(
+            digest="0" * 32,
+            size=1,
+            path="media/gone.mp4",
+            content_type="video",
+            content_id=1,
+        )
+
+        duplicate_path = FileDuplicateChecker().check_duplicate(
+            "media/other.mp4", file_md5="0" * 32, size=1
+        )
+
+        assert duplicate_path is None
+        assert not ContentFileHashModel.objects.exists()
+
+    @pytest.mark.django_db
+    def test_backfill_command(self, media_dir):
+        """Test that the command indexes the files of the existing contents once"""
+        page = baker.make(PageModel)
+        video_md5 = _write("media/2025/01/01/video/a.mp4", b"video")
+        audio_md5 = _write("media/2025/01/01/video/b.mp3", b"audio!")
+        # 'bulk_create' - the model's 'save' starts the file's upload
+        video, missing = VideoContentModel.objects.bulk_create(
+            [
+                baker.prepare(VideoContentModel, page=page, video_path=path)
+                for path in ("2025/01/01/video/a.mp4", "2025/01/01/video/c.mp4")
+            ]
+        )
+        audio = AudioContentModel.objects.bulk_create(
+            [
+                baker.prepare(
+                    AudioContentModel, page=page, audio_path="2025/01/01/video/b.mp3"
+                )
+            ]
+        )[0]
+
+        call_command("backfill_content_hashes", stdout=open(os.devnull, "w"))
+        ContentFileHashModel.objects.filter(content_type="audio").update(size=0)
+        call_command("backfill_content_hashes", stdout=open(os.devnull, "w"))
+
+        rows = {
+            (row.content_type, row.content_id): row
+            for row in ContentFileHashModel.objects.all()
+        }
+        assert set(rows) == {("video", video.pk), ("audio", audio.pk)}
+        assert rows[("video", video.pk)].path == "media/2025/01/01/video/a.mp4"
+        assert rows[("video", video.pk)].fingerprint is not None
+        # The whole MD5 is calculated only by '--digest'
+        assert rows[("video", video.pk)].digest is None
+        # The indexed file is not hashed again without '--rehash'
+        assert rows[("audio", audio.pk)].size == 0
+
+        call_command(
+            "backfill_content_hashes",
+            "--rehash",
+            "--digest",
+            stdout=open(os.devnull, "w"),
+        )
+
+        audio_row = ContentFileHashModel.objects.get(content_type="audio")
+        assert audio_row.size == 6
+        assert audio_row.digest == audio_md5
+        video_row = ContentFileHashModel.objects.get(content_type="video")
+        assert video_row.digest == video_md5
@@ -0,0 +1,62 @@
+import asyncio
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+
+from content.realtime import aiter_sse, apublish
+from content.routing import websocket_urlpatterns
+
+COUNTER_EVENT = {
+    "event": "counter",
+    "content_type": "video",
+    "id": 5,
+    "page_id": 7,
+    "counter": 17,
+}
+
+
+class TestContentUpdates:
+    """Test cases for the push of the content's updates (websocket, SSE)"""
+
+    def test_websocket_page_and_content(self):
+        """Test that the page's and the content's subscribers get the event"""
+        application = URLRouter(websocket_urlpatterns)
+
+        async def main():
+            page = WebsocketCommunicator(application, "/ws/content/page/7/")
+            content = WebsocketCommunicator(application, "/ws/content/video/5/")
+            other = WebsocketCommunicator(application, "/ws/content/page/8/")
+            for communicator in (page, content, other):
+                connected, _ = await communicator.connect()
+                assert connected
+            await apublish([COUNTER_EVENT])
+            events = (
+                await page.receive_json_from(timeout=1),
+                await content.receive_json_from(timeout=1),
+            )
+            other_is_empty = await other.receive_nothing(timeout=0.1)
+            for communicator in (page, content, other):
+                await communicator.disconnect()
+            return events, other_is_empty
+
+        events, other_is_empty = asyncio.run(main())
+
+        assert events == (COUNTER_EVENT, COUNTER_EVENT)
+        assert other_is_empty
+
+    def test_sse(self):
+        """Test the events and the keep-alive of the SSE's stream"""
+
+        async def main():
+            stream = aiter_sse(["content.page.7"], keepalive=0.05)
+            chunks = [await stream.__anext__(), await stream.__anext__()]
+            await apublish([COUNTER_EVENT])
+            chunks.append(await stream.__anext__())
+            await stream.aclose()
+            return chunks
+
+        connected, keepalive, event = asyncio.run(main())
+
+        assert connected.startswith(b":") and keepalive.startswith(b":")
+        assert event.startswith(b"event: counter\ndata: ")
+        assert b'"counter":17' in event.replace(b" ", b"")
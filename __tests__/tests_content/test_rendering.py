@@ -0,0 +1,126 @@
+import gzip
+import json
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from model_bakery import baker
+
+from content.cache_tags import bump_tags, page_tag
+from content.content_api.rendering import (
+    loads_rendered,
+    render_entry,
+    rendered_response,
+    select_encoding,
+)
+from content.models import PageModel
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+PAGE = {
+    "id": 2,
+    "contents": [{"id": 5, "content_type": "video", "counter": 0}],
+    "title": "New page",
+    "text": "This is page's text. Basis content.",
+}
+
+
+@pytest.fixture(autouse=True)
+def locmem_caches(settings):
+    settings.CACHES = LOCMEM_CACHES
+
+
+class TestPreRendered:
+    """Test cases for the pre-rendered payloads"""
+
+    def test_rendered_response(self):
+        """Test that the response has the rendered bytes without the re-encoding"""
+        entry = render_entry(PAGE)
+
+        response = rendered_response(entry)
+
+        assert response.content == entry["body"]
+        assert json.loads(response.content) == PAGE
+        assert response["Content-Type"] == "application/json"
+        assert response["Content-Length"] == str(len(entry["body"]))
+        assert entry["counter_keys"] == [("video", 5)]
+
+    def test_rendered_entry_is_invalidated(self):
+        """Test that the bump of the page's tag makes the rendered entry stale"""
+        entry = render_entry(PAGE)
+
+        assert loads_rendered(entry) == (entry, True)
+        bump_tags([page_tag(2)])
+        assert loads_rendered(entry) == (entry, False)
+
+
+class TestCompressedVariants:
+    """Test cases for the pre-compressed variants of the rendered body"""
+
+    LARGE_PAGE = dict(PAGE, text="This is page's text. " * 500)
+
+    def test_gzip_variant(self):
+        """Test that the variant is selected by 'Accept-Encoding'"""
+        entry = render_entry(self.LARGE_PAGE)
+
+        response = rendered_response(entry, accept_encoding="gzip, deflate")
+
+        assert response["Content-Encoding"] == "gzip"
+        assert response["Vary"] == "Accept-Encoding"
+        assert gzip.decompress(response.content) == entry["body"]
+        assert int(response["Content-Length"]) < len(entry["body"])
+
+    def test_identity(self):
+        """Test that the identity body is returned without the accepted encoding"""
+        entry = render_entry(self.LARGE_PAGE)
+
+        response = rendered_response(entry, accept_encoding="gzip;q=0, identity")
+
+        assert not response.has_header("Content-Encoding")
+        assert response.content == entry["body"]
+
+    def test_small_body_is_not_compressed(self):
+        """Test that the small body has no variants"""
+        entry = render_entry(PAGE)
+
+        assert entry["variants"] == {}
+
+    def test_select_encoding(self):
+        """Test the preference and the q-values"""
+        assert select_encoding("gzip, br", {"gzip", "br"}) == "br"
+        assert select_encoding("gzip, br;q=0.5", {"gzip", "br"}) == "gzip"
+        assert select_encoding("*", {"gzip"}) == "gzip"
+        assert select_encoding("", {"gzip"}) is None
+
+
+class TestCompressionMiddleware:
+    """Test cases for the compression of the not pre-rendered responses"""
+
+    @pytest.mark.django_db
+    def test_default_mode_is_compressed(self, api_client):
+        """Test that the large body is compressed by 'Accept-Encoding' and the small body is not"""
+        cache.clear()
+        large = PageModel.objects.bulk_create(
+            [baker.prepare(PageModel, text="This is page's text. " * 500)]
+        )[0]
+        small = PageModel.objects.bulk_create([baker.prepare(PageModel, text="Text")])[0]
+        url = reverse("api_keys:contents-detail", kwargs={"pk": large.pk})
+
+        identity = api_client.get(url)
+        compressed = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        not_compressed = api_client.get(
+            reverse("api_keys:contents-detail", kwargs={"pk": small.pk}),
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+
+        assert not identity.has_header("Content-Encoding")
+        assert "Accept-Encoding" in identity["Vary"]
+        assert compressed["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in compressed["Vary"]
+        assert gzip.decompress(compressed.content) == identity.content
+        assert int(compressed["Content-Length"]) == len(compressed.content)
+        # The compressed bytes have the weak ETag
+        assert compressed["ETag"] == "W/" + identity["ETag"].removeprefix("W/")
+        assert not not_compressed.has_header("Content-Encoding")
@@ -0,0 +1,83 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from content.serialization import (
+    HAS_MSGPACK,
+    HAS_ORJSON,
+    json_dumps,
+    json_loads,
+    pack,
+    unpack,
+)
+
+ENTRY = {
+    "data": {
+        "count": 20,
+        "next": None,
+        "previous": None,
+        "results": [
+            {
+                "id": index,
+                "contents": [
+                    {
+                        "id": index * 10 + number,
+                        "title": "Content %s" % number,
+                        "counter": 1234,
+                        "order": number,
+                        "content_type": "video",
+                        "is_active": True,
+                        "video_path": "/media/2025/08/27/video/my_video_%s.mp4" % number,
+                        "video_url": None,
+                        "subtitles_url": None,
+                    }
+                    for number in range(20)
+                ],
+                "created_at": "2025-08-27T16:39:30.072225+07:00",
+                "updated_at": "2025-08-27T16:39:30.073226+07:00",
+                "url": "http://dasdas.ru/freelance_django/",
+                "title": "Страница %s" % index,
+                "text": "Это текст страницы. " * 50,
+            }
+            for index in range(20)
+        ],
+    },
+    "tags": {"page:%s" % index: "1756290000000000000-1a2b3c4d" for index in range(20)},
+    "expires_at": 1756290000.0,
+}
+
+
+class TestSerialization:
+    """Test cases for the compact encoding of the cache's entries"""
+
+    def test_round_trip(self):
+        """Test that both encodings return the same entry"""
+        assert unpack(pack(ENTRY)) == ENTRY
+        assert json_loads(json_dumps(ENTRY)) == ENTRY
+        # The entries of the old format (the JSON's string)
+        assert unpack(json.dumps(ENTRY)) == ENTRY
+
+    def test_backends(self):
+        """Test that orjson and msgpack are chosen and encode the same data as the stdlib 'json'"""
+        orjson = pytest.importorskip("orjson")
+        msgpack = pytest.importorskip("msgpack")
+
+        assert HAS_ORJSON and HAS_MSGPACK
+        body = json_dumps(ENTRY)
+        assert body == orjson.dumps(ENTRY)
+        assert body == json.dumps(
+            ENTRY, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        assert pack(ENTRY) == msgpack.packb(ENTRY, use_bin_type=True)
+        assert len(pack(ENTRY)) < len(json.dumps(ENTRY).encode("utf-8"))
+
+    def test_benchmark_command(self):
+        """Test that the benchmark (the timing is not checked by the tests) is run"""
+        stdout = io.StringIO()
+
+        call_command("benchmark_serialization", number=1, repeat=1, stdout=stdout)
+
+        assert "entry (pack/unpack)" in stdout.getvalue()
+        assert "body (json_dumps)" in stdout.getvalue()
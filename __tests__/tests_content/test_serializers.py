@@ -1,4 +1,31 @@
-from content.content_api.serializers import VideoContentSerializer
+import io
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from content.content_api.contents import load_contents_by_page
+from content.content_api.filters import ContentFilter
+from content.content_api.pagination import (
+    AsyncPageNumberPagination,
+    TitleCursorPagination,
+)
+from content.content_api.serializers import (
+    ContentPolymorphicSerializer,
+    PageDetailSerializer,
+    VideoContentSerializer,
+)
+from content.models import PageModel
+from content.models_content_files import AudioContentModel, VideoContentModel
 
 
 class TestContentPageSerializer:
@@ -17,3 +44,221 @@ class TestContentPageSerializer:
         assert not serializer.is_valid()
         assert "video_url" in serializer.errors
         assert "subtitles_url" in serializer.errors
+
+
+class TestPageDetailSerializerContents:
+    """Test cases for the contents of the list of pages"""
+
+    @pytest.mark.django_db
+    def test_list_contents_queries(self, django_assert_num_queries):
+        """Test that the query count doesn't depend on the page size (one union of both models)"""
+        pages = baker.make(PageModel, _quantity=20)
+        # 'bulk_create' - the model's 'save' starts the file's upload
+        VideoContentModel.objects.bulk_create(
+            [
+                baker.prepare(VideoContentModel, page=page, order=index)
+                for page in pages
+                for index in range(3)
+            ]
+        )
+
+        with django_assert_num_queries(1):
+            contents_by_page = load_contents_by_page([page.pk for page in pages])
+            data = PageDetailSerializer(
+                pages, many=True, context={"contents_by_page": contents_by_page}
+            ).data
+
+        assert all(len(page["contents"]) == 3 for page in data)
+        assert [c["order"] for c in data[0]["contents"]] == [0, 1, 2]
+
+    @pytest.mark.django_db
+    def test_union_limit(self):
+        """Test the first N contents of both models, ordered and limited in the db"""
+        pages = baker.make(PageModel, _quantity=2)
+        for page in pages:
+            VideoContentModel.objects.bulk_create(
+                [
+                    baker.prepare(VideoContentModel, page=page, order=index * 2)
+                    for index in range(5)
+                ]
+            )
+            AudioContentModel.objects.bulk_create(
+                [
+                    baker.prepare(AudioContentModel, page=page, order=index * 2 + 1)
+                    for index in range(5)
+                ]
+            )
+
+        with CaptureQueriesContext(connection) as context:
+            single = load_contents_by_page([pages[0].pk], None, ContentFilter(limit=3))
+        many = load_contents_by_page(
+            [page.pk for page in pages], None, ContentFilter(limit=3)
+        )
+
+        sql = context.captured_queries[0]["sql"]
+        assert "UNION ALL" in sql and "LIMIT 3" in sql
+        assert [c["order"] for c in single[pages[0].pk]] == [0, 1, 2]
+        for page in pages:
+            assert [c["order"] for c in many[page.pk]] == [0, 1, 2]
+            assert [c["content_type"] for c in many[page.pk]][:1] == ["video"]
+
+
+class TestFastContentSerializer:
+    """Test cases for the fast-path serializer of contents"""
+
+    @staticmethod
+    def _make_contents(page, quantity):
+        VideoContentModel.objects.bulk_create(
+            [
+                baker.prepare(
+                    VideoContentModel,
+                    page=page,
+                    order=index * 2,
+                    video_path="2025/07/12/video/file_%s.mp4" % index,
+                    _fill_optional=True,
+                )
+                for index in range(quantity)
+            ]
+        )
+        AudioContentModel.objects.bulk_create(
+            [
+                baker.prepare(
+                    AudioContentModel,
+                    page=page,
+                    order=index * 2 + 1,
+                    audio_path="" if index % 2 else "2025/07/12/audio/%s.mp3" % index,
+                    _fill_optional=True,
+                )
+                for index in range(quantity)
+            ]
+        )
+
+    @staticmethod
+    def _slow_contents(page):
+        all_contents = list(VideoContentModel.objects.filter(page=page)) + list(
+            AudioContentModel.objects.filter(page=page)
+        )
+        all_contents.sort(key=lambda x: x.order)
+        return all_contents
+
+    @pytest.mark.django_db
+    def test_identical_output(self):
+        """Test that the output is the same as 'ContentPolymorphicSerializer'"""
+        page = baker.make(PageModel)
+        self._make_contents(page, 5)
+
+        expected = ContentPolymorphicSerializer(
+            self._slow_contents(page), many=True
+        ).data
+        data = load_contents_by_page([page.pk])[page.pk]
+
+        assert json.dumps(data) == json.dumps(expected)
+        assert PageDetailSerializer(page).data["contents"] == data
+
+    @pytest.mark.django_db
+    def test_benchmark_command(self):
+        """Test that the benchmark of the page's contents is run (the timing is not checked by the tests)"""
+        page = baker.make(PageModel)
+        self._make_contents(page, 3)
+        stdout = io.StringIO()
+
+        call_command(
+            "benchmark_serialization", number=1, repeat=1, page=page.pk, stdout=stdout
+        )
+
+        assert "contents of the page %s (6)" % page.pk in stdout.getvalue()
+
+
+class TestAsyncPageNumberPagination:
+    """Test cases for the async pagination of pages"""
+
+    @pytest.mark.django_db
+    def test_same_page_as_sync_pagination(self):
+        """Test that the async pagination returns the same page and links"""
+        baker.make(PageModel, _quantity=25)
+        request = Request(APIRequestFactory().get("/api/page/content/", {"page": 2}))
+        queryset = PageModel.objects.all()
+
+        sync_paginator = PageNumberPagination()
+        expected = sync_paginator.paginate_queryset(queryset, request)
+        paginator = AsyncPageNumberPagination()
+        pages = async_to_sync(paginator.apaginate_queryset)(queryset, request)
+
+        assert [page.pk for page in pages] == [page.pk for page in expected]
+        assert paginator.get_paginated_response([]).data == (
+            sync_paginator.get_paginated_response([]).data
+        )
+
+
+class TestTitleCursorPagination:
+    """Test cases for the cursor's pagination of pages"""
+
+    @staticmethod
+    def _request(params):
+        return Request(APIRequestFactory().get("/api/page/content/", params))
+
+    @staticmethod
+    def _cursor(link):
+        return parse_qs(urlparse(link).query)["cursor"][0]
+
+    @pytest.mark.django_db
+    def test_walk_forward_and_back(self):
+        """Test that the cursors walk all pages by '(title, id)' without gaps"""
+        for title in ["b", "a", "c", "g", "d", "f", "e"]:
+            baker.make(PageModel, title=title)
+        expected = list(PageModel.objects.order_by("title", "id").values_list("pk", flat=True))
+
+        seen = []
+        params = {"pagination": "cursor"}
+        pages = []
+        while True:
+            paginator = TitleCursorPagination()
+            paginator.page_size = 3
+            rows = async_to_sync(paginator.apaginate_queryset)(
+                PageModel.objects.all(), self._request(params)
+            )
+            pages.append([row.pk for row in rows])
+            seen.extend(row.pk for row in rows)
+            next_link = paginator.get_next_link()
+            if next_link is None:
+                break
+            params = {"pagination": "cursor", "cursor": self._cursor(next_link)}
+
+        assert seen == expected
+        assert "count" not in paginator.get_paginated_response([]).data
+
+        previous_cursor = self._cursor(paginator.get_previous_link())
+        paginator = TitleCursorPagination()
+        paginator.page_size = 3
+        rows = async_to_sync(paginator.apaginate_queryset)(
+            PageModel.objects.all(),
+            self._request({"pagination": "cursor", "cursor": previous_cursor}),
+        )
+        assert [row.pk for row in rows] == pages[-2]
+
+    @pytest.mark.django_db
+    def test_invalid_cursor(self):
+        """Test that the broken cursor is 404"""
+        paginator = TitleCursorPagination()
+
+        with pytest.raises(NotFound):
+            async_to_sync(paginator.apaginate_queryset)(
+                PageModel.objects.all(),
+                self._request({"pagination": "cursor", "cursor": "broken"}),
+            )
+
+    @pytest.mark.django_db
+    def test_deep_page_has_no_offset(self, django_assert_num_queries):
+        """Test that the deep page is one seek's query (no 'COUNT(*)', no 'OFFSET')"""
+        baker.make(PageModel, _quantity=10)
+        cursor = TitleCursorPagination.encode_cursor("zzz", 10**6)
+        paginator = TitleCursorPagination()
+
+        with django_assert_num_queries(1) as context:
+            async_to_sync(paginator.apaginate_queryset)(
+                PageModel.objects.all(),
+                self._request({"pagination": "cursor", "cursor": cursor}),
+            )
+        sql = context.captured_queries[0]["sql"].upper()
+        assert "OFFSET" not in sql
+        assert "COUNT(" not in sql
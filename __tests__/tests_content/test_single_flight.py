@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+
+from content.content_api import single_flight as single_flight_module
+
+from content.content_api.single_flight import LOCK_PREFIX, SingleFlight
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+@pytest.fixture(autouse=True)
+def locmem_caches(settings):
+    settings.CACHES = LOCMEM_CACHES
+
+
+class TestSingleFlight:
+    """Test cases for the protection against the cache's stampede"""
+
+    def test_one_build_per_key(self):
+        """Test that concurrent misses of one key cost one build"""
+        calls = []
+
+        async def build():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"results": [{"id": 1}]}
+
+        async def read():
+            return None, False
+
+        async def main():
+            single_flight = SingleFlight(lock_timeout=1)
+            return await asyncio.gather(
+                *[single_flight.do("page_data_/", build, read) for _ in range(100)]
+            )
+
+        results = asyncio.run(main())
+
+        assert len(calls) == 1
+        assert all(result == {"results": [{"id": 1}]} for result in results)
+        # Each caller has own copy
+        assert results[0] is not results[1]
+
+    def test_stale_entry_when_locked(self):
+        """Test that other process's lock gives the stale entry without the build"""
+        from django.core.cache import cache
+
+        cache.add(LOCK_PREFIX + "page_data_/", 1, timeout=1)
+
+        async def build():
+            raise AssertionError("Entry is rebuilding by other process")
+
+        async def read():
+            return {"results": []}, False
+
+        result = asyncio.run(SingleFlight(lock_timeout=1).do("page_data_/", build, read))
+
+        assert result == {"results": []}
+
+    def test_shared_cache_is_not_available(self, monkeypatch):
+        """Test that the miss is built at once when the lock can't be added (the shared cache is down)"""
+
+        class BrokenL2:
+            # 'TwoTierCache' without L2: 'aadd' is False, nobody has the lock
+            async def aadd(self, *args, **kwargs):
+                return False
+
+            async def aget(self, *args, **kwargs):
+                return None
+
+        monkeypatch.setattr(single_flight_module, "cache", BrokenL2())
+
+        async def build():
+            return {"results": [{"id": 1}]}
+
+        async def read():
+            return None, False
+
+        started = time.monotonic()
+        result = asyncio.run(SingleFlight(lock_timeout=10).do("page_data_/", build, read))
+
+        assert result == {"results": [{"id": 1}]}
+        assert time.monotonic() - started < 1
+
+    def test_lock_of_other_leader_is_kept(self):
+        """Test that the slow leader doesn't delete the lock of the next leader"""
+        from django.core.cache import cache
+
+        lock_key = LOCK_PREFIX + "page_data_/"
+
+        async def build():
+            # The lock of the slow leader was expired, other process is the leader now
+            cache.delete(lock_key)
+            cache.add(lock_key, "other", timeout=10)
+            return {"results": []}
+
+        async def read():
+            return None, False
+
+        asyncio.run(SingleFlight(lock_timeout=1).do("page_data_/", build, read))
+
+        assert cache.get(lock_key) == "other"
@@ -0,0 +1,110 @@
+import hashlib
+import os
+
+import pytest
+from model_bakery import baker
+
+from content import tasks
+from content.models import ContentFileHashModel, PageModel
+from content.models_content_files import AudioContentModel, VideoContentModel
+
+
+@pytest.fixture
+def media_dir(tmp_path, monkeypatch):
+    # The paths of the tasks are relative ('media/...')
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("media")
+    tasks.fduplicate.clear_cache()
+    yield tmp_path
+    tasks.fduplicate.clear_cache()
+
+
+class TestUploadTasks:
+    """Test cases for the single pass of the upload's bytes"""
+
+    @pytest.mark.parametrize(
+        "model, task, index_name, path_name",
+        [
+            (VideoContentModel, tasks.task_process_video_upload, "video_id", "video_path"),
+            (AudioContentModel, tasks.task_process_audio_upload, "audio_id", "audio_path"),
+        ],
+    )
+    @pytest.mark.django_db
+    def test_given_md5_is_not_recalculated(
+        self, media_dir, monkeypatch, model, task, index_name, path_name
+    ):
+        """Test that the task moves the temporary file and doesn't read it for the MD5"""
+        page = baker.make(PageModel)
+        # 'bulk_create' - the model's 'save' starts the file's upload
+        content = model.objects.bulk_create(
+            [baker.prepare(model, page=page, **{path_name: "2025/01/01/files/film.bin"})]
+        )[0]
+        data = b"the content of the file" * 100
+        temp_path = "media/0f0f_film.bin"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        file_md5 = hashlib.md5(data).hexdigest()
+        read_paths = []
+        calculate_md5 = tasks.fduplicate.calculate_md5
+        monkeypatch.setattr(
+            tasks.fduplicate,
+            "calculate_md5",
+            lambda file_obj, *args: read_paths.append(file_obj)
+            or calculate_md5(file_obj, *args),
+        )
+
+        task(
+            **{index_name: content.pk},
+            temp_path=temp_path,
+            file_name=temp_path,
+            file_md5=file_md5,
+        )
+
+        main_path = "media/2025/01/01/files/film.bin"
+        # The uploaded bytes are not read again (the other files of the library are checked)
+        assert temp_path not in read_paths
+        assert main_path not in read_paths
+        assert not os.path.exists(temp_path)
+        with open(main_path, "rb") as file:
+            assert file.read() == data
+        assert tasks.fduplicate.hash_map == {file_md5: main_path}
+        index = ContentFileHashModel.objects.get()
+        assert (index.digest, index.size, index.path, index.content_id) == (
+            file_md5,
+            len(data),
+            main_path,
+            content.pk,
+        )
+        content.refresh_from_db()
+        assert content.upload_status == "completed"
+        assert getattr(content, path_name).name == main_path
+
+    @pytest.mark.django_db
+    def test_unique_name_is_kept(self, media_dir):
+        """Test that the content's name with the upload's prefix is kept (the same names are not overwritten)"""
+        page = baker.make(PageModel)
+        contents = VideoContentModel.objects.bulk_create(
+            [
+                baker.prepare(
+                    VideoContentModel,
+                    page=page,
+                    video_path="2025/01/01/video/%s_film.bin" % prefix,
+                )
+                for prefix in ("0f0f", "1e1e")
+            ]
+        )
+        os.makedirs("media/uploads")
+        for prefix, content in zip(("0f0f", "1e1e"), contents):
+            temp_path = "media/uploads/%s_film.bin" % prefix
+            with open(temp_path, "wb") as file:
+                file.write(prefix.encode() * 100)
+
+            tasks.task_process_video_upload(
+                video_id=content.pk, temp_path=temp_path, file_name=temp_path
+            )
+
+        for prefix, content in zip(("0f0f", "1e1e"), contents):
+            content.refresh_from_db()
+            assert content.video_path.name == "media/2025/01/01/video/%s_film.bin" % prefix
+            with open(content.video_path.name, "rb") as file:
+                assert file.read() == prefix.encode() * 100
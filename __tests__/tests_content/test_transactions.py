@@ -0,0 +1,122 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from content.models import PageModel
+from content.models_content_files import AudioContentModel, VideoContentModel
+from content import transactions
+from content.realtime import upload_status_event
+from content.transactions import bulk_increment_counters
+
+
+class TestBulkIncrementCounters:
+    """Test cases for the single-statement increment of the counters"""
+
+    @pytest.mark.django_db
+    def test_bulk_increment_counters_queries(self):
+        """Test that 20 pages with 10 contents cost one statement per table"""
+        pages = baker.make(PageModel, _quantity=20)
+        # 'bulk_create' - the model's 'save' starts the file's upload
+        videos = VideoContentModel.objects.bulk_create(
+            [
+                baker.prepare(VideoContentModel, page=page, content_type="video")
+                for page in pages
+                for _ in range(5)
+            ]
+        )
+        audios = AudioContentModel.objects.bulk_create(
+            [
+                baker.prepare(AudioContentModel, page=page, content_type="audio")
+                for page in pages
+                for _ in range(5)
+            ]
+        )
+        deltas = {("video", v.id): 2 for v in videos}
+        deltas.update({("audio", a.id): 1 for a in audios})
+
+        with CaptureQueriesContext(connection) as queries:
+            result = bulk_increment_counters(deltas)
+
+        updates = [q for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        assert len(updates) == 2
+        assert set(
+            VideoContentModel.objects.values_list("counter", flat=True)
+        ) == {2}
+        assert set(
+            AudioContentModel.objects.values_list("counter", flat=True)
+        ) == {1}
+        assert result == {
+            "content_videocontentmodel": 100,
+            "content_audiocontentmodel": 100,
+        }
+
+    @pytest.mark.django_db
+    def test_other_table_is_untouched(self):
+        """Test that the key is updated only into the table of its content_type"""
+        page = baker.make(PageModel)
+        # The same 'id' into both tables. The audio is saved with content_type="video"
+        video = VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=page, counter=0)]
+        )[0]
+        audio = AudioContentModel.objects.bulk_create(
+            [
+                baker.prepare(
+                    AudioContentModel,
+                    page=page,
+                    id=video.id,
+                    counter=7,
+                    content_type="video",
+                )
+            ]
+        )[0]
+
+        with CaptureQueriesContext(connection) as queries:
+            result = bulk_increment_counters({("video", video.id): 3})
+
+        updates = [q for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        assert len(updates) == 1
+        assert "content_audiocontentmodel" not in updates[0]["sql"]
+        assert result == {
+            "content_videocontentmodel": 1,
+            "content_audiocontentmodel": 0,
+        }
+        video.refresh_from_db()
+        audio.refresh_from_db()
+        assert (video.counter, audio.counter) == (3, 7)
+
+        result = bulk_increment_counters({("audio", audio.id): 2})
+
+        audio.refresh_from_db()
+        assert result["content_audiocontentmodel"] == 1
+        assert audio.counter == 9
+
+
+class TestTransactionUpdate:
+    """Test cases for the update of the content's line"""
+
+    @pytest.mark.django_db
+    def test_upload_status_is_published(
+        self, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        """Test that the change of 'upload_status' is published after commit"""
+        published = []
+        monkeypatch.setattr(transactions, "publish", published.extend)
+        page = baker.make(PageModel)
+        video = VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=page)]
+        )[0]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            transactions.transaction_update(
+                "content_videocontentmodel", video.pk, upload_status="completed"
+            )
+            transactions.transaction_update(
+                "content_videocontentmodel", video.pk, order=3
+            )
+
+        assert published == [
+            upload_status_event(
+                "content_videocontentmodel", video.pk, page.pk, "completed"
+            )
+        ]
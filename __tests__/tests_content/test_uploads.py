@@ -0,0 +1,259 @@
+import hashlib
+import os
+import time
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from content import uploads
+from content.models import ChunkedUploadModel, PageModel
+from content.models_content_files import VideoContentModel
+from content.uploads import UPLOAD_OFFSET_HEADER, staging_path
+from project.settings import CONTENT_UPLOAD_MD5_STATE_TTL
+
+
+@pytest.fixture
+def video(db):
+    page = baker.make(PageModel)
+    # 'bulk_create' - the model's 'save' starts the file's upload
+    return VideoContentModel.objects.bulk_create(
+        [baker.prepare(VideoContentModel, page=page)]
+    )[0]
+
+
+class TestChunkedUpload:
+    """Test cases for the resumable upload"""
+
+    @staticmethod
+    def _patch(api_client, upload_id, offset, body):
+        return api_client.patch(
+            reverse("api_keys:uploads-detail", kwargs={"pk": upload_id}),
+            data=body,
+            content_type="application/offset+octet-stream",
+            **{"HTTP_UPLOAD_OFFSET": str(offset)},
+        )
+
+    @pytest.mark.django_db
+    def test_resume_and_finalize(self, api_client, video, monkeypatch):
+        """Test the chunks by offsets, the resume after the wrong offset and the finalize"""
+        submitted = []
+        monkeypatch.setattr(
+            uploads.background,
+            "submit",
+            lambda target, args=(), kwargs=None, timeout=None: submitted.append(kwargs)
+            or True,
+        )
+        data = b"0123456789" * 3
+        created = api_client.post(
+            reverse("api_keys:uploads-list"),
+            {
+                "content_type": "video",
+                "content_id": video.pk,
+                "filename": "../My film.mp4",
+                "size": len(data),
+            },
+            format="json",
+        )
+        assert created.status_code == status.HTTP_201_CREATED
+        upload_id = created.data["id"]
+        assert created.data["filename"] == "My_film.mp4"
+
+        first = self._patch(api_client, upload_id, 0, data[:12])
+        # The client has lost the response and sends the old offset
+        conflict = self._patch(api_client, upload_id, 0, data[:12])
+        head = api_client.head(
+            reverse("api_keys:uploads-detail", kwargs={"pk": upload_id})
+        )
+        not_complete = api_client.post(
+            reverse("api_keys:uploads-finalize", kwargs={"pk": upload_id})
+        )
+        second = self._patch(api_client, upload_id, head[UPLOAD_OFFSET_HEADER], data[12:])
+        finalized = api_client.post(
+            reverse("api_keys:uploads-finalize", kwargs={"pk": upload_id})
+        )
+
+        assert first.status_code == status.HTTP_204_NO_CONTENT
+        assert first[UPLOAD_OFFSET_HEADER] == "12"
+        assert conflict.status_code == status.HTTP_409_CONFLICT
+        assert conflict[UPLOAD_OFFSET_HEADER] == "12"
+        assert head[UPLOAD_OFFSET_HEADER] == "12"
+        assert not_complete.status_code == status.HTTP_409_CONFLICT
+        assert second[UPLOAD_OFFSET_HEADER] == str(len(data))
+        assert finalized.status_code == status.HTTP_202_ACCEPTED
+        upload = ChunkedUploadModel.objects.get(pk=upload_id)
+        path = staging_path(upload)
+        with open(path, "rb") as file:
+            assert file.read() == data
+        assert submitted == [
+            {
+                "video_id": video.pk,
+                "temp_path": path,
+                "file_name": path,
+                "file_md5": hashlib.md5(data).hexdigest(),
+            }
+        ]
+        video.refresh_from_db()
+        assert video.upload_status == "processing"
+        # The unique name - the uploads of the same name don't overwrite each other
+        assert video.video_path.name.endswith("/video/%s_My_film.mp4" % upload.pk.hex)
+        os.remove(path)
+
+    @pytest.mark.django_db
+    def test_md5_of_other_process(self, api_client, video, monkeypatch):
+        """Test the MD5 when the chunks were written by other process (the staging file is hashed once)"""
+        submitted = []
+        monkeypatch.setattr(
+            uploads.background,
+            "submit",
+            lambda target, args=(), kwargs=None, timeout=None: submitted.append(kwargs)
+            or True,
+        )
+        data = b"abcdef" * 5
+        upload = ChunkedUploadModel.objects.create(
+            content_type="video", content_id=video.pk, filename="b.mp4", size=len(data)
+        )
+        self._patch(api_client, upload.pk, 0, data[:7])
+        # The chunk is failed, the state of MD5 is not changed
+        self._patch(api_client, upload.pk, 7, data[7:] + b"extra")
+        self._patch(api_client, upload.pk, 7, data[7:20])
+        uploads._md5_states.clear()
+        self._patch(api_client, upload.pk, 20, data[20:])
+
+        api_client.post(reverse("api_keys:uploads-finalize", kwargs={"pk": upload.pk}))
+
+        assert submitted[0]["file_md5"] == hashlib.md5(data).hexdigest()
+        os.remove(staging_path(upload))
+
+    @pytest.mark.django_db
+    def test_queue_is_full(self, api_client, video, monkeypatch):
+        """Test that the rejected work is 503 and the upload and the content are returned back"""
+        monkeypatch.setattr(
+            uploads.background,
+            "submit",
+            # The queue is full
+            lambda target, args=(), kwargs=None, timeout=None: False,
+        )
+        VideoContentModel.objects.filter(pk=video.pk).update(
+            video_path="media/2025/01/01/video/old.mp4", upload_status="completed"
+        )
+        upload = ChunkedUploadModel.objects.create(
+            content_type="video", content_id=video.pk, filename="c.mp4", size=3
+        )
+        self._patch(api_client, upload.pk, 0, b"abc")
+
+        response = api_client.post(
+            reverse("api_keys:uploads-finalize", kwargs={"pk": upload.pk})
+        )
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        upload.refresh_from_db()
+        assert upload.status == "uploading"
+        video.refresh_from_db()
+        assert video.upload_status == "completed"
+        assert video.video_path.name == "media/2025/01/01/video/old.mp4"
+        os.remove(staging_path(upload))
+
+    @pytest.mark.django_db
+    def test_ingest_is_failed(self, api_client, video, monkeypatch):
+        """Test that the upload is 'uploading' again and the content is returned back when the submit is failed"""
+
+        def submit(target, args=(), kwargs=None, timeout=None):
+            raise RuntimeError("The pool is shut down")
+
+        monkeypatch.setattr(uploads.background, "submit", submit)
+        VideoContentModel.objects.filter(pk=video.pk).update(
+            video_path="media/2025/01/01/video/old.mp4", upload_status="completed"
+        )
+        upload = ChunkedUploadModel.objects.create(
+            content_type="video", content_id=video.pk, filename="d.mp4", size=3
+        )
+        self._patch(api_client, upload.pk, 0, b"abc")
+
+        with pytest.raises(RuntimeError):
+            uploads.finalize_upload(upload.pk)
+
+        upload.refresh_from_db()
+        assert upload.status == "uploading"
+        video.refresh_from_db()
+        assert video.upload_status == "completed"
+        assert video.video_path.name == "media/2025/01/01/video/old.mp4"
+        os.remove(staging_path(upload))
+
+    @pytest.mark.django_db
+    def test_finalize_duplicate(self, api_client, tmp_path, monkeypatch):
+        """Test that the duplicate upload gets the path of the first file and it's completed"""
+        from content import tasks
+
+        # The paths of the uploads and of the tasks are relative ('media/...')
+        monkeypatch.chdir(tmp_path)
+        tasks.fduplicate.clear_cache()
+        monkeypatch.setattr(
+            uploads.background,
+            "submit",
+            # The task is run at once
+            lambda target, args=(), kwargs=None, timeout=None: target(**kwargs) or True,
+        )
+        page = baker.make(PageModel)
+        first, second = VideoContentModel.objects.bulk_create(
+            [baker.prepare(VideoContentModel, page=page) for _ in range(2)]
+        )
+        data = b"the same film" * 100
+        for content in (first, second):
+            upload = ChunkedUploadModel.objects.create(
+                content_type="video", content_id=content.pk, filename="e.mp4", size=len(data)
+            )
+            self._patch(api_client, upload.pk, 0, data)
+            response = api_client.post(
+                reverse("api_keys:uploads-finalize", kwargs={"pk": upload.pk})
+            )
+            assert response.status_code == status.HTTP_202_ACCEPTED
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert first.upload_status == "completed"
+        assert second.upload_status == "completed"
+        assert second.video_path.name == first.video_path.name
+        assert not os.path.exists(staging_path(upload))
+        tasks.fduplicate.clear_cache()
+
+    def test_abandoned_md5_state(self, monkeypatch):
+        """Test that the state of MD5 of the abandoned upload is dropped"""
+        monkeypatch.setattr(
+            uploads,
+            "_md5_states",
+            {
+                "old": (5, hashlib.md5(), time.monotonic() - CONTENT_UPLOAD_MD5_STATE_TTL - 1),
+                "new": (5, hashlib.md5(), time.monotonic()),
+            },
+        )
+
+        uploads._evict_md5_states()
+
+        assert [*uploads._md5_states] == ["new"]
+
+    @pytest.mark.django_db
+    def test_out_of_size(self, api_client, video):
+        """Test that the chunk over the declared size is not committed"""
+        upload = ChunkedUploadModel.objects.create(
+            content_type="video", content_id=video.pk, filename="a.mp4", size=4
+        )
+
+        response = self._patch(api_client, upload.pk, 0, b"123456")
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        upload.refresh_from_db()
+        assert upload.offset == 0
+        os.remove(staging_path(upload))
+
+    @pytest.mark.django_db
+    def test_unknown_content(self, api_client):
+        """Test that the upload of the missing content is 400"""
+        response = api_client.post(
+            reverse("api_keys:uploads-list"),
+            {"content_type": "audio", "content_id": 999, "filename": "a.mp3", "size": 1},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -9,3 +9,7 @@ class CustomStaticFilesStorage(StaticFilesStorage):
 class ContentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "content"
+
+    def ready(self):
+        # Invalidation of the API's cache
+        import content.signals  # noqa: F401
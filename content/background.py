@@ -0,0 +1,240 @@
+"""
+content/background.py
+The bounded executor of the background's work (fire-and-forget).
+All views and models send their work here instead of 'threading.Thread' per request:
+- the quantity of threads is limited by 'BACKGROUND_MAX_WORKERS';
+- the quantity of the waiting work is limited by 'BACKGROUND_QUEUE_SIZE' (backpressure - \
+'submit' waits the free place or rejects the work);
+- the queued work is completed at the process's exit (graceful drain).
+The async views use 'submit_nowait' - it never waits the free place (it doesn't block the event's loop), \
+the work is rejected (and is counted) when the queue is full.
+```python
+from content.background import background
+
+background.submit(counter_aggregator.add, args=(keys,))
+background.submit_nowait(counter_aggregator.add, args=(keys,))
+```
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from logs import configure_logging
+from project.settings import (
+    BACKGROUND_DRAIN_TIMEOUT,
+    BACKGROUND_MAX_WORKERS,
+    BACKGROUND_QUEUE_SIZE,
+    BACKGROUND_SUBMIT_TIMEOUT,
+)
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+_DEFAULT = object()
+
+
+class BackgroundExecutor:
+    """
+    Thread pool with the bounded queue and with the metrics.
+    The coroutine's function is run by 'asyncio.run' into the worker's thread.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = BACKGROUND_MAX_WORKERS,
+        queue_size: int = BACKGROUND_QUEUE_SIZE,
+        submit_timeout: float = BACKGROUND_SUBMIT_TIMEOUT,
+        name: str = "background",
+    ):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.submit_timeout = submit_timeout
+        self.name = name
+        # One place for each running and for each waiting work
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._closed = False
+        self._metrics: Dict[str, int] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "pending": 0,
+            "max_pending": 0,
+        }
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+            return self._executor
+
+    def get_metrics(self) -> Dict[str, int]:
+        """
+        :return: '{"submitted": 10, "completed": 9, "failed": 0, "rejected": 0, "pending": 1, ...}'
+        """
+        with self._lock:
+            return dict(self._metrics)
+
+    def submit(
+        self,
+        target: Callable[..., Any],
+        args: tuple = (),
+        kwargs: dict | None = None,
+        timeout: Any = _DEFAULT,
+    ) -> bool:
+        """
+        Send the work to the pool.
+        :param target: The function or the coroutine's function.
+        :param tuple args: Positional arguments of 'target'.
+        :param dict kwargs: Keyword arguments of 'target'.
+        :param timeout: How long (seconds) is waiting the free place into the queue. \
+            'None' - waiting without limit (for work which must not be lost, the uploads).
+        :return: False when the work was rejected (the queue is full or the executor is closed).
+        """
+        timeout = self.submit_timeout if timeout is _DEFAULT else timeout
+        if self._closed or not (
+            self._slots.acquire(blocking=False)
+            if timeout == 0
+            else self._slots.acquire(timeout=timeout)
+        ):
+            with self._lock:
+                self._metrics["rejected"] += 1
+            log.error(
+                "%s: Error => The work '%s' was rejected (the queue is full or closed)"
+                % (
+                    BackgroundExecutor.__name__ + "." + self.submit.__name__,
+                    getattr(target, "__name__", target),
+                )
+            )
+            return False
+        with self._lock:
+            self._metrics["submitted"] += 1
+            self._metrics["pending"] += 1
+            self._metrics["max_pending"] = max(
+                self._metrics["max_pending"], self._metrics["pending"]
+            )
+        try:
+            self.executor.submit(self._run, target, args, kwargs or {})
+        except RuntimeError as error:
+            # The pool was shut down
+            self._done("rejected")
+            log.error(
+                "%s: Error => %s"
+                % (BackgroundExecutor.__name__ + "." + self.submit.__name__, error)
+            )
+            return False
+        return True
+
+    def submit_nowait(
+        self, target: Callable[..., Any], args: tuple = (), kwargs: dict | None = None
+    ) -> bool:
+        """
+        Send the work to the pool without waiting of the free place (for the async code - \
+        the event's loop is not blocked). When the queue is full, the work is rejected.
+        :param target: The function or the coroutine's function.
+        :param tuple args: Positional arguments of 'target'.
+        :param dict kwargs: Keyword arguments of 'target'.
+        :return: False when the work was rejected.
+        """
+        return self.submit(target, args=args, kwargs=kwargs, timeout=0)
+
+    def _run(self, target: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        try:
+            if asyncio.iscoroutinefunction(target):
+                asyncio.run(target(*args, **kwargs))
+            else:
+                target(*args, **kwargs)
+        except Exception as error:
+            self._done("failed")
+            log.error(
+                "%s: Error => %s"
+                % (
+                    BackgroundExecutor.__name__ + "." + getattr(target, "__name__", ""),
+                    error.args[0] if error.args else error,
+                )
+            )
+            return
+        self._done("completed")
+
+    def _done(self, name: str) -> None:
+        with self._lock:
+            self._metrics[name] += 1
+            self._metrics["pending"] -= 1
+            if self._metrics["pending"] == 0:
+                self._idle.notify_all()
+        self._slots.release()
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """
+        Wait all the work which was submitted.
+        :param timeout: Seconds or None (without limit).
+        :return: False when the work was not completed during 'timeout'.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._metrics["pending"] > 0:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float | None = BACKGROUND_DRAIN_TIMEOUT) -> None:
+        """
+        Stop receiving the new work and complete the queued work (graceful drain).
+        """
+        self._closed = True
+        if not self.drain(timeout):
+            log.error(
+                "%s: Error => %s works were not completed"
+                % (
+                    BackgroundExecutor.__name__ + "." + self.shutdown.__name__,
+                    self.get_metrics()["pending"],
+                )
+            )
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def register_shutdown(executor: BackgroundExecutor, **kwargs) -> None:
+    """
+    Call 'executor.shutdown' at the process's exit.
+    The hook is registered before the exit's hook of 'ThreadPoolExecutor' (it joins the workers), \
+    so the queued work which was not completed during the drain's timeout is cancelled. It's \
+    'threading._register_atexit' - it's private, so it's guarded.
+    FALLBACK. Without it (other python or the interpreter is shutting down) the hook is 'atexit.register': \
+    it's called after the workers were joined - all queued work is completed and the timeout doesn't work. \
+    The workers of celery call 'shutdown' explicitly ('worker_shutdown' into 'content/tasks.py'), \
+    the timeout works there without the private hook.
+    :param BackgroundExecutor executor:
+    :param kwargs: Arguments of 'shutdown' ('timeout').
+    :return: None
+    """
+    register = getattr(threading, "_register_atexit", None)
+    if register is not None:
+        try:
+            register(executor.shutdown, **kwargs)
+            return
+        except RuntimeError as error:
+            # The interpreter is shutting down
+            log.error(
+                "%s: Error => %s"
+                % (register_shutdown.__name__, error.args[0] if error.args else error)
+            )
+    atexit.register(executor.shutdown, **kwargs)
+
+background = BackgroundExecutor()
+register_shutdown(background)
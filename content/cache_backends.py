@@ -0,0 +1,494 @@
+"""
+content/cache_backends.py
+The two-tier cache for the content's API.
+L1 - it's the bounded in-process LRU with the short TTL (hot pages are served without the network's hop).
+L2 - it's the shared redis ('django-redis' alias from 'CACHES'). It's common for all daphne's workers and celery.
+L2's hit is promoted to L1. The oldest entries of L1 are demoted (they are stay into L2 only).
+The async methods ('aget', 'aset', ...) don't borrow the thread: L1 is read directly, L2 ('django-redis') \
+is called by the 'redis.asyncio' client with the same keys and the same serializer.
+```python
+CACHES = {
+    "default": {
+        "BACKEND": "content.cache_backends.TwoTierCache",
+        "OPTIONS": {"L2_ALIAS": "shared", "L1_MAX_ENTRIES": 512, "L1_TIMEOUT": 5},
+    },
+    "shared": {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": "redis://..."},
+}
+```
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from logs import configure_logging
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+
+class LRUCache:
+    """
+    Bounded in-process LRU with TTL. It's thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 512, timeout: float = 5):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str, default=None) -> Tuple[bool, Any]:
+        """
+        :return: '(True, value)' or '(False, default)' when key is missing or is expired.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return False, default
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, timeout: float | None = None) -> None:
+        if self.max_entries <= 0:
+            return
+        ttl = self.timeout if timeout is None else min(self.timeout, timeout)
+        if ttl <= 0:
+            self.delete(key)
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            # DEMOTION. The oldest entries stay into the L2 only
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class AsyncRedisL2:
+    """
+    Async access to the 'django-redis' cache. The connection of 'redis.asyncio' is bound to the event loop,
+    so here is the one client per loop.
+    """
+
+    def __init__(self, backend: BaseCache, location: str | List[str]):
+        """
+        :param backend: The 'django-redis' cache.
+        :param location: 'LOCATION' of its alias from 'CACHES' (the first server is used, how 'django-redis' \
+            writes into it).
+        """
+        # 'django_redis.client.DefaultClient' - its 'make_key', 'encode', 'decode' are used
+        self._client = backend.client
+        self._backend = backend
+        if isinstance(location, str):
+            location = location.split(",")
+        self._url: str = location[0].strip()
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @staticmethod
+    def supports(backend: BaseCache) -> bool:
+        return backend.__class__.__module__.startswith("django_redis")
+
+    @property
+    def redis(self):
+        import redis.asyncio
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = redis.asyncio.Redis.from_url(self._url)
+            self._clients[loop] = client
+        return client
+
+    def _timeout_ms(self, timeout) -> int | None:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._backend.default_timeout
+        return None if timeout is None else int(timeout * 1000)
+
+    async def get(self, key, default=None, version=None):
+        value = await self.redis.get(self._client.make_key(key, version=version))
+        return default if value is None else self._client.decode(value)
+
+    async def get_many(self, keys, version=None) -> Dict[str, Any]:
+        keys = list(keys)
+        values = await self.redis.mget(
+            [self._client.make_key(key, version=version) for key in keys]
+        )
+        return {
+            key: self._client.decode(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, nx=False) -> bool:
+        timeout_ms = self._timeout_ms(timeout)
+        nkey = self._client.make_key(key, version=version)
+        if timeout_ms is not None and timeout_ms <= 0:
+            if nx:
+                return not await self.redis.exists(nkey)
+            return bool(await self.redis.delete(nkey))
+        return bool(
+            await self.redis.set(nkey, self._client.encode(value), nx=nx, px=timeout_ms)
+        )
+
+    async def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None) -> List[str]:
+        pipe = self.redis.pipeline(transaction=False)
+        timeout_ms = self._timeout_ms(timeout)
+        for key, value in data.items():
+            pipe.set(
+                self._client.make_key(key, version=version),
+                self._client.encode(value),
+                px=timeout_ms,
+            )
+        await pipe.execute()
+        return []
+
+    async def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        return await self.set(key, value, timeout, version=version, nx=True)
+
+    async def delete(self, key, version=None) -> bool:
+        return bool(await self.redis.delete(self._client.make_key(key, version=version)))
+
+    # Delete the key only when it has the value (the owner of the lock)
+    DELETE_IF_EQUAL_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    async def delete_if_equal(self, key, value, version=None) -> bool:
+        script = self.redis.register_script(self.DELETE_IF_EQUAL_SCRIPT)
+        return bool(
+            await script(
+                keys=[self._client.make_key(key, version=version)],
+                args=[self._client.encode(value)],
+            )
+        )
+
+
+class TwoTierCache(BaseCache):
+    """
+    Django's cache backend: in-process LRU (L1) in front of the shared cache (L2).
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._l2_alias = options.get("L2_ALIAS", "shared")
+        self._l1 = LRUCache(
+            max_entries=int(options.get("L1_MAX_ENTRIES", 512)),
+            timeout=float(options.get("L1_TIMEOUT", 5)),
+        )
+        self._al2_client: AsyncRedisL2 | None = None
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "l1_hits": 0,
+            "l1_misses": 0,
+            "l2_hits": 0,
+            "l2_misses": 0,
+            "l2_errors": 0,
+        }
+
+    @property
+    def l2(self) -> BaseCache:
+        return caches[self._l2_alias]
+
+    @property
+    def _al2(self) -> AsyncRedisL2 | BaseCache:
+        """
+        The async access to L2. The other backends (not 'django-redis') use their own 'aget', 'aset', ...
+        """
+        if self._al2_client is None and AsyncRedisL2.supports(self.l2):
+            self._al2_client = AsyncRedisL2(
+                self.l2, settings.CACHES[self._l2_alias]["LOCATION"]
+            )
+        return self._al2_client or self.l2
+
+    def _count(self, name: str, quantity: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += quantity
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Hits & misses of each tier.
+        :return: '{"l1_hits": 10, "l1_misses": 2, "l2_hits": 1, "l2_misses": 1, ...}'
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["l1_entries"] = len(self._l1)
+        stats["l1_evictions"] = self._l1.evictions
+        return stats
+
+    def _l1_timeout(self, timeout) -> float | None:
+        timeout = self.get_backend_timeout(timeout)
+        return None if timeout is None else max(timeout - time.time(), 0)
+
+    def _l2_call(self, method: str, *args, default=None, raises: tuple = (), **kwargs):
+        """
+        :param default: The result when the shared cache is not available.
+        :param tuple raises: The errors of the method's contract (they are not the cache's failure).
+        """
+        try:
+            return getattr(self.l2, method)(*args, **kwargs)
+        except raises:
+            raise
+        except Exception as error:
+            # The shared cache is not available. L1 is still working.
+            self._count("l2_errors")
+            log.error(
+                "%s: Error => %s"
+                % (
+                    TwoTierCache.__name__ + "." + method,
+                    error.args[0] if error.args else error,
+                )
+            )
+            return default
+
+    async def _al2_call(self, method: str, *args, default=None, **kwargs):
+        al2 = self._al2
+        try:
+            if al2 is self.l2:
+                return await getattr(al2, "a" + method)(*args, **kwargs)
+            return await getattr(al2, method)(*args, **kwargs)
+        except Exception as error:
+            self._count("l2_errors")
+            log.error(
+                "%s: Error => %s"
+                % (
+                    TwoTierCache.__name__ + ".a" + method,
+                    error.args[0] if error.args else error,
+                )
+            )
+            return default
+
+    def get(self, key, default=None, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        found, value = self._l1.get(l1_key)
+        if found:
+            self._count("l1_hits")
+            return value
+        self._count("l1_misses")
+        missing = object()
+        value = self._l2_call("get", key, missing, version=version, default=missing)
+        if value is missing:
+            self._count("l2_misses")
+            return default
+        self._count("l2_hits")
+        # PROMOTION
+        self._l1.set(l1_key, value)
+        return value
+
+    def get_many(self, keys, version=None) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        l2_keys = []
+        for key in keys:
+            found, value = self._l1.get(self.make_and_validate_key(key, version=version))
+            if found:
+                result[key] = value
+            else:
+                l2_keys.append(key)
+        self._count("l1_hits", len(result))
+        self._count("l1_misses", len(l2_keys))
+        if l2_keys:
+            l2_result = self._l2_call("get_many", l2_keys, version=version, default={})
+            self._count("l2_hits", len(l2_result))
+            self._count("l2_misses", len(l2_keys) - len(l2_result))
+            for key, value in l2_result.items():
+                self._l1.set(self.make_and_validate_key(key, version=version), value)
+            result.update(l2_result)
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> None:
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        self._l2_call("set", key, value, timeout=timeout, version=version)
+        self._l1.set(
+            self.make_and_validate_key(key, version=version),
+            value,
+            self._l1_timeout(timeout),
+        )
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None) -> list:
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        failed = self._l2_call(
+            "set_many", data, timeout=timeout, version=version, default=[]
+        )
+        l1_timeout = self._l1_timeout(timeout)
+        for key, value in data.items():
+            self._l1.set(self.make_and_validate_key(key, version=version), value, l1_timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        added = self._l2_call(
+            "add", key, value, timeout=timeout, version=version, default=False
+        )
+        if added:
+            self._l1.set(
+                self.make_and_validate_key(key, version=version),
+                value,
+                self._l1_timeout(timeout),
+            )
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        self._l1.delete(self.make_and_validate_key(key, version=version))
+        return self._l2_call("touch", key, timeout=timeout, version=version, default=False)
+
+    def delete(self, key, version=None) -> bool:
+        deleted_l1 = self._l1.delete(self.make_and_validate_key(key, version=version))
+        deleted_l2 = self._l2_call("delete", key, version=version, default=False)
+        return bool(deleted_l1 or deleted_l2)
+
+    def delete_many(self, keys, version=None) -> None:
+        for key in keys:
+            self._l1.delete(self.make_and_validate_key(key, version=version))
+        self._l2_call("delete_many", keys, version=version)
+
+    def has_key(self, key, version=None) -> bool:
+        found, _ = self._l1.get(self.make_and_validate_key(key, version=version))
+        return found or self._l2_call("has_key", key, version=version, default=False)
+
+    def incr(self, key, delta=1, version=None) -> int:
+        """
+        The counter is atomic into L2 only.
+        :raise ValueError: The key is not found (or the shared cache is not available), how Django's 'incr'.
+        """
+        self._l1.delete(self.make_and_validate_key(key, version=version))
+        missing = object()
+        value = self._l2_call(
+            "incr", key, delta, version=version, default=missing, raises=(ValueError,)
+        )
+        if value is missing:
+            raise ValueError("Key '%s' not found." % key)
+        return value
+
+    def clear(self) -> None:
+        self._l1.clear()
+        self._l2_call("clear")
+
+    def close(self, **kwargs) -> None:
+        self._l2_call("close", **kwargs)
+
+    async def aget(self, key, default=None, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        found, value = self._l1.get(l1_key)
+        if found:
+            self._count("l1_hits")
+            return value
+        self._count("l1_misses")
+        missing = object()
+        value = await self._al2_call(
+            "get", key, missing, version=version, default=missing
+        )
+        if value is missing:
+            self._count("l2_misses")
+            return default
+        self._count("l2_hits")
+        # PROMOTION
+        self._l1.set(l1_key, value)
+        return value
+
+    async def aget_many(self, keys, version=None) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        l2_keys = []
+        for key in keys:
+            found, value = self._l1.get(self.make_and_validate_key(key, version=version))
+            if found:
+                result[key] = value
+            else:
+                l2_keys.append(key)
+        self._count("l1_hits", len(result))
+        self._count("l1_misses", len(l2_keys))
+        if l2_keys:
+            l2_result = await self._al2_call(
+                "get_many", l2_keys, version=version, default={}
+            )
+            self._count("l2_hits", len(l2_result))
+            self._count("l2_misses", len(l2_keys) - len(l2_result))
+            for key, value in l2_result.items():
+                self._l1.set(self.make_and_validate_key(key, version=version), value)
+            result.update(l2_result)
+        return result
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> None:
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        await self._al2_call("set", key, value, timeout=timeout, version=version)
+        self._l1.set(
+            self.make_and_validate_key(key, version=version),
+            value,
+            self._l1_timeout(timeout),
+        )
+
+    async def aset_many(self, data, timeout=DEFAULT_TIMEOUT, version=None) -> list:
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        failed = await self._al2_call(
+            "set_many", data, timeout=timeout, version=version, default=[]
+        )
+        l1_timeout = self._l1_timeout(timeout)
+        for key, value in data.items():
+            self._l1.set(self.make_and_validate_key(key, version=version), value, l1_timeout)
+        return failed
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        added = await self._al2_call(
+            "add", key, value, timeout=timeout, version=version, default=False
+        )
+        if added:
+            self._l1.set(
+                self.make_and_validate_key(key, version=version),
+                value,
+                self._l1_timeout(timeout),
+            )
+        return added
+
+    async def adelete(self, key, version=None) -> bool:
+        deleted_l1 = self._l1.delete(self.make_and_validate_key(key, version=version))
+        deleted_l2 = await self._al2_call("delete", key, version=version, default=False)
+        return bool(deleted_l1 or deleted_l2)
+
+    async def adelete_if_equal(self, key, value, version=None) -> bool:
+        """
+        Compare-and-delete: the key is deleted only when it has this value (the lock of other owner \
+        is not deleted). It's atomic into redis; other backends of L2 read the key before the delete.
+        :return: True when the key was deleted from L2.
+        """
+        l1_key = self.make_and_validate_key(key, version=version)
+        found, current = self._l1.get(l1_key)
+        if found and current == value:
+            self._l1.delete(l1_key)
+        if isinstance(self._al2, AsyncRedisL2):
+            return await self._al2_call(
+                "delete_if_equal", key, value, version=version, default=False
+            )
+        if await self._al2_call("get", key, version=version) != value:
+            return False
+        return bool(await self._al2_call("delete", key, version=version, default=False))
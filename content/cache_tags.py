@@ -0,0 +1,271 @@
+"""
+content/cache_tags.py
+Tag/version-based invalidation of the cached API's responses.
+Each cached entry has the tags of the pages and of the contents which it contains
+('page:2', 'content:video:5', 'pages' for the lists) and the versions of these tags at caching time.
+Any save of the row bumps the versions of its tags. The entry with the old version is the miss,
+all the rest entries keep their long TTL.
+Note: the versions are read through the default (two-tier) cache, so other workers see the bump \
+in 'L1_TIMEOUT' seconds or less.
+When the shared cache is down, the created version is kept by L1 (the entries are not stale on each read, \
+the ETag is the same), it's created again after 'L1_TIMEOUT'.
+The entry is fresh for 'CONTENT_CACHE_TIMEOUT' seconds. After it (or after the bump of its tags), the entry \
+is stale - it's served only while other caller rebuilds it (see 'single_flight.py').
+"""
+
+import logging
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Tuple
+
+from django.core.cache import cache
+
+from content.serialization import pack, unpack
+from logs import configure_logging
+from project.settings import CONTENT_CACHE_TIMEOUT
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+TAG_VERSION_PREFIX = "tag_version_"
+# The tag of all lists of pages (new page or the deleted page is changing each list)
+PAGES_LIST_TAG = "pages"
+
+
+def page_tag(page_id: int | str) -> str:
+    return "page:%s" % page_id
+
+
+def content_tag(content_type: str, content_id: int | str) -> str:
+    return "content:%s:%s" % (str(content_type).lower(), content_id)
+
+
+def tags_of_data(data: dict) -> List[str]:
+    """
+    Get the tags of the single page or of the paginated list of pages.
+    :param dict data: 'Initial' or 'InitialPage'
+    :return: '["pages", "page:2", "content:video:5", ...]'
+    """
+    tags: List[str] = []
+    pages = data["results"] if "results" in data else [data]
+    if "results" in data:
+        tags.append(PAGES_LIST_TAG)
+    for page in pages:
+        if "id" in page:
+            tags.append(page_tag(page["id"]))
+        for content in page.get("contents") or []:
+            tags.append(content_tag(content["content_type"], content["id"]))
+    return list(dict.fromkeys(tags))
+
+
+def _new_version() -> str:
+    return "%s-%s" % (time.time_ns(), uuid.uuid4().hex[:8])
+
+
+async def aget_tag_versions(tags: Iterable[str]) -> Dict[str, str]:
+    """
+    Async version of 'get_tag_versions' (the cache's async methods, without the thread).
+    :param tags: '["page:2", ...]'
+    :return: '{"page:2": "1756290000000000000-1a2b3c4d", ...}'
+    """
+    tags = list(tags)
+    keys = {TAG_VERSION_PREFIX + tag: tag for tag in tags}
+    versions = await cache.aget_many(list(keys.keys()))
+    result: Dict[str, str] = {}
+    for key, tag in keys.items():
+        version = versions.get(key)
+        if version is None:
+            version = _new_version()
+            if not await cache.aadd(key, version, timeout=None):
+                current = await cache.aget(key)
+                if current is None:
+                    # The shared cache is down (the version is not added and not read), L1 keeps it
+                    await cache.aset(key, version, timeout=None)
+                else:
+                    version = current
+        result[tag] = version
+    return result
+
+
+def get_tag_versions(tags: Iterable[str]) -> Dict[str, str]:
+    """
+    Get the current versions of tags. The missing version is created.
+    :param tags: '["page:2", ...]'
+    :return: '{"page:2": "1756290000000000000-1a2b3c4d", ...}'
+    """
+    tags = list(tags)
+    keys = {TAG_VERSION_PREFIX + tag: tag for tag in tags}
+    versions = cache.get_many(list(keys.keys()))
+    result: Dict[str, str] = {}
+    for key, tag in keys.items():
+        version = versions.get(key)
+        if version is None:
+            version = _new_version()
+            # The version is never expired. If it was lost, the new version invalidates the entries.
+            if not cache.add(key, version, timeout=None):
+                current = cache.get(key)
+                if current is None:
+                    # The shared cache is down (the version is not added and not read), L1 keeps it
+                    cache.set(key, version, timeout=None)
+                else:
+                    version = current
+        result[tag] = version
+    return result
+
+
+def bump_tags(tags: Iterable[str]) -> None:
+    """
+    Invalidate all the entries which contain these tags.
+    :param tags: '["page:2", "content:video:5"]'
+    :return: None
+    """
+    tags = list(dict.fromkeys(tags))
+    if not tags:
+        return
+    try:
+        cache.set_many(
+            {TAG_VERSION_PREFIX + tag: _new_version() for tag in tags}, timeout=None
+        )
+    except Exception as error:
+        log.error(
+            "%s: Error => %s"
+            % (bump_tags.__name__, error.args[0] if error.args else error)
+        )
+
+
+def dumps_tagged(data: dict, timeout: int = CONTENT_CACHE_TIMEOUT) -> bytes:
+    """
+    The entry for the cache (the compact encoding, see 'content/serialization.py').
+    It's the data plus the current versions of its tags.
+    :param dict data: 'Initial' or 'InitialPage'
+    :param int timeout: The entry is fresh during this time (seconds).
+    :return: '{"data": {...}, "tags": {"page:2": "...", ...}, "expires_at": 1756290000.0}'
+    """
+    return pack(
+        {
+            "data": data,
+            "tags": get_tag_versions(tags_of_data(data)),
+            "expires_at": time.time() + timeout,
+        }
+    )
+
+
+async def adumps_tagged(data: dict, timeout: int = CONTENT_CACHE_TIMEOUT) -> bytes:
+    """
+    Async version of 'dumps_tagged'.
+    :param dict data: 'Initial' or 'InitialPage'
+    :param int timeout: The entry is fresh during this time (seconds).
+    :return: '{"data": {...}, "tags": {"page:2": "...", ...}, "expires_at": 1756290000.0}'
+    """
+    return pack(
+        {
+            "data": data,
+            "tags": await aget_tag_versions(tags_of_data(data)),
+            "expires_at": time.time() + timeout,
+        }
+    )
+
+
+async def adumps_tagged_many(
+    items: Dict[str, dict], timeout: int = CONTENT_CACHE_TIMEOUT
+) -> Dict[str, bytes]:
+    """
+    The entries of many pages with one read of the tag's versions (the batch's endpoint).
+    :param dict items: '{< caching_key >: < InitialPage >, ...}'
+    :param int timeout: The entry is fresh during this time (seconds).
+    :return: '{< caching_key >: < entry >, ...}'
+    """
+    tags_by_key = {key: tags_of_data(data) for key, data in items.items()}
+    versions = await aget_tag_versions(
+        dict.fromkeys(tag for tags in tags_by_key.values() for tag in tags)
+    )
+    expires_at = time.time() + timeout
+    return {
+        key: pack(
+            {
+                "data": items[key],
+                "tags": {tag: versions[tag] for tag in tags},
+                "expires_at": expires_at,
+            }
+        )
+        for key, tags in tags_by_key.items()
+    }
+
+
+async def aloads_entries(
+    cache_gets: Dict[str, bytes | str | None],
+) -> Dict[str, Tuple[Any, bool]]:
+    """
+    Async version of 'loads_entry' for many entries (one read of the tag's versions).
+    :param dict cache_gets: '{< caching_key >: < entry >, ...}' The entries from the cache.
+    :return: '{< caching_key >: (data, is_fresh), ...}'. The missing entry is not into the result.
+    """
+    entries = {
+        key: unpack(value)
+        for key, value in cache_gets.items()
+        if isinstance(value, (str, bytes))
+    }
+    versions = await aget_tag_versions(
+        dict.fromkeys(
+            tag for entry in entries.values() for tag in (entry.get("tags") or {})
+        )
+    )
+    return {
+        key: (
+            entry["data"],
+            is_fresh_entry(
+                entry, {tag: versions[tag] for tag in entry.get("tags") or {}}
+            ),
+        )
+        for key, entry in entries.items()
+    }
+
+
+def is_fresh_entry(entry: dict, versions: Dict[str, str] | None) -> bool:
+    """
+    :param dict entry: The entry with the 'tags' and 'expires_at'.
+    :param versions: The current versions of the entry's tags.
+    :return: False when the entry is expired or any of its tags was bumped.
+    """
+    tags: Dict[str, str] | None = entry.get("tags")
+    return (
+        bool(tags)
+        and entry.get("expires_at", 0) > time.time()
+        and versions == tags
+    )
+
+
+def loads_entry(cache_get: bytes | str | None) -> Tuple[Any, bool]:
+    """
+    Get the data from the cached entry.
+    :param str cache_get: The entry from the cache.
+    :return: '(data, is_fresh)'. It's '(None, False)' when entry is missing.
+    """
+    if not isinstance(cache_get, (str, bytes)):
+        return None, False
+    entry = unpack(cache_get)
+    tags: Dict[str, str] = entry.get("tags") or {}
+    return entry["data"], is_fresh_entry(entry, get_tag_versions(tags.keys()))
+
+
+async def aloads_entry(cache_get: bytes | str | None) -> Tuple[Any, bool]:
+    """
+    Async version of 'loads_entry'.
+    :param str cache_get: The entry from the cache.
+    :return: '(data, is_fresh)'. It's '(None, False)' when entry is missing.
+    """
+    if not isinstance(cache_get, (str, bytes)):
+        return None, False
+    entry = unpack(cache_get)
+    tags: Dict[str, str] = entry.get("tags") or {}
+    return entry["data"], is_fresh_entry(entry, await aget_tag_versions(tags.keys()))
+
+
+def loads_tagged(cache_get: bytes | str | None) -> dict | None:
+    """
+    Get the data from the cached entry.
+    :param str cache_get: The entry from the cache.
+    :return: The data or None when entry is missing or is stale (its tags were bumped).
+    """
+    data, is_fresh = loads_entry(cache_get)
+    return data if is_fresh else None
@@ -0,0 +1,51 @@
+"""
+content/consumers.py
+The websocket's subscription to the content's updates (see 'content/realtime.py').
+- 'ws/content/page/< page_id >/' - all updates of the page's contents;
+- 'ws/content/< content_type >/< content_id >/' - the updates of the one content.
+The client gets each event as the JSON's message. The messages from the client are ignored.
+"""
+
+import logging
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from content.realtime import content_group, page_group
+from logs import configure_logging
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+
+class ContentUpdatesConsumer(AsyncJsonWebsocketConsumer):
+    async def connect(self):
+        kwargs = self.scope["url_route"]["kwargs"]
+        self.group_name = (
+            page_group(kwargs["page_id"])
+            if "page_id" in kwargs
+            else content_group(kwargs["content_type"], kwargs["content_id"])
+        )
+        if self.channel_layer is None:
+            log.error(
+                "%s: Error => %s"
+                % (
+                    ContentUpdatesConsumer.__name__ + "." + self.connect.__name__,
+                    "'CHANNEL_LAYERS' is not configured",
+                )
+            )
+            await self.close()
+            return
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.channel_layer is not None and hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # The subscription is read-only
+        pass
+
+    async def content_event(self, message: dict):
+        """The handler of the 'content.event' of the group"""
+        await self.send_json(message["event"])
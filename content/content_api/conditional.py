@@ -0,0 +1,160 @@
+"""
+content/content_api/conditional.py
+Conditional GET ('ETag', 'Last-Modified', 304) of the content's API.
+The small metadata's entry is kept into the cache next to each cached page (or the list of pages):
+the versions of its tags, the time of the last change and the counters.
+'Last-Modified' is the last page's 'updated_at' or the time of the last bump of the entry's tags (the change \
+of the content bumps its tag, the content's row has not 'updated_at'), which is later.
+'If-None-Match' and 'If-Modified-Since' are answered by the metadata only (the page is not loaded or serialized).
+The strong ETag - it's the hash of the tags' versions, of 'updated_at' and of the live counters.
+The weak ETag ('CONTENT_API_ETAG_WEAK') - the same but without the counters.
+"""
+
+import hashlib
+import time
+from typing import Dict, List
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from content.cache_tags import aget_tag_versions, is_fresh_entry, tags_of_data
+from content.counters import iter_contents
+from content.serialization import json_dumps
+from project.settings import CONTENT_CACHE_TIMEOUT
+
+META_PREFIX = "meta_"
+
+
+def last_modified_of_data(data: dict) -> float | None:
+    """
+    :param dict data: 'Initial' or 'InitialPage'
+    :return: The timestamp of the last changed page ('updated_at') or None.
+    """
+    pages = data["results"] if "results" in data else [data]
+    timestamps = [
+        parsed.timestamp()
+        for parsed in (parse_datetime(str(page.get("updated_at") or "")) for page in pages)
+        if parsed is not None
+    ]
+    return max(timestamps) if timestamps else None
+
+
+def last_modified_of_tags(versions: Dict[str, str]) -> float | None:
+    """
+    :param dict versions: '{"page:2": "1756290000000000000-1a2b3c4d", ...}' (see 'cache_tags._new_version')
+    :return: The timestamp of the last bump of the tags or None.
+    """
+    timestamps = []
+    for version in versions.values():
+        nanoseconds = str(version).split("-", 1)[0]
+        if nanoseconds.isdigit():
+            timestamps.append(int(nanoseconds) / 1e9)
+    return max(timestamps) if timestamps else None
+
+
+def counters_of_data(data: dict) -> Dict[str, int]:
+    """
+    :param dict data: 'Initial' or 'InitialPage'
+    :return: '{"video:2": 15, ...}'
+    """
+    return {
+        "%s:%s" % (str(content["content_type"]).lower(), content["id"]): int(
+            content["counter"]
+        )
+        for content in iter_contents(data)
+        if "counter" in content
+    }
+
+
+async def abuild_meta(data: dict, timeout: int = CONTENT_CACHE_TIMEOUT) -> dict:
+    """
+    The metadata's entry for the cache.
+    :param dict data: 'Initial' or 'InitialPage'
+    :param int timeout: The entry is fresh during this time (seconds).
+    :return: '{"tags": {...}, "last_modified": 1756290000.0, "counters": {...}, "expires_at": ...}'
+    """
+    versions = await aget_tag_versions(tags_of_data(data))
+    timestamps = [
+        timestamp
+        for timestamp in (last_modified_of_data(data), last_modified_of_tags(versions))
+        if timestamp is not None
+    ]
+    return {
+        "tags": versions,
+        "last_modified": max(timestamps) if timestamps else None,
+        "counters": counters_of_data(data),
+        "expires_at": time.time() + timeout,
+    }
+
+
+async def ais_fresh_meta(meta) -> bool:
+    if not isinstance(meta, dict) or "tags" not in meta:
+        return False
+    return is_fresh_entry(meta, await aget_tag_versions(meta["tags"].keys()))
+
+
+def make_etag(
+    meta: dict,
+    counters: Dict[str, int] | None,
+    weak: bool,
+    representation: str = "json",
+) -> str:
+    """
+    :param dict meta: The entry from 'abuild_meta'.
+    :param counters: The counters of the response's body. It's not used by the weak ETag.
+    :param bool weak: The weak ETag ignores the counter's drift.
+    :param str representation: The renderer's format ('json', 'msgpack'). Other bytes - other ETag.
+    :return: '"1a2b..."' or 'W/"1a2b..."'
+    """
+    parts = [sorted(meta["tags"].items()), meta["last_modified"]]
+    if representation != "json":
+        parts.append(representation)
+    if not weak:
+        parts.append(sorted((counters or {}).items()))
+    digest = hashlib.blake2b(json_dumps(parts), digest_size=16).hexdigest()
+    return ('W/"%s"' if weak else '"%s"') % digest
+
+
+def is_not_modified(
+    request: HttpRequest, etag: str, last_modified: float | None
+) -> bool:
+    """
+    'If-None-Match' is compared by the weak comparison (RFC 9110). 'If-Modified-Since' is used
+    only when the request has not 'If-None-Match'.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag.removeprefix("W/")
+        return any(
+            tag.removeprefix("W/") == opaque for tag in parse_etags(if_none_match)
+        )
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since"))
+    if if_modified_since is None or last_modified is None:
+        return False
+    return int(last_modified) <= if_modified_since
+
+
+def set_conditional_headers(
+    response: HttpResponse, etag: str, last_modified: float | None
+) -> HttpResponse:
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def not_modified_response(
+    etag: str, last_modified: float | None, vary: List[str] | None = None
+) -> HttpResponse:
+    """
+    :param vary: The headers of 'Vary' (the same as the response 200 has).
+    :return: 304 without the body.
+    """
+    response = set_conditional_headers(HttpResponse(status=304), etag, last_modified)
+    if vary:
+        patch_vary_headers(response, vary)
+    return response
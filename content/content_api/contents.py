@@ -0,0 +1,205 @@
+"""
+content/content_api/contents.py
+Loading of the page's contents (audio, video) for the content's API.
+The contents of both models are read by one query - 'UNION ALL' over the common set of columns, \
+ordered by '(page, order)' in the db. The column which is missing in the model is 'NULL'.
+The rows are serialized by 'FastContentSerializer' (without the model's instances).
+'?contents_limit=' - only the first N contents of each page are read (the 'LIMIT' of the single page \
+or 'ROW_NUMBER()' per page of the list).
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from django.db.models import CharField, F, QuerySet, Value, Window
+from django.db.models.functions import RowNumber
+
+from content.content_api.filters import ContentFilter
+from content.content_api.serializers import (
+    FastContentSerializer,
+    fast_audio_serializer,
+    fast_video_serializer,
+)
+
+# The names of the union's columns have the prefix (the annotation can't have the name of the model's field)
+UNION_PREFIX = "u_"
+KIND_COLUMN = UNION_PREFIX + "kind"
+RANK_COLUMN = UNION_PREFIX + "rank"
+# The serializer of the row by its 'kind' ('content_type' of the row is not used, it's the db's data)
+SERIALIZERS: Dict[str, FastContentSerializer] = {
+    "video": fast_video_serializer,
+    "audio": fast_audio_serializer,
+}
+CONTENT_COLUMNS: List[str] = list(
+    dict.fromkeys(fast_video_serializer.fields + fast_audio_serializer.fields)
+)
+
+
+def _columns(fields: Iterable[str] | None = None) -> List[str]:
+    """
+    :param fields: The requested fields or None (all fields).
+    :return: The union's columns (the same order for both models). 'page_id', 'order', 'id' are always.
+    """
+    selected = set(CONTENT_COLUMNS if fields is None else fields) | {"id"}
+    return ["page_id", "order"] + [
+        name for name in CONTENT_COLUMNS if name in selected and name != "order"
+    ]
+
+
+def _content_rows(
+    kind: str,
+    page_ids: List[int],
+    fields: Iterable[str] | None = None,
+    content_filter: ContentFilter | None = None,
+    per_page_limit: int | None = None,
+) -> QuerySet:
+    """
+    The branch of the union. All columns are annotations, so both branches have the same order of columns.
+    :param str kind: 'video' or 'audio'
+    :param int per_page_limit: Only the first N rows of each page (by 'order').
+    """
+    serializer = SERIALIZERS[kind]
+    queryset = serializer.model.objects.filter(page_id__in=page_ids)
+    if content_filter is not None:
+        queryset = queryset.filter(**content_filter.lookups())
+    own = set(serializer.fields) | {"page_id"}
+    annotations = {KIND_COLUMN: Value(kind, output_field=CharField())}
+    for name in _columns(fields):
+        annotations[UNION_PREFIX + name] = (
+            F(name) if name in own else Value(None, output_field=CharField())
+        )
+    if per_page_limit is not None:
+        annotations[RANK_COLUMN] = Window(
+            RowNumber(),
+            partition_by=[F("page_id")],
+            order_by=[F("order").asc(), F("id").asc()],
+        )
+    queryset = queryset.annotate(**annotations)
+    if per_page_limit is not None:
+        queryset = queryset.filter(**{RANK_COLUMN + "__lte": per_page_limit})
+    return queryset.values(*annotations.keys())
+
+
+def _video_rows(
+    page_ids: List[int],
+    fields: Iterable[str] | None = None,
+    content_filter: ContentFilter | None = None,
+    per_page_limit: int | None = None,
+) -> QuerySet:
+    return _content_rows("video", page_ids, fields, content_filter, per_page_limit)
+
+
+def _audio_rows(
+    page_ids: List[int],
+    fields: Iterable[str] | None = None,
+    content_filter: ContentFilter | None = None,
+    per_page_limit: int | None = None,
+) -> QuerySet:
+    return _content_rows("audio", page_ids, fields, content_filter, per_page_limit)
+
+
+def union_rows(
+    page_ids: List[int],
+    fields: Iterable[str] | None = None,
+    content_filter: ContentFilter | None = None,
+) -> QuerySet:
+    """
+    The contents of both models by one query, ordered by '(page, order)' in the db.
+    The video is before the audio with the same 'order' (how it was into 'get_contents').
+    '?content_type=' - only the branch of this model is read (without the union).
+    :param page_ids: '[2, 3, ...]' Indices of pages.
+    :param fields: The content's fields or None (all fields).
+    :param ContentFilter content_filter: The filter of the contents (and its 'limit') or None.
+    :return: The rows '{"u_kind": "video", "u_page_id": 2, "u_order": 1, "u_id": 5, ...}'
+    """
+    limit = content_filter.limit if content_filter is not None else None
+    # The single page - the 'LIMIT' of the whole union. The list - the 'ROW_NUMBER()' per page
+    per_page_limit = limit if len(page_ids) > 1 else None
+    kinds = content_filter.kinds() if content_filter is not None else tuple(SERIALIZERS)
+    queryset, *others = [
+        _content_rows(kind, page_ids, fields, content_filter, per_page_limit)
+        for kind in kinds
+    ]
+    ordering = [UNION_PREFIX + "page_id", UNION_PREFIX + "order", UNION_PREFIX + "id"]
+    if others:
+        queryset = queryset.union(*others, all=True)
+        # The constant 'kind' is ordered only by the union (it's the column of the union's result)
+        ordering.insert(2, "-" + KIND_COLUMN)
+    queryset = queryset.order_by(*ordering)
+    if limit is not None and per_page_limit is None:
+        queryset = queryset[:limit]
+    return queryset
+
+
+def _group_by_page(
+    rows: Iterable[dict],
+    fields: Iterable[str] | None = None,
+    limit: int | None = None,
+) -> Dict[int, List[dict]]:
+    """
+    :param rows: The ordered rows of 'union_rows'.
+    :param int limit: The max contents of the page (each model's branch has its own N rows).
+    """
+    converters = {
+        kind: serializer.converters(fields) for kind, serializer in SERIALIZERS.items()
+    }
+    prefix_length = len(UNION_PREFIX)
+    contents_by_page: Dict[int, List[dict]] = defaultdict(list)
+    for row in rows:
+        contents = contents_by_page[row[UNION_PREFIX + "page_id"]]
+        if limit is not None and len(contents) >= limit:
+            continue
+        kind = row[KIND_COLUMN]
+        contents.append(
+            SERIALIZERS[kind].to_representation(
+                {name[prefix_length:]: value for name, value in row.items()},
+                converters[kind],
+            )
+        )
+    return contents_by_page
+
+
+def load_contents_by_page(
+    page_ids: Iterable[int],
+    fields: Iterable[str] | None = None,
+    content_filter: ContentFilter | None = None,
+) -> Dict[int, List[dict]]:
+    """
+    Load the contents of all pages by one query (the union of both models).
+    The contents of each page are sorted by 'order', how it was in 'PageDetailSerializer.get_contents'.
+    :param page_ids: '[2, 3, ...]' Indices of pages.
+    :param fields: The content's fields ('?content_fields=') or None (all fields). Other columns are not selected.
+    :param ContentFilter content_filter: The filter of the contents ('?content_type=', '?is_active=', \
+        '?contents_limit=') or None.
+    :return: '{< page_id >: [< InitialContent >, ...]}'. It's the same data \
+        as 'ContentPolymorphicSerializer(contents, many=True).data'.
+    """
+    page_ids = list(page_ids)
+    if not page_ids:
+        return defaultdict(list)
+    return _group_by_page(
+        union_rows(page_ids, fields, content_filter),
+        fields,
+        content_filter.limit if content_filter is not None else None,
+    )
+
+
+async def aload_contents_by_page(
+    page_ids: Iterable[int],
+    fields: Iterable[str] | None = None,
+    content_filter: ContentFilter | None = None,
+) -> Dict[int, List[dict]]:
+    """
+    Async version of 'load_contents_by_page' (the async ORM, without 'asyncio.to_thread').
+    :param page_ids: '[2, 3, ...]' Indices of pages.
+    :param fields: The content's fields or None (all fields).
+    :param ContentFilter content_filter: The filter of the contents or None.
+    :return: '{< page_id >: [< InitialContent >, ...]}'
+    """
+    page_ids = list(page_ids)
+    if not page_ids:
+        return defaultdict(list)
+    rows = [row async for row in union_rows(page_ids, fields, content_filter)]
+    return _group_by_page(
+        rows, fields, content_filter.limit if content_filter is not None else None
+    )
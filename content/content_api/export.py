@@ -0,0 +1,111 @@
+"""
+content/content_api/export.py
+Streaming export of all pages with their contents ('content/export/').
+The pages are read by the server's cursor ('aiterator(chunk_size=...)'), the contents of each chunk \
+are loaded by one query (the union). Each chunk is rendered and is sent before the next chunk is read, \
+so the memory is the one chunk, it doesn't depend on the catalog's size.
+Query's parameter 'output':
+- 'ndjson' - one page per line ('application/x-ndjson');
+- 'json' - the JSON's array of pages.
+Note: the counters are values from the db (the live counters are not overlaid), and the export \
+is not counted as the view.
+"""
+
+from typing import AsyncIterator, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.exceptions import ValidationError
+
+from content.content_api.contents import aload_contents_by_page
+from content.content_api.fieldsets import Fieldset
+from content.content_api.filters import ContentFilter
+from content.content_api.serializers import PageDetailSerializer
+from content.models import PageModel
+from content.serialization import json_dumps
+from project.settings import CONTENT_API_EXPORT_CHUNK_SIZE
+
+OUTPUT_PARAM = "output"
+OUTPUT_NDJSON = "ndjson"
+OUTPUT_JSON = "json"
+CONTENT_TYPES = {
+    OUTPUT_NDJSON: "application/x-ndjson",
+    OUTPUT_JSON: "application/json",
+}
+
+
+def get_output(value: str | None) -> str:
+    """
+    :param str value: The value of '?output='.
+    :return: 'ndjson' (default) or 'json'
+    :raise ValidationError: The unknown output.
+    """
+    output = (value or OUTPUT_NDJSON).strip().lower()
+    if output not in CONTENT_TYPES:
+        raise ValidationError(
+            {OUTPUT_PARAM: "Must be one of: %s" % ", ".join(CONTENT_TYPES)}
+        )
+    return output
+
+
+async def _render_chunk(
+    pages: List[PageModel],
+    fieldset: Fieldset,
+    content_filter: ContentFilter | None = None,
+) -> List[bytes]:
+    """
+    :return: The JSON of each page of the chunk.
+    """
+    context = {
+        "page_fields": fieldset.page_fields,
+        "content_fields": fieldset.content_fields,
+    }
+    if fieldset.embed_contents:
+        context["contents_by_page"] = await aload_contents_by_page(
+            [page.pk for page in pages], fieldset.content_fields, content_filter
+        )
+    data = PageDetailSerializer(pages, many=True, context=context).data
+    default = DjangoJSONEncoder().default
+    return [json_dumps(page, default=default) for page in data]
+
+
+async def aiter_export(
+    fieldset: Fieldset,
+    content_filter: ContentFilter | None = None,
+    output: str = OUTPUT_NDJSON,
+    chunk_size: int = CONTENT_API_EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    The body of the 'StreamingHttpResponse'. Each item is the rendered chunk of pages.
+    The pages are ordered by 'id' (the new pages are at the end of the export).
+    :param Fieldset fieldset: The fields of pages ('?fields=', '?content_fields=', '?include=').
+    :param ContentFilter content_filter: The filter of the contents or None.
+    :param str output: 'ndjson' or 'json'
+    :param int chunk_size: Quantity of pages into the one chunk (and into the one fetch of the cursor).
+    :return: '{"id": 2, ...}\\n{"id": 3, ...}\\n' or '[{"id": 2, ...},{"id": 3, ...}]'
+    """
+    queryset = PageModel.objects.order_by("pk")
+    if fieldset.page_columns() is not None:
+        queryset = queryset.only(*fieldset.page_columns())
+    is_first = True
+    if output == OUTPUT_JSON:
+        yield b"["
+    chunk: List[PageModel] = []
+    async for page in queryset.aiterator(chunk_size=chunk_size):
+        chunk.append(page)
+        if len(chunk) < chunk_size:
+            continue
+        lines = await _render_chunk(chunk, fieldset, content_filter)
+        chunk = []
+        yield _join(lines, output, is_first)
+        is_first = False
+    if chunk:
+        lines = await _render_chunk(chunk, fieldset, content_filter)
+        yield _join(lines, output, is_first)
+    if output == OUTPUT_JSON:
+        yield b"]"
+
+
+def _join(lines: List[bytes], output: str, is_first: bool) -> bytes:
+    if output == OUTPUT_NDJSON:
+        return b"\n".join(lines) + b"\n"
+    return (b"" if is_first else b",") + b",".join(lines)
@@ -0,0 +1,163 @@
+"""
+content/content_api/fieldsets.py
+Sparse fieldsets of the content's API.
+Query's parameters:
+- 'fields' - the page's fields ('?fields=id,title,url,contents');
+- 'content_fields' - the content's fields ('?content_fields=title,video_url,audio_url');
+- 'include' - the heavy parts of the page which are kept ('contents', 'text'). '?include=' - without both.
+The page's 'id' and the content's 'id', 'content_type' are returned always (the cache's tags and \
+the counters use them). The columns which are not requested are not selected from the db.
+"""
+
+from typing import FrozenSet, Iterable, List, Tuple
+from urllib.parse import urlencode
+
+from django.http import QueryDict
+from rest_framework.exceptions import ValidationError
+
+from content.content_api.filters import (
+    CONTENT_TYPE_PARAM,
+    IS_ACTIVE_PARAM,
+    LIMIT_PARAM,
+    ContentFilter,
+)
+from content.content_api.serializers import (
+    PageDetailSerializer,
+    fast_audio_serializer,
+    fast_video_serializer,
+)
+
+FIELDS_PARAM = "fields"
+CONTENT_FIELDS_PARAM = "content_fields"
+INCLUDE_PARAM = "include"
+
+PAGE_FIELDS: Tuple[str, ...] = tuple(PageDetailSerializer().fields.keys())
+CONTENT_FIELDS: Tuple[str, ...] = tuple(
+    dict.fromkeys(fast_video_serializer.fields + fast_audio_serializer.fields)
+)
+# The heavy parts of the page
+HEAVY_FIELDS: FrozenSet[str] = frozenset({"contents", "text"})
+REQUIRED_PAGE_FIELDS: FrozenSet[str] = frozenset({"id"})
+REQUIRED_CONTENT_FIELDS: FrozenSet[str] = frozenset({"id", "content_type"})
+
+
+def _split(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def _check(names: Iterable[str], allowed: Iterable[str], param: str) -> None:
+    unknown = sorted(set(names) - set(allowed))
+    if unknown:
+        raise ValidationError({param: "Unknown fields: %s" % ", ".join(unknown)})
+
+
+class Fieldset:
+    """
+    The fields of the response.
+    'page_fields' and 'content_fields' are in the serializer's order. None - all fields.
+    """
+
+    def __init__(
+        self,
+        page_fields: Iterable[str] | None = None,
+        content_fields: Iterable[str] | None = None,
+    ):
+        self.page_fields: Tuple[str, ...] | None = (
+            None
+            if page_fields is None
+            else tuple(
+                name
+                for name in PAGE_FIELDS
+                if name in set(page_fields) | REQUIRED_PAGE_FIELDS
+            )
+        )
+        self.content_fields: Tuple[str, ...] | None = (
+            None
+            if content_fields is None
+            else tuple(
+                name
+                for name in CONTENT_FIELDS
+                if name in set(content_fields) | REQUIRED_CONTENT_FIELDS
+            )
+        )
+
+    @classmethod
+    def from_query_params(cls, query_params: QueryDict) -> "Fieldset":
+        """
+        :raise ValidationError: The unknown field.
+        """
+        page_fields = None
+        if FIELDS_PARAM in query_params:
+            page_fields = _split(query_params[FIELDS_PARAM])
+            _check(page_fields, PAGE_FIELDS, FIELDS_PARAM)
+        if INCLUDE_PARAM in query_params:
+            include = _split(query_params[INCLUDE_PARAM])
+            _check(include, HEAVY_FIELDS, INCLUDE_PARAM)
+            page_fields = [
+                name
+                for name in (PAGE_FIELDS if page_fields is None else page_fields)
+                if name not in HEAVY_FIELDS or name in include
+            ]
+        content_fields = None
+        if CONTENT_FIELDS_PARAM in query_params:
+            content_fields = _split(query_params[CONTENT_FIELDS_PARAM])
+            _check(content_fields, CONTENT_FIELDS, CONTENT_FIELDS_PARAM)
+        return cls(page_fields, content_fields)
+
+    @property
+    def embed_contents(self) -> bool:
+        return self.page_fields is None or "contents" in self.page_fields
+
+    def page_columns(self) -> List[str] | None:
+        """
+        :return: The columns for 'QuerySet.only()' or None (all columns).
+            'title' is selected always (it's the ordering and the cursor's position).
+        """
+        if self.page_fields is None:
+            return None
+        return list(
+            dict.fromkeys(
+                ["id", "title"] + [name for name in self.page_fields if name != "contents"]
+            )
+        )
+
+    def canonical_params(self) -> List[Tuple[str, str]]:
+        """
+        :return: The canonical query's parameters of the fieldset (the same fields - the same parameters).
+        """
+        params: List[Tuple[str, str]] = []
+        if self.page_fields is not None:
+            params.append((FIELDS_PARAM, ",".join(self.page_fields)))
+        if self.content_fields is not None:
+            params.append((CONTENT_FIELDS_PARAM, ",".join(self.content_fields)))
+        return params
+
+
+def canonical_path(
+    path: str,
+    query_params: QueryDict,
+    fieldset: Fieldset,
+    content_filter: ContentFilter | None = None,
+) -> str:
+    """
+    The path for the cache's key. '?include=contents&fields=title' and '?fields=id,title&include=contents'
+    have the same key.
+    :param str path: 'request.path'
+    :param QueryDict query_params: The request's query parameters.
+    :param Fieldset fieldset: The fieldset of the request.
+    :param ContentFilter content_filter: The filter of the contents ('?content_type=', '?is_active=').
+    :return: '/api/page/content/?fields=id%2Ctitle&page=2'
+    """
+    canonical = fieldset.canonical_params()
+    excluded = [FIELDS_PARAM, CONTENT_FIELDS_PARAM, INCLUDE_PARAM]
+    if content_filter is not None:
+        canonical += content_filter.canonical_params()
+        excluded += [CONTENT_TYPE_PARAM, IS_ACTIVE_PARAM, LIMIT_PARAM]
+    params = [
+        (key, value)
+        for key in query_params.keys()
+        if key not in excluded
+        for value in query_params.getlist(key)
+    ]
+    params = sorted(params + canonical)
+    return "%s?%s" % (path, urlencode(params)) if params else path
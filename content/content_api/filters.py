@@ -0,0 +1,128 @@
+"""
+content/content_api/filters.py
+The filter of the page's contents into the content's API.
+Query's parameters:
+- 'content_type' - the type of the content ('?content_type=video'). It's the model (the branch of the union), \
+not the db's column 'content_type' (the audio's model saves 'video' there), so the other model is not queried;
+- 'is_active' - only the active (or only the inactive) contents ('?is_active=true');
+- 'contents_limit' - only the first N contents of each page ('?contents_limit=10');
+- 'ids' - the pages of the batch's endpoint ('?ids=2,3,5').
+The filter is applied in the db (see the indexes '(page, order)' of the contents' models). \
+The pages are not filtered - the page without the matching contents has the empty 'contents'.
+"""
+
+from typing import Dict, List, Tuple
+
+from django.http import QueryDict
+from rest_framework.exceptions import ValidationError
+
+from project.settings import CONTENT_API_BATCH_MAX_IDS, CONTENT_TYPES_CHOICES
+
+IDS_PARAM = "ids"
+CONTENT_TYPE_PARAM = "content_type"
+IS_ACTIVE_PARAM = "is_active"
+LIMIT_PARAM = "contents_limit"
+
+CONTENT_TYPES: Tuple[str, ...] = tuple(value for value, _ in CONTENT_TYPES_CHOICES)
+_TRUE_VALUES = ("true", "1")
+_FALSE_VALUES = ("false", "0")
+
+
+def parse_ids(value: str) -> List[int]:
+    """
+    :param str value: '2,3,5,3' The value of '?ids='.
+    :return: '[2, 3, 5]' Indices of pages (without the repeats, in the request's order).
+    :raise ValidationError: The empty list, not integer or more than 'CONTENT_API_BATCH_MAX_IDS' indices.
+    """
+    items = [item.strip() for item in (value or "").split(",") if item.strip()]
+    if not items:
+        raise ValidationError({IDS_PARAM: "Is required: '?ids=2,3,5'"})
+    invalid = [item for item in items if not item.isdigit()]
+    if invalid:
+        raise ValidationError({IDS_PARAM: "Not integer: %s" % ", ".join(invalid)})
+    ids = list(dict.fromkeys(int(item) for item in items))
+    if len(ids) > CONTENT_API_BATCH_MAX_IDS:
+        raise ValidationError(
+            {IDS_PARAM: "Max quantity of pages is %s" % CONTENT_API_BATCH_MAX_IDS}
+        )
+    return ids
+
+
+class ContentFilter:
+    """
+    The filter of the contents. None - the contents are not filtered by this field.
+    """
+
+    def __init__(
+        self,
+        content_type: str | None = None,
+        is_active: bool | None = None,
+        limit: int | None = None,
+    ):
+        self.content_type = content_type
+        self.is_active = is_active
+        self.limit = limit
+
+    @classmethod
+    def from_query_params(cls, query_params: QueryDict) -> "ContentFilter":
+        """
+        :raise ValidationError: The unknown type, the not boolean 'is_active' or the not positive limit.
+        """
+        content_type = None
+        if CONTENT_TYPE_PARAM in query_params:
+            content_type = query_params[CONTENT_TYPE_PARAM].strip().lower()
+            if content_type not in CONTENT_TYPES:
+                raise ValidationError(
+                    {
+                        CONTENT_TYPE_PARAM: "Unknown type: %s. Allowed: %s"
+                        % (content_type, ", ".join(CONTENT_TYPES))
+                    }
+                )
+        is_active = None
+        if IS_ACTIVE_PARAM in query_params:
+            value = query_params[IS_ACTIVE_PARAM].strip().lower()
+            if value in _TRUE_VALUES:
+                is_active = True
+            elif value in _FALSE_VALUES:
+                is_active = False
+            else:
+                raise ValidationError(
+                    {IS_ACTIVE_PARAM: "Must be 'true' or 'false', not '%s'" % value}
+                )
+        limit = None
+        if LIMIT_PARAM in query_params:
+            value = query_params[LIMIT_PARAM].strip()
+            if not value.isdigit() or int(value) < 1:
+                raise ValidationError(
+                    {LIMIT_PARAM: "Must be the positive integer, not '%s'" % value}
+                )
+            limit = int(value)
+        return cls(content_type, is_active, limit)
+
+    def kinds(self) -> Tuple[str, ...]:
+        """
+        :return: '("video",)' The types of the contents (the models) which are read.
+        """
+        return CONTENT_TYPES if self.content_type is None else (self.content_type,)
+
+    def lookups(self) -> Dict[str, bool]:
+        """
+        :return: The kwargs for 'QuerySet.filter()' of each model. '{"is_active": True}'
+        """
+        lookups: Dict[str, bool] = {}
+        if self.is_active is not None:
+            lookups["is_active"] = self.is_active
+        return lookups
+
+    def canonical_params(self) -> List[Tuple[str, str]]:
+        """
+        :return: The canonical query's parameters of the filter ('?is_active=1' is '?is_active=true').
+        """
+        params: List[Tuple[str, str]] = []
+        if self.content_type is not None:
+            params.append((CONTENT_TYPE_PARAM, self.content_type))
+        if self.is_active is not None:
+            params.append((IS_ACTIVE_PARAM, "true" if self.is_active else "false"))
+        if self.limit is not None:
+            params.append((LIMIT_PARAM, str(self.limit)))
+        return params
@@ -0,0 +1,85 @@
+"""
+content/content_api/middleware.py
+The compression of the API's responses (JSON, msgpack) by 'Accept-Encoding'.
+The pre-rendered bodies have their compressed variants into the cache (see 'content/content_api/rendering.py'), \
+these responses have 'Content-Encoding' already and they are not compressed again.
+The bodies smaller than 'CONTENT_API_COMPRESS_MIN_SIZE' (bytes) are not compressed.
+The compressed body is other bytes, so the strong ETag is weakened (how nginx does it).
+"""
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+
+from content.content_api.renderers import FastJSONRenderer, MsgPackRenderer
+from content.content_api.rendering import (
+    AVAILABLE_ENCODINGS,
+    compress_body,
+    select_encoding,
+)
+from project.settings import CONTENT_API_COMPRESS_MIN_SIZE
+
+COMPRESSED_MEDIA_TYPES = (FastJSONRenderer.media_type, MsgPackRenderer.media_type)
+
+
+def select_response_encoding(request: HttpRequest, response: HttpResponse) -> str | None:
+    """
+    'Vary: Accept-Encoding' is added to each compressible response (the client could get other bytes).
+    :return: 'br', 'gzip' or None (the response is not compressed).
+    """
+    if response.streaming or response.has_header("Content-Encoding"):
+        return None
+    media_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    if media_type not in COMPRESSED_MEDIA_TYPES:
+        return None
+    if len(response.content) < CONTENT_API_COMPRESS_MIN_SIZE:
+        return None
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return select_encoding(
+        request.headers.get("Accept-Encoding", ""), AVAILABLE_ENCODINGS
+    )
+
+
+def compress_response(response: HttpResponse, encoding: str) -> HttpResponse:
+    """
+    :param HttpResponse response: The response with the identity body.
+    :param str encoding: The encoding from 'select_response_encoding'.
+    :return: The response with the compressed body (the body is not changed when it's not smaller).
+    """
+    body = compress_body(response.content, encoding)
+    if len(body) >= len(response.content):
+        return response
+    response.content = body
+    response["Content-Length"] = str(len(body))
+    response["Content-Encoding"] = encoding
+    etag = response.get("ETag")
+    if etag and not etag.startswith("W/"):
+        response["ETag"] = "W/" + etag
+    return response
+
+
+@sync_and_async_middleware
+def CompressionMiddleware(get_response):
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request: HttpRequest) -> HttpResponse:
+            response = await get_response(request)
+            encoding = select_response_encoding(request, response)
+            if encoding is None:
+                return response
+            # The compression doesn't block the event's loop
+            return await sync_to_async(compress_response, thread_sensitive=False)(
+                response, encoding
+            )
+
+    else:
+
+        def middleware(request: HttpRequest) -> HttpResponse:
+            response = get_response(request)
+            encoding = select_response_encoding(request, response)
+            if encoding is None:
+                return response
+            return compress_response(response, encoding)
+
+    return middleware
@@ -0,0 +1,212 @@
+"""
+content/content_api/pagination.py
+The async pagination for the content's API.
+'AsyncPageNumberPagination' - it's the 'PageNumberPagination' (the same query's parameters and the same response),
+but the count and the page's rows are got by the async ORM ('acount', 'async for').
+'TitleCursorPagination' - the opt-in keyset's mode ('?pagination=cursor'). The page is sought on the index
+'(title, id)', so the deep page costs the same as the first page (no 'COUNT(*)', no 'OFFSET').
+"""
+
+import base64
+import binascii
+import json
+from typing import List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Page
+from django.db import connections
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.settings import api_settings
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_MODE = "cursor"
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    ```python
+    page = await paginator.apaginate_queryset(queryset, request, view=self)
+    data = paginator.get_paginated_response(serializer.data).data
+    ```
+    """
+
+    async def apaginate_queryset(
+        self, queryset: QuerySet, request, view=None
+    ) -> List | None:
+        """
+        :return: The rows of the page or None if pagination is disabled.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # 'Paginator.count' is 'cached_property', here it's got without the thread
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as error:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(error)
+            )
+            raise NotFound(msg)
+
+        bottom = (number - 1) * paginator.per_page
+        top = bottom + paginator.per_page
+        if top + paginator.orphans >= paginator.count:
+            top = paginator.count
+        object_list = [row async for row in queryset[bottom:top]]
+        self.page = Page(object_list, number, paginator)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            # The browsable API should display pagination controls.
+            self.display_page_controls = True
+        return object_list
+
+
+class TitleCursorPagination(BasePagination):
+    """
+    The cursor's pagination of pages by '(title, id)'.
+    Query's parameters:
+    - 'pagination=cursor' - the mode is on;
+    - 'cursor' - the opaque position from the 'next' or 'previous' links;
+    - 'count=approx' - the approximate total of pages (from the db's statistics, without 'COUNT(*)').
+    ```json
+    {"next": "http://.../?pagination=cursor&cursor=eyJ0Ij...", "previous": null, "results": [...]}
+    ```
+    The cursor is stable for the position, so the page's cache key is stable too.
+    """
+
+    mode_query_param = "pagination"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Invalid cursor"
+
+    @classmethod
+    def is_requested(cls, request) -> bool:
+        return request.query_params.get(cls.mode_query_param) == CURSOR_MODE
+
+    @staticmethod
+    def encode_cursor(title: str, index: int, reverse: bool = False) -> str:
+        """
+        :return: The opaque cursor. It's the same for the same position.
+        """
+        position = json.dumps(
+            {"t": title, "i": index, "r": int(reverse)},
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        # Without the '=' padding, the cursor is not escaped into the URL
+        return (
+            base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii").rstrip("=")
+        )
+
+    def decode_cursor(self, cursor: str) -> Tuple[str, int, bool]:
+        """
+        :return: '(title, id, reverse)'
+        """
+        try:
+            position = json.loads(
+                base64.urlsafe_b64decode(
+                    (cursor + "=" * (-len(cursor) % 4)).encode("ascii")
+                ).decode("utf-8")
+            )
+            return str(position["t"]), int(position["i"]), bool(position["r"])
+        except (binascii.Error, ValueError, TypeError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    async def apaginate_queryset(
+        self, queryset: QuerySet, request, view=None
+    ) -> List:
+        """
+        :return: The rows of the page (by one query, 'page_size + 1' rows).
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        cursor = request.query_params.get(self.cursor_query_param)
+        title, index, reverse = (
+            self.decode_cursor(cursor) if cursor else (None, None, False)
+        )
+
+        if reverse:
+            queryset = queryset.order_by("-title", "-id")
+            if cursor:
+                queryset = queryset.filter(Q(title__lt=title) | Q(title=title, id__lt=index))
+        else:
+            queryset = queryset.order_by("title", "id")
+            if cursor:
+                queryset = queryset.filter(Q(title__gt=title) | Q(title=title, id__gt=index))
+        rows = [row async for row in queryset[: self.page_size + 1]]
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, bool(cursor)
+        self.rows = rows
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) == "approx":
+            self.count = await sync_to_async(approximate_count)(queryset.model)
+        return rows
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.rows:
+            return None
+        last = self.rows[-1]
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(last.title, last.pk)
+        )
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous or not self.rows:
+            return None
+        first = self.rows[0]
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(first.title, first.pk, reverse=True),
+        )
+
+    def get_paginated_response_data(self, data: list) -> dict:
+        response_data = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response_data = {"count": self.count, **response_data}
+        return response_data
+
+    def get_paginated_response(self, data: list) -> Response:
+        return Response(self.get_paginated_response_data(data))
+
+
+def approximate_count(model) -> int:
+    """
+    The approximate quantity of the table's lines.
+    PostgreSQL - it's 'pg_class.reltuples' (it's updated by 'ANALYZE'/autovacuum). Other db - 'COUNT(*)'.
+    :param model: The model's class.
+    :return: int
+    """
+    connection = connections[model.objects.db]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # '-1' - the table was not analyzed yet
+        if row is not None and row[0] >= 0:
+            return int(row[0])
+    return model.objects.count()
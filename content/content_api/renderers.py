@@ -0,0 +1,87 @@
+"""
+content/content_api/renderers.py
+Renderers and parsers of the content's API.
+'FastJSONRenderer'/'FastJSONParser' - it's DRF's JSON by 'orjson' (the stdlib 'json' without 'orjson').
+'MsgPackRenderer'/'MsgPackParser' - 'application/msgpack'. The client selects it by the 'Accept' header.
+They are plugged by 'REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"]' and '["DEFAULT_PARSER_CLASSES"]'.
+'EventStreamRenderer' - 'text/event-stream' of the SSE's endpoint (only this endpoint has it).
+"""
+
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.utils import encoders
+
+from content.serialization import (
+    json_dumps,
+    json_loads,
+    msgpack_dumps,
+    msgpack_loads,
+)
+
+# It knows the datetime, Decimal, UUID, lazy strings, ...
+_encoder = encoders.JSONEncoder()
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    The compact JSON. The indented JSON ('Accept: application/json; indent=4') is rendered by DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return json_dumps(data, default=_encoder.default)
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return json_loads(stream.read())
+        except ValueError as error:
+            raise ParseError("JSON parse error - %s" % str(error))
+
+
+class MsgPackRenderer(renderers.BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+        return msgpack_dumps(data, default=_encoder.default)
+
+
+class MsgPackParser(BaseParser):
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack_loads(stream.read())
+        except Exception as error:
+            raise ParseError("MessagePack parse error - %s" % str(error))
+
+
+class EventStreamRenderer(renderers.BaseRenderer):
+    """
+    The SSE's body is the 'StreamingHttpResponse'. This renderer is used by the content's negotiation \
+    ('Accept: text/event-stream' of the 'EventSource') and by the error's response.
+    """
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+        return json_dumps(data, default=_encoder.default)
+
+
+json_renderer = FastJSONRenderer()
@@ -0,0 +1,188 @@
+"""
+content/content_api/rendering.py
+Pre-rendered payloads of the content's API.
+The page's (or the list's) JSON is rendered once at write time. The cache keeps the ready-to-send bytes,
+so the cache's hit doesn't decode/encode the JSON. The view returns these bytes directly.
+Note: the counters into the pre-rendered body are values at the rendering time (the live counters \
+are not overlaid). The body is re-rendered when its tags are bumped or it's expired.
+The compressed variants (gzip, brotli) are made with the body, so the compression is paid once per the cache's fill.
+The not pre-rendered responses are compressed by 'CompressionMiddleware' (see 'content/content_api/middleware.py').
+"""
+
+import gzip
+import time
+from typing import Any, Dict, List, Tuple
+
+from django.http import HttpResponse
+
+from content.cache_tags import (
+    aget_tag_versions,
+    get_tag_versions,
+    is_fresh_entry,
+    tags_of_data,
+)
+from content.content_api.renderers import json_renderer
+from content.counters import CounterKey, iter_contents
+from project.settings import (
+    CONTENT_API_BROTLI_QUALITY,
+    CONTENT_API_COMPRESS_MIN_SIZE,
+    CONTENT_API_GZIP_LEVEL,
+    CONTENT_CACHE_TIMEOUT,
+)
+
+try:
+    import brotli
+except ImportError:
+    # 'brotli' is optional, only gzip's variant is made without it
+    brotli = None
+
+# The order is the server's preference
+ENCODINGS = ("br", "gzip")
+# The encodings which this process can make
+AVAILABLE_ENCODINGS = tuple(
+    encoding for encoding in ENCODINGS if encoding != "br" or brotli is not None
+)
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """
+    :param bytes body: The identity body.
+    :param str encoding: 'br' or 'gzip' (see 'AVAILABLE_ENCODINGS').
+    :return: The compressed body.
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=CONTENT_API_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=CONTENT_API_GZIP_LEVEL, mtime=0)
+
+
+def compress_variants(body: bytes) -> Dict[str, bytes]:
+    """
+    :param bytes body: The identity body.
+    :return: '{"gzip": b"...", "br": b"..."}'. It's empty for the small body.
+    """
+    if len(body) < CONTENT_API_COMPRESS_MIN_SIZE:
+        return {}
+    return {encoding: compress_body(body, encoding) for encoding in AVAILABLE_ENCODINGS}
+
+
+def select_encoding(accept_encoding: str, available) -> str | None:
+    """
+    Select the variant by the request's 'Accept-Encoding'.
+    :param str accept_encoding: 'gzip, deflate, br;q=0.9'
+    :param available: The encodings of the entry's variants.
+    :return: 'br', 'gzip' or None (the identity body).
+    """
+    qualities: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def counter_keys_of_data(data: dict) -> List[CounterKey]:
+    """
+    :param dict data: 'Initial' or 'InitialPage'
+    :return: '[("video", 2), ...]'
+    """
+    return [
+        (str(content["content_type"]).lower(), int(content["id"]))
+        for content in iter_contents(data)
+    ]
+
+
+def render_entry(data: dict, timeout: int = CONTENT_CACHE_TIMEOUT) -> dict:
+    """
+    The entry for the cache with the rendered body.
+    :param dict data: 'Initial' or 'InitialPage'
+    :param int timeout: The entry is fresh during this time (seconds).
+    :return: '{"body": b"...", "variants": {"gzip": b"..."}, "counter_keys": [...], "tags": {...}, \
+        "expires_at": 1756290000.0}'
+    """
+    body = json_renderer.render(data)
+    return {
+        "body": body,
+        "variants": compress_variants(body),
+        "counter_keys": counter_keys_of_data(data),
+        "tags": get_tag_versions(tags_of_data(data)),
+        "expires_at": time.time() + timeout,
+    }
+
+
+async def arender_entry(data: dict, timeout: int = CONTENT_CACHE_TIMEOUT) -> dict:
+    """
+    Async version of 'render_entry'.
+    :param dict data: 'Initial' or 'InitialPage'
+    :param int timeout: The entry is fresh during this time (seconds).
+    :return: '{"body": b"...", "counter_keys": [...], "tags": {...}, "expires_at": 1756290000.0}'
+    """
+    body = json_renderer.render(data)
+    return {
+        "body": body,
+        "variants": compress_variants(body),
+        "counter_keys": counter_keys_of_data(data),
+        "tags": await aget_tag_versions(tags_of_data(data)),
+        "expires_at": time.time() + timeout,
+    }
+
+
+def loads_rendered(entry: Any) -> Tuple[dict | None, bool]:
+    """
+    :param entry: The entry from the cache.
+    :return: '(entry, is_fresh)'. It's '(None, False)' when entry is missing.
+    """
+    if not isinstance(entry, dict) or "body" not in entry:
+        return None, False
+    tags = entry.get("tags") or {}
+    return entry, is_fresh_entry(entry, get_tag_versions(tags.keys()))
+
+
+async def aloads_rendered(entry: Any) -> Tuple[dict | None, bool]:
+    """
+    Async version of 'loads_rendered'.
+    :param entry: The entry from the cache.
+    :return: '(entry, is_fresh)'. It's '(None, False)' when entry is missing.
+    """
+    if not isinstance(entry, dict) or "body" not in entry:
+        return None, False
+    tags = entry.get("tags") or {}
+    return entry, is_fresh_entry(entry, await aget_tag_versions(tags.keys()))
+
+
+def rendered_response(
+    entry: dict, status_code: int = 200, accept_encoding: str = ""
+) -> HttpResponse:
+    """
+    :param dict entry: The entry from 'render_entry'.
+    :param str accept_encoding: The request's 'Accept-Encoding'.
+    :return: The response with the ready-to-send bytes (the compressed variant, if the client accepts it).
+    """
+    variants: Dict[str, bytes] = entry.get("variants") or {}
+    encoding = select_encoding(accept_encoding, variants.keys())
+    body: bytes = variants[encoding] if encoding else entry["body"]
+    response = HttpResponse(
+        body, content_type=json_renderer.media_type, status=status_code
+    )
+    response["Content-Length"] = str(len(body))
+    if encoding:
+        response["Content-Encoding"] = encoding
+    if variants:
+        response["Vary"] = "Accept-Encoding"
+    return response
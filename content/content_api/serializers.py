@@ -2,17 +2,22 @@
 content/content_api/serializers.py
 """
 
-from typing import Union
+import os
+from typing import Any, Callable, Iterable, List, Tuple, Union
 from adrf import serializers
+from django.db.models import FileField
+from django.utils.text import get_valid_filename
 
 from content.file_validator import FileDuplicateChecker
-from content.models import PageModel
+from content.models import ChunkedUploadModel, PageModel
 from content.models_content_files import VideoContentModel, AudioContentModel
 from rest_framework.serializers import (
     CharField,
+    ValidationError,
     HyperlinkedIdentityField,
     SerializerMethodField,
 )
+from project.settings import CONTENT_UPLOAD_MAX_SIZE
 
 
 fduplicate = FileDuplicateChecker()
@@ -54,6 +59,78 @@ class ContentPolymorphicSerializer(serializers.ModelSerializer):
         return None
 
 
+class FastContentSerializer:
+    """
+    Read-only serialization of the contents from 'values()' rows.
+    The list of fields and the converter of each field are computed once per content type, so
+    the row is not going through the ModelSerializer's machinery. The output is identical \
+    to the 'ContentPolymorphicSerializer' (without 'request' into the context).
+    ```python
+    rows = VideoContentModel.objects.filter(page=page).values(*fast_video_serializer.fields)
+    data = fast_video_serializer.to_representation_many(rows)
+    ```
+    """
+
+    def __init__(self, serializer_class: type(ContenBasetSerializer)):
+        self.model = serializer_class.Meta.model
+        self.fields: List[str] = list(serializer_class.Meta.fields)
+        bound_fields = serializer_class().fields
+        self._converters: List[Tuple[str, Callable[[Any], Any]]] = []
+        for name in self.fields:
+            model_field = self.model._meta.get_field(name)
+            if isinstance(model_field, FileField):
+                # 'values()' returns the name of file. DRF returns 'FieldFile.url'
+                converter = self._file_url(model_field.storage)
+            else:
+                converter = bound_fields[name].to_representation
+            self._converters.append((name, converter))
+
+    @staticmethod
+    def _file_url(storage) -> Callable[[str], str | None]:
+        def converter(value: str) -> str | None:
+            return storage.url(value) if value else None
+
+        return converter
+
+    def select(self, fields: Iterable[str] | None = None) -> List[str]:
+        """
+        :param fields: The requested fields (of all content types) or None (all fields).
+        :return: The fields of this content type, in the serializer's order.
+        """
+        if fields is None:
+            return self.fields
+        fields = set(fields)
+        return [name for name in self.fields if name in fields]
+
+    def converters(
+        self, fields: Iterable[str] | None = None
+    ) -> List[Tuple[str, Callable[[Any], Any]]]:
+        if fields is None:
+            return self._converters
+        fields = set(fields)
+        return [item for item in self._converters if item[0] in fields]
+
+    def to_representation(
+        self,
+        row: dict,
+        converters: List[Tuple[str, Callable[[Any], Any]]] | None = None,
+    ) -> dict:
+        return {
+            name: (None if row[name] is None else converter(row[name]))
+            for name, converter in (self._converters if converters is None else converters)
+        }
+
+    def to_representation_many(
+        self, rows: Iterable[dict], fields: Iterable[str] | None = None
+    ) -> List[dict]:
+        converters = self.converters(fields)
+        return [self.to_representation(row, converters) for row in rows]
+
+
+fast_video_serializer = FastContentSerializer(VideoContentSerializer)
+fast_audio_serializer = FastContentSerializer(AudioContentSerializer)
+
+
 class PageDetailSerializer(serializers.ModelSerializer):
     contents = SerializerMethodField()
 
@@ -61,18 +138,67 @@ class PageDetailSerializer(serializers.ModelSerializer):
         model = PageModel
         fields = "__all__"
 
-    def get_contents(self, obj: Union[VideoContentModel, AudioContentModel]):
-        # Get all related objects of contents
-        video_contents = VideoContentModel.objects.filter(page=obj)
-        audio_contents = AudioContentModel.objects.filter(page=obj)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The sparse fieldset ('?fields=', see 'content/content_api/fieldsets.py')
+        page_fields = self.context.get("page_fields")
+        if page_fields is not None:
+            for name in set(self.fields.keys()) - set(page_fields):
+                self.fields.pop(name)
+
+    def get_contents(self, obj: PageModel):
+        from content.content_api.contents import load_contents_by_page
+
+        contents_by_page = self.context.get("contents_by_page")
+        if contents_by_page is None:
+            # Get all related contents of the single page
+            contents_by_page = load_contents_by_page(
+                [obj.pk], self.context.get("content_fields")
+            )
+        # The contents were loaded for all pages of the list (see 'load_contents_by_page')
+        return contents_by_page.get(obj.pk, [])
 
-        all_contents = list(video_contents) + list(audio_contents)
-        all_contents.sort(key=lambda x: x.order)
 
-        return ContentPolymorphicSerializer(
-            all_contents,
-            many=True,
-        ).data
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """The resumable upload (see 'content/uploads.py')"""
+
+    class Meta:
+        model = ChunkedUploadModel
+        fields = [
+            "id",
+            "content_type",
+            "content_id",
+            "filename",
+            "size",
+            "offset",
+            "status",
+            "created_at",
+        ]
+        read_only_fields = ["id", "offset", "status", "created_at"]
+
+    def validate_filename(self, value: str) -> str:
+        # Only the name, without the client's directories
+        name = get_valid_filename(os.path.basename(value or ""))
+        if not name:
+            raise ValidationError("Enter valid file's name!")
+        return name
+
+    def validate_size(self, value: int) -> int:
+        if value < 1 or value > CONTENT_UPLOAD_MAX_SIZE:
+            raise ValidationError(
+                "The size is from 1 to %s bytes" % CONTENT_UPLOAD_MAX_SIZE
+            )
+        return value
+
+    def validate(self, attrs: dict) -> dict:
+        model = (
+            VideoContentModel if attrs["content_type"] == "video" else AudioContentModel
+        )
+        if not model.objects.filter(pk=attrs["content_id"]).exists():
+            raise ValidationError(
+                {"content_id": "The %s is not found" % attrs["content_type"]}
+            )
+        return attrs
 
 
 type TypePageDetailSerializer = type(PageDetailSerializer)
@@ -0,0 +1,107 @@
+"""
+content/content_api/single_flight.py
+Protection against the cache's stampede.
+When the entry of the popular page is expired, only one caller per the cache's key rebuilds it:
+- into the process, other callers await the same asyncio's task;
+- between processes (daphne's workers), the short lock into the shared cache is used. Other \
+processes get the stale entry or wait for the new entry.
+The lock has the owner's token, it's deleted only by its owner (the slow leader doesn't delete the lock \
+of the next leader). When the shared cache is not available (the lock can't be added and there isn't \
+the lock's owner), the entry is built at once, without the waiting.
+"""
+
+import asyncio
+import copy
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from django.core.cache import cache
+
+from logs import configure_logging
+from project.settings import CONTENT_CACHE_LOCK_TIMEOUT
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+LOCK_PREFIX = "single_flight_lock_"
+
+Builder = Callable[[], Awaitable[Any]]
+Reader = Callable[[], Awaitable[Tuple[Any, bool]]]
+
+
+class SingleFlight:
+    """
+    ```python
+    data = await single_flight.do(caching_key, build, read)
+    ```
+    'build' - loads the data from db and sets it to the cache;
+    'read' - returns '(data, is_fresh)' from the cache ('(None, False)' if it's missing).
+    Each caller gets own copy of the data.
+    """
+
+    def __init__(
+        self, lock_timeout: float = CONTENT_CACHE_LOCK_TIMEOUT, poll_interval: float = 0.05
+    ):
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._calls: Dict[Tuple[int, str], asyncio.Task] = {}
+
+    async def do(self, key: str, build: Builder, read: Reader) -> Any:
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+        task = self._calls.get(call_key)
+        if task is None:
+            task = loop.create_task(self._lead(key, build, read))
+            self._calls[call_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(call_key, None))
+        # 'shield' - the cancel of one caller doesn't cancel the rebuilding for others
+        data = await asyncio.shield(task)
+        return copy.deepcopy(data)
+
+    async def _lead(self, key: str, build: Builder, read: Reader) -> Any:
+        lock_key = LOCK_PREFIX + key
+        token = uuid.uuid4().hex
+        locked = await cache.aadd(lock_key, token, timeout=self.lock_timeout)
+        if locked:
+            try:
+                return await build()
+            finally:
+                await self._release(lock_key, token)
+
+        data, is_fresh = await read()
+        if await cache.aget(lock_key) is None:
+            # The shared cache is not available (or the lock was released now) - nobody is rebuilding
+            if data is not None and is_fresh:
+                return data
+            return await build()
+        # Other process is rebuilding the entry now
+        if data is not None:
+            return data
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            data, is_fresh = await read()
+            if data is not None and is_fresh:
+                return data
+        log.info(
+            "%s: The lock of '%s' was expired, rebuilding"
+            % (SingleFlight.__name__ + "." + self._lead.__name__, key)
+        )
+        return await build()
+
+    @staticmethod
+    async def _release(lock_key: str, token: str) -> None:
+        """
+        Delete the lock only when it's own lock (compare-and-delete). The expired lock could be \
+        taken by other leader already.
+        """
+        delete_if_equal = getattr(cache, "adelete_if_equal", None)
+        if delete_if_equal is not None:
+            await delete_if_equal(lock_key, token)
+        elif await cache.aget(lock_key) == token:
+            await cache.adelete(lock_key)
+
+
+single_flight = SingleFlight()
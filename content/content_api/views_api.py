@@ -7,34 +7,90 @@ Logic itself don't have anything the permissions for users. This code can use fo
 """
 
 import asyncio
-import json
 import logging
-import threading
-from typing import List
+from typing import Awaitable, Callable, Dict, List, Tuple
 
-from cfgv import ValidationError
-from django.db.models.expressions import result
-from django.http import HttpRequest
+from channels.layers import get_channel_layer
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
 from django.core.cache import cache
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status, serializers
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from adrf.viewsets import ReadOnlyModelViewSet as AsyncReadOnlyModelViewSet
 
 from content.content_api.additionally import Initial, handler_of_task, InitialPage
+from content.content_api.conditional import (
+    META_PREFIX,
+    abuild_meta,
+    ais_fresh_meta,
+    counters_of_data,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    set_conditional_headers,
+)
+from content.content_api.contents import aload_contents_by_page, load_contents_by_page
+from content.content_api.export import (
+    CONTENT_TYPES as EXPORT_CONTENT_TYPES,
+    OUTPUT_JSON,
+    OUTPUT_NDJSON,
+    OUTPUT_PARAM,
+    aiter_export,
+    get_output,
+)
+from content.content_api.fieldsets import Fieldset, canonical_path
+from content.content_api.filters import (
+    CONTENT_TYPES,
+    IDS_PARAM,
+    ContentFilter,
+    parse_ids,
+)
+from content.content_api.renderers import EventStreamRenderer, FastJSONRenderer
+from content.content_api.pagination import (
+    AsyncPageNumberPagination,
+    TitleCursorPagination,
+)
 from content.content_api.serializers import PageDetailSerializer
+from content.background import background
 from content.models import PageModel
-from content.tasks import increment_content_counter
+from content.cache_tags import (
+    adumps_tagged,
+    adumps_tagged_many,
+    aloads_entries,
+    aloads_entry,
+)
+from content.content_api.rendering import (
+    aloads_rendered,
+    arender_entry,
+    rendered_response,
+)
+from content.content_api.single_flight import single_flight
+from content.counters import counter_aggregator, flatten_content_keys
+from content.realtime import aiter_sse, page_group
+from content.serialization import json_loads
 from logs import configure_logging
+from project.settings import (
+    CONTENT_API_BATCH_MAX_IDS,
+    CONTENT_API_ETAG_WEAK,
+    CONTENT_API_PRERENDERED,
+    CONTENT_CACHE_STALE_TIMEOUT,
+    CONTENT_CACHE_TIMEOUT,
+)
 
 log = logging.getLogger(__name__)
 configure_logging(logging.INFO)
 
+RENDERED_PREFIX = "rendered_"
+
 
 class PageDetailView(AsyncReadOnlyModelViewSet):
     queryset = PageModel.objects.all()
     serializer_class = PageDetailSerializer
+    pagination_class = AsyncPageNumberPagination
 
     @swagger_auto_schema(
         operation_description="Retrieve a paginated list of API pages with their contents",
@@ -146,6 +202,65 @@ class PageDetailView(AsyncReadOnlyModelViewSet):
                 description="Number of results per page",
                 type=openapi.TYPE_INTEGER,
             ),
+            openapi.Parameter(
+                "pagination",
+                openapi.IN_QUERY,
+                description="'cursor' - the cursor's pagination by (title, id). "
+                "The response has 'next'/'previous' links without 'count'",
+                type=openapi.TYPE_STRING,
+                enum=["cursor"],
+            ),
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description="The opaque cursor from the 'next'/'previous' links",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "count",
+                openapi.IN_QUERY,
+                description="'approx' - the cursor's mode returns the approximate 'count'",
+                type=openapi.TYPE_STRING,
+                enum=["approx"],
+            ),
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="The page's fields: 'id,title,url,contents,text,...' ('id' is returned always)",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "content_fields",
+                openapi.IN_QUERY,
+                description="The content's fields: 'title,video_url,audio_url,...' "
+                "('id' and 'content_type' are returned always)",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "include",
+                openapi.IN_QUERY,
+                description="The heavy parts which are kept: 'contents,text'. Empty - without both",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "content_type",
+                openapi.IN_QUERY,
+                description="Only the contents of this type",
+                type=openapi.TYPE_STRING,
+                enum=[*CONTENT_TYPES],
+            ),
+            openapi.Parameter(
+                "is_active",
+                openapi.IN_QUERY,
+                description="Only the active ('true') or the inactive ('false') contents",
+                type=openapi.TYPE_BOOLEAN,
+            ),
+            openapi.Parameter(
+                "contents_limit",
+                openapi.IN_QUERY,
+                description="Only the first N contents of each page (by 'order')",
+                type=openapi.TYPE_INTEGER,
+            ),
         ],
     )
     async def list(self, request: HttpRequest, *args, **kwargs) -> Response:
@@ -189,34 +304,55 @@ class PageDetailView(AsyncReadOnlyModelViewSet):
         """
         response = Response(status=status.HTTP_404_NOT_FOUND)
         try:
-            caching_key = f"page_data_{request.get_full_path()}"
-            # THE CACHE GET. Now, are trying the get the data from the cache
-            cache_get = await asyncio.to_thread(cache.get, key=caching_key)
-            # The CACHE GET. Here, trying the get the data from cache
-            if cache_get is not None:
-                response.status_code = status.HTTP_200_OK
-                response.data = (json.loads(cache_get))["data"]
-                # TASK FOR CACHE"S UPDATE
-                threading.Thread(
-                    target=self.task_increase_counter, args=(response,)
-                ).start()
-
-                def _update_cache(resp: Response) -> None:
-                    for views in response.data["results"]:
-                        for view in views["contents"]:
-                            view["counter"] += 1
-                    self.set_cache(caching_key, resp)
-
-                threading.Thread(target=_update_cache, args=(response,)).start()
-                return response
-
-            list = super().list
-            result = await asyncio.to_thread(list, request, **kwargs)
-            # CELERY's TASK FOR INCREASE COUNTER
-            threading.Thread(target=self.task_increase_counter, args=(result,)).start()
-            # The CACHE SET. Here trying set the data to the cache
-            threading.Thread(target=self.set_cache, args=(caching_key, result)).start()
-            return result
+            # '?fields=', '?content_fields=', '?include=' - the sparse fieldset
+            fieldset = Fieldset.from_query_params(request.query_params)
+            # '?content_type=', '?is_active=' - the filter of the contents
+            content_filter = ContentFilter.from_query_params(request.query_params)
+            caching_key = "page_data_%s" % canonical_path(
+                request.path, request.query_params, fieldset, content_filter
+            )
+
+            async def _load() -> dict:
+                queryset = self.filter_queryset(self.get_queryset())
+                if fieldset.page_columns() is not None:
+                    queryset = queryset.only(*fieldset.page_columns())
+                # '?pagination=cursor' - the keyset's mode (the seek on '(title, id)')
+                paginator = (
+                    TitleCursorPagination()
+                    if TitleCursorPagination.is_requested(request)
+                    else self.paginator
+                )
+                pages = await paginator.apaginate_queryset(queryset, request, view=self)
+                is_paginated = pages is not None
+                if not is_paginated:
+                    pages = [view async for view in queryset]
+                serializer = self.get_serializer(
+                    pages,
+                    many=True,
+                    context={
+                        **self.get_serializer_context(),
+                        **await self._fieldset_context(
+                            pages, fieldset, content_filter
+                        ),
+                    },
+                )
+                if not is_paginated:
+                    return serializer.data
+                return paginator.get_paginated_response(serializer.data).data
+
+            # THE CACHE GET. Now, are trying the get the data from the cache (or build it)
+            return await self._cached_response(request, caching_key, _load)
+        except serializers.ValidationError as error:
+            log.error(
+                "%s: Error => %s"
+                % (
+                    PageDetailView.__class__.__name__ + "." + self.list.__name__,
+                    error.detail,
+                )
+            )
+            response.data = error.detail
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return response
         except Exception as error:
             log.error(
                 "%s: Error => %s"
@@ -311,7 +447,46 @@ class PageDetailView(AsyncReadOnlyModelViewSet):
             ),
             400: "Error => < text of error >",
         },
-        manual_parameters=[],
+        manual_parameters=[
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="The page's fields: 'id,title,url,contents,text,...' ('id' is returned always)",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "content_fields",
+                openapi.IN_QUERY,
+                description="The content's fields: 'title,video_url,audio_url,...' "
+                "('id' and 'content_type' are returned always)",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "include",
+                openapi.IN_QUERY,
+                description="The heavy parts which are kept: 'contents,text'. Empty - without both",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "content_type",
+                openapi.IN_QUERY,
+                description="Only the contents of this type",
+                type=openapi.TYPE_STRING,
+                enum=[*CONTENT_TYPES],
+            ),
+            openapi.Parameter(
+                "is_active",
+                openapi.IN_QUERY,
+                description="Only the active ('true') or the inactive ('false') contents",
+                type=openapi.TYPE_BOOLEAN,
+            ),
+            openapi.Parameter(
+                "contents_limit",
+                openapi.IN_QUERY,
+                description="Only the first N contents of each page (by 'order')",
+                type=openapi.TYPE_INTEGER,
+            ),
+        ],
     )
     async def retrieve(self, request, *args, **kwargs) -> Response:
         """
@@ -349,56 +524,561 @@ class PageDetailView(AsyncReadOnlyModelViewSet):
         )
         response = Response(status=status.HTTP_404_NOT_FOUND)
         index = kwargs.get("pk")
-        file_list: List[PageModel] = []
-        caching_key = f"page_data_{index}_{request.get_full_path()}"
-        # THE CACHE GET. Now, are trying get the data from the cache
-        cache_get = await asyncio.to_thread(cache.get, key=caching_key)
-        if cache_get is not None:
-            response.status_code = status.HTTP_200_OK
-            response.data = json.loads(cache_get)["data"]
-
-            # TASK FOR CACHE"S UPDATE
-            def _update_cache(resp: Response) -> None:
-                for view in response.data["contents"]:
-                    view["counter"] += 1
-                self.set_cache(caching_key, resp)
-
-            threading.Thread(target=_update_cache, args=(response,)).start()
-            # CELERY's TASK FOR INCREASE COUNTER
-            threading.Thread(
-                target=self.task_increase_counter, args=(response,)
-            ).start()
 
+        try:
+            # '?fields=', '?content_fields=', '?include=' - the sparse fieldset
+            fieldset = Fieldset.from_query_params(request.query_params)
+            # '?content_type=', '?is_active=' - the filter of the contents
+            content_filter = ContentFilter.from_query_params(request.query_params)
+        except serializers.ValidationError as error:
+            log.error(message + f"Error => {error.detail}")
+            response.data = error.detail
+            response.status_code = status.HTTP_400_BAD_REQUEST
             return response
+        caching_key = "page_data_%s_%s" % (
+            index,
+            canonical_path(
+                request.path, request.query_params, fieldset, content_filter
+            ),
+        )
+
+        async def _load() -> dict | None:
+            queryset = self.queryset.filter(pk=index)
+            if fieldset.page_columns() is not None:
+                queryset = queryset.only(*fieldset.page_columns())
+            page: PageModel | None = await queryset.afirst()
+            if page is None:
+                return None
+            serializer = self.serializer_class(
+                page,
+                context=await self._fieldset_context([page], fieldset, content_filter),
+            )
+            return serializer.data
+
         try:
-            file_list.extend([view async for view in self.queryset.filter(pk=index)])
+            # THE CACHE GET. Now, are trying get the data from the cache (or build it)
+            cached_response = await self._cached_response(request, caching_key, _load)
+        except serializers.ValidationError as error:
+            log.error(message + f"Error => {error.detail}")
+            response.data = error.detail
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return response
         except Exception as error:
             log.error(message + f"Error => {error.args[0]}")
             response.data = message + f"Error => {error.args[0]}"
             return response
 
-        if len(file_list) == 0:
+        if cached_response is None:
             log.error(message + f"Error => Page view with pk {index} not found")
             response.data = message + f"Error => Page view with pk {index} not found"
             return response
-        serializer = None
+        return cached_response
+
+    @swagger_auto_schema(
+        operation_description="Retrieve many pages with their contents by one request",
+        tags=["content"],
+        responses={
+            200: openapi.Response(
+                description="The pages in the order of '?ids=' and the indices which are not found",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "results": openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                        ),
+                        "not_found": openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                        ),
+                    },
+                ),
+            ),
+            400: "Error => < text of error >",
+        },
+        manual_parameters=[
+            openapi.Parameter(
+                "ids",
+                openapi.IN_QUERY,
+                description="Indices of pages: '2,3,5' (%s or less)"
+                % CONTENT_API_BATCH_MAX_IDS,
+                type=openapi.TYPE_STRING,
+                required=True,
+            ),
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="The page's fields: 'id,title,url,contents,text,...' ('id' is returned always)",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "content_fields",
+                openapi.IN_QUERY,
+                description="The content's fields: 'title,video_url,audio_url,...' "
+                "('id' and 'content_type' are returned always)",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "include",
+                openapi.IN_QUERY,
+                description="The heavy parts which are kept: 'contents,text'. Empty - without both",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "content_type",
+                openapi.IN_QUERY,
+                description="Only the contents of this type",
+                type=openapi.TYPE_STRING,
+                enum=[*CONTENT_TYPES],
+            ),
+            openapi.Parameter(
+                "is_active",
+                openapi.IN_QUERY,
+                description="Only the active ('true') or the inactive ('false') contents",
+                type=openapi.TYPE_BOOLEAN,
+            ),
+            openapi.Parameter(
+                "contents_limit",
+                openapi.IN_QUERY,
+                description="Only the first N contents of each page (by 'order')",
+                type=openapi.TYPE_INTEGER,
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path="batch")
+    async def batch(self, request, *args, **kwargs) -> Response:
+        """
+        Method: Get.
+        The pages of the dashboard by one request: '?ids=2,3,5'.
+        The entries are read from the cache by one multi-get. The keys are keys of the 'retrieve', so \
+        both methods share the cache's entries. The missing (or stale) pages are loaded by one query \
+        and their contents by one query (the union), and are cached by one multi-set.
+        The counters of all pages are increased by the one background's task.
+        :param HttpRequest request:
+        :return: ```json
+        {
+            "results": [< InitialPage >, ...],
+            "not_found": [7]
+        }
+        ```
+        """
+        message = "%s: " % (
+            PageDetailView.__class__.__name__ + "." + self.batch.__name__
+        )
+        response = Response(status=status.HTTP_404_NOT_FOUND)
         try:
-            serializer = self.serializer_class(file_list[0])
-            res = await asyncio.to_thread(lambda: serializer.data)
-        except ValidationError as error:
-            log.error(message + f"Error => {error.args[0]}")
-            response.data = message + f"Error => {error.args[0]}"
+            ids = parse_ids(request.query_params.get(IDS_PARAM, ""))
+            fieldset = Fieldset.from_query_params(request.query_params)
+            content_filter = ContentFilter.from_query_params(request.query_params)
+        except serializers.ValidationError as error:
+            log.error(message + "Error => %s" % error.detail)
+            response.data = error.detail
             response.status_code = status.HTTP_400_BAD_REQUEST
             return response
+        query_params = request.query_params.copy()
+        query_params.pop(IDS_PARAM, None)
+        caching_keys = {
+            index: "page_data_%s_%s"
+            % (
+                index,
+                canonical_path(
+                    self._detail_path(index), query_params, fieldset, content_filter
+                ),
+            )
+            for index in ids
+        }
+
+        try:
+            # THE CACHE GET. All entries by one multi-get
+            entries = await aloads_entries(
+                await cache.aget_many(list(caching_keys.values()))
+            )
+            data_by_id = {}
+            for index, caching_key in caching_keys.items():
+                data, is_fresh = entries.get(caching_key, (None, False))
+                if data is not None and is_fresh:
+                    data_by_id[index] = data
+            missing = [index for index in ids if index not in data_by_id]
+            loaded = {}
+            if missing:
+                loaded = await self._load_pages(missing, fieldset, content_filter)
+                data_by_id.update(loaded)
+                # The CACHE SET. All loaded entries by one multi-set
+                await cache.aset_many(
+                    await adumps_tagged_many(
+                        {caching_keys[index]: data for index, data in loaded.items()}
+                    ),
+                    timeout=CONTENT_CACHE_TIMEOUT + CONTENT_CACHE_STALE_TIMEOUT,
+                )
+        except Exception as error:
+            log.error(
+                message + "Error => %s" % (error.args[0] if error.args else error)
+            )
+            response.data = message + "Error => %s" % (
+                error.args[0] if error.args else error
+            )
+            return response
+
+        response = Response(
+            {
+                "results": [data_by_id[index] for index in ids if index in data_by_id],
+                "not_found": [index for index in ids if index not in data_by_id],
+            },
+            status=status.HTTP_200_OK,
+        )
+        # THE COUNTERS. The live counters of all pages by one read (the loaded pages have the db's values)
+        await counter_aggregator.aoverlay(response.data, loaded=loaded.values())
+        patch_vary_headers(response, ["Accept"])
+        # TASK FOR INCREASE COUNTER. One task for the whole batch
+        background.submit_nowait(self.task_increase_counter, args=(response.data,))
+        return response
 
-        response.data = res
-        # CELERY's TASK FOR INCREASE COUNTER
-        threading.Thread(target=self.task_increase_counter, args=(response,)).start()
-        response.status_code = status.HTTP_200_OK
-        # THE CACHE SET. Now, are trying set the data to the cache
-        threading.Thread(target=self.set_cache, args=(caching_key, response)).start()
+    @swagger_auto_schema(
+        operation_description="Export all pages with their contents (the streaming response)",
+        tags=["content"],
+        responses={
+            200: openapi.Response(
+                description="NDJSON (one page per line) or the JSON's array of pages",
+            ),
+            400: "Error => < text of error >",
+        },
+        manual_parameters=[
+            openapi.Parameter(
+                "output",
+                openapi.IN_QUERY,
+                description="'ndjson' (default) or 'json'",
+                type=openapi.TYPE_STRING,
+                enum=[OUTPUT_NDJSON, OUTPUT_JSON],
+            ),
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="The page's fields: 'id,title,url,contents,text,...' ('id' is returned always)",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "content_fields",
+                openapi.IN_QUERY,
+                description="The content's fields: 'title,video_url,audio_url,...' "
+                "('id' and 'content_type' are returned always)",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "include",
+                openapi.IN_QUERY,
+                description="The heavy parts which are kept: 'contents,text'. Empty - without both",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "content_type",
+                openapi.IN_QUERY,
+                description="Only the contents of this type",
+                type=openapi.TYPE_STRING,
+                enum=[*CONTENT_TYPES],
+            ),
+            openapi.Parameter(
+                "is_active",
+                openapi.IN_QUERY,
+                description="Only the active ('true') or the inactive ('false') contents",
+                type=openapi.TYPE_BOOLEAN,
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path="export")
+    async def export(
+        self, request, *args, **kwargs
+    ) -> StreamingHttpResponse | Response:
+        """
+        Method: Get.
+        All pages by one request, without the paginator and without the cache.
+        The pages are read by the server's cursor and are sent by chunks ('CONTENT_API_EXPORT_CHUNK_SIZE'), \
+        so the memory doesn't depend on the catalog's size (see 'content/content_api/export.py').
+        :param HttpRequest request:
+        :return: ```
+        {"id": 2, "contents": [...], "title": "New Video Content", ...}
+        {"id": 3, "contents": [...], "title": "Other page", ...}
+        ```
+        """
+        message = "%s: " % (
+            PageDetailView.__class__.__name__ + "." + self.export.__name__
+        )
+        try:
+            output = get_output(request.query_params.get(OUTPUT_PARAM))
+            fieldset = Fieldset.from_query_params(request.query_params)
+            content_filter = ContentFilter.from_query_params(request.query_params)
+        except serializers.ValidationError as error:
+            log.error(message + "Error => %s" % error.detail)
+            return Response(error.detail, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(
+            aiter_export(fieldset, content_filter, output),
+            content_type=EXPORT_CONTENT_TYPES[output],
+        )
+        # The catalog is changed while it's exported
+        response["Cache-Control"] = "no-store"
         return response
 
+    @swagger_auto_schema(
+        operation_description="Subscribe to the updates of the page's contents (Server-Sent Events)",
+        tags=["content"],
+        responses={
+            200: openapi.Response(
+                description="'text/event-stream': the events 'upload_status' and 'counter'",
+            ),
+            503: "Error => < text of error >",
+        },
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="events",
+        renderer_classes=[EventStreamRenderer, FastJSONRenderer],
+    )
+    async def events(
+        self, request, *args, **kwargs
+    ) -> StreamingHttpResponse | Response:
+        """
+        Method: Get.
+        The fallback of the websocket ('ws/content/page/< pk >/') for the clients without it.
+        The connection is kept while the client is connected (see 'content/realtime.py').
+        :param HttpRequest request:
+        :param dict kwargs: '{"pk": int}' Index of the page.
+        :return: ```
+        event: upload_status
+        data: {"event": "upload_status", "content_type": "video", "id": 5, "page_id": 2, ...}
+        ```
+        """
+        message = "%s: " % (
+            PageDetailView.__class__.__name__ + "." + self.events.__name__
+        )
+        if get_channel_layer() is None:
+            log.error(message + "Error => 'CHANNEL_LAYERS' is not configured")
+            return Response(
+                message + "Error => 'CHANNEL_LAYERS' is not configured",
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        response = StreamingHttpResponse(
+            aiter_sse([page_group(kwargs.get("pk"))]),
+            content_type=EventStreamRenderer.media_type,
+        )
+        response["Cache-Control"] = "no-cache"
+        # nginx doesn't buffer the events
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def _detail_path(self, index: int) -> str:
+        """
+        :param int index: The page's index.
+        :return: The path of the 'retrieve' ('/api/page/content/2/').
+        """
+        url_name = "%s-detail" % self.basename
+        namespace = self.request.resolver_match.namespace
+        return reverse(
+            "%s:%s" % (namespace, url_name) if namespace else url_name,
+            kwargs={"pk": index},
+        )
+
+    async def _load_pages(
+        self,
+        ids: List[int],
+        fieldset: Fieldset,
+        content_filter: ContentFilter | None = None,
+    ) -> Dict[int, dict]:
+        """
+        Load the pages by one query and their contents by one query.
+        :param ids: '[2, 3, 5]' Indices of pages.
+        :return: '{< page_id >: < InitialPage >, ...}'. The missing page is not into the result.
+        """
+        # The order is the order of '?ids=' (the result is the dict)
+        queryset = self.queryset.filter(pk__in=ids).order_by()
+        if fieldset.page_columns() is not None:
+            queryset = queryset.only(*fieldset.page_columns())
+        pages: List[PageModel] = [page async for page in queryset]
+        if not pages:
+            return {}
+        serializer = self.serializer_class(
+            pages,
+            many=True,
+            context=await self._fieldset_context(pages, fieldset, content_filter),
+        )
+        return {page["id"]: page for page in serializer.data}
+
+    async def _cached_response(
+        self,
+        request: HttpRequest,
+        caching_key: str,
+        load: Callable[[], Awaitable[dict | None]],
+    ) -> Response | HttpResponse | None:
+        """
+        Get the response from the cache. When the entry is missing or is stale, only one caller \
+        per the key rebuilds it (others await it or get the stale entry).
+        'CONTENT_API_PRERENDERED' - the cache keeps the rendered bytes and they are returned directly.
+        The conditional request ('If-None-Match', 'If-Modified-Since') gets 304 by the cached metadata only.
+        :param HttpRequest request:
+        :param str caching_key: Template is '<page_data_<pk_from_url>_< pathname_from_apiurl >>'
+        :param load: Coroutine's function which loads the data from db (None - data not found).
+        :return: The response or None when the data is not found.
+        """
+        # THE CONDITIONAL GET. The page's data is not loaded when the client has the actual version
+        meta_key = META_PREFIX + caching_key
+        # 'json' or 'msgpack' (by the 'Accept' header)
+        representation = getattr(request, "accepted_renderer", None)
+        representation = getattr(representation, "format", "json")
+        # The pre-rendered body is JSON only
+        prerendered = CONTENT_API_PRERENDERED and representation == "json"
+        meta = await cache.aget(meta_key)
+        if not await ais_fresh_meta(meta):
+            meta = None
+        # The body depends on the 'Accept' header (JSON or msgpack) and on 'Accept-Encoding' (the compression)
+        vary = ["Accept", "Accept-Encoding"]
+        if meta is not None:
+            etag = await self._etag_of_meta(meta, prerendered, representation)
+            if is_not_modified(request, etag, meta["last_modified"]):
+                # The same 'Vary' as the response 200 has
+                return not_modified_response(etag, meta["last_modified"], vary)
+
+        async def _set_meta(data: dict) -> dict:
+            new_meta = await abuild_meta(data)
+            await cache.aset(
+                meta_key,
+                new_meta,
+                timeout=CONTENT_CACHE_TIMEOUT + CONTENT_CACHE_STALE_TIMEOUT,
+            )
+            return new_meta
+
+        if prerendered:
+            rendered_key = RENDERED_PREFIX + caching_key
+            entry, is_fresh = await self.get_rendered_cache(rendered_key)
+            if entry is None or not is_fresh:
+
+                async def _build_rendered() -> dict | None:
+                    data = await load()
+                    if data is None:
+                        return None
+                    new_entry = await arender_entry(data)
+                    # The CACHE SET. The waiters (other processes) read this entry
+                    await cache.aset(
+                        rendered_key,
+                        new_entry,
+                        timeout=CONTENT_CACHE_TIMEOUT + CONTENT_CACHE_STALE_TIMEOUT,
+                    )
+                    await _set_meta(data)
+                    return new_entry
+
+                entry = await single_flight.do(
+                    rendered_key,
+                    _build_rendered,
+                    lambda: self.get_rendered_cache(rendered_key),
+                )
+                # The metadata of the new entry (it was set by the build)
+                meta = await cache.aget(meta_key)
+            if entry is None:
+                return None
+            if meta is None:
+                meta = await _set_meta(json_loads(entry["body"]))
+            # TASK FOR INCREASE COUNTER
+            background.submit_nowait(counter_aggregator.add, args=(entry["counter_keys"],))
+            response = rendered_response(
+                entry, accept_encoding=request.headers.get("Accept-Encoding", "")
+            )
+            etag = make_etag(meta, meta["counters"], CONTENT_API_ETAG_WEAK)
+            if response.has_header("Content-Encoding") and not etag.startswith("W/"):
+                # The compressed variant is other bytes, so the strong ETag is weakened (how nginx does it)
+                etag = "W/" + etag
+            patch_vary_headers(response, vary)
+            return set_conditional_headers(response, etag, meta["last_modified"])
+
+        data, is_fresh = await self.get_cache(caching_key)
+        # The data which was loaded from the db by this request (its counters are the db's values)
+        loaded: List[dict] = []
+        if data is None or not is_fresh:
+
+            async def _build() -> dict | None:
+                new_data = await load()
+                if new_data is not None:
+                    loaded.append(new_data)
+                    # The CACHE SET. The waiters (other processes) read this entry
+                    await self.set_cache(caching_key, new_data)
+                    await _set_meta(new_data)
+                return new_data
+
+            data = await single_flight.do(
+                caching_key, _build, lambda: self.get_cache(caching_key)
+            )
+            # The metadata of the new entry (it was set by the build)
+            meta = await cache.aget(meta_key)
+        if data is None:
+            return None
+        if meta is None:
+            meta = await _set_meta(data)
+        response = Response(data, status=status.HTTP_200_OK)
+        # THE COUNTERS. The cached data is not rewritten, here the live counters are overlaid
+        await counter_aggregator.aoverlay(response.data, loaded=loaded)
+        set_conditional_headers(
+            response,
+            make_etag(
+                meta,
+                counters_of_data(response.data),
+                CONTENT_API_ETAG_WEAK,
+                representation,
+            ),
+            meta["last_modified"],
+        )
+        patch_vary_headers(response, vary)
+        # TASK FOR INCREASE COUNTER
+        background.submit_nowait(self.task_increase_counter, args=(response.data,))
+        return response
+
+    @staticmethod
+    async def _etag_of_meta(
+        meta: dict, prerendered: bool, representation: str = "json"
+    ) -> str:
+        """
+        The ETag of the response which would be returned now.
+        The pre-rendered body has the counters of the rendering's time. Other responses have the live counters.
+        """
+        if CONTENT_API_ETAG_WEAK:
+            return make_etag(meta, None, True, representation)
+        counters = (
+            meta["counters"]
+            if prerendered
+            else await counter_aggregator.alive_values(meta["counters"])
+        )
+        return make_etag(meta, counters, False, representation)
+
+    @staticmethod
+    async def _fieldset_context(
+        pages: List[PageModel],
+        fieldset: Fieldset,
+        content_filter: ContentFilter | None = None,
+    ) -> dict:
+        """
+        The serializer's context: the fields of the response and the contents of all pages
+        (by two queries, only the requested columns and only the contents of the filter).
+        """
+        context = {
+            "page_fields": fieldset.page_fields,
+            "content_fields": fieldset.content_fields,
+        }
+        if fieldset.embed_contents:
+            context["contents_by_page"] = await aload_contents_by_page(
+                [page.pk for page in pages], fieldset.content_fields, content_filter
+            )
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        The list of pages gets the contents of all its pages by two queries (not two per page).
+        """
+        if kwargs.get("many") and args:
+            kwargs.setdefault("context", self.get_serializer_context())
+            if "contents_by_page" in kwargs["context"]:
+                # The contents were loaded by 'aload_contents_by_page'
+                return super().get_serializer(*args, **kwargs)
+            kwargs["context"]["contents_by_page"] = load_contents_by_page(
+                [page.pk for page in args[0]]
+            )
+        return super().get_serializer(*args, **kwargs)
+
     @staticmethod
     async def serializer_validate(serializer):
         message = (
@@ -413,48 +1093,53 @@ class PageDetailView(AsyncReadOnlyModelViewSet):
             raise serializers.ValidationError(error_test)
 
     @staticmethod
-    def set_cache(caching_key: str, response: Response) -> None:
+    async def set_cache(caching_key: str, data: dict) -> None:
         """
-        This is sync function.
-        Data is cache to the JSON's format.
+        Data is cache to the JSON's format with the versions of its tags (pages and contents).
+        The entry is kept longer than it's fresh - the stale entry is served while it's rebuilding.
         :param str caching_key: Template is '<page_data_<pk_from_url>_< pathname_from_apiurl >>'
         Exemple of 'caching_key' is the: 'page_data_2_/api/page/content/2/'.
-        :param response:
+        :param dict data: 'Initial' or 'InitialPage'
         :return:
         """
-
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(
-            asyncio.to_thread(
-                cache.set,
-                timeout=(60 * 60 * 24),
-                key=caching_key,
-                value=json.dumps({"data": response.data}),
-            )
+        await cache.aset(
+            caching_key,
+            await adumps_tagged(data),
+            timeout=CONTENT_CACHE_TIMEOUT + CONTENT_CACHE_STALE_TIMEOUT,
         )
 
     @staticmethod
-    async def _task_get_list_of_indices(response: Response) -> None:
+    async def get_cache(caching_key: str) -> Tuple[dict | None, bool]:
         """
-        Get lines db's indices
-        Getting indices from page's contents (audio, video) and start the celery's task
-        :param response:
-        :return:
+        :param str caching_key: Template is '<page_data_<pk_from_url>_< pathname_from_apiurl >>'
+        :return: '(data, is_fresh)' or '(None, False)'
         """
-        data: Initial = await asyncio.to_thread(lambda: response.data)
-        data_numbers_list: List[dict]
-        if "results" not in list(data.keys()):
-            data_numbers_list = handler_of_task([data])
-        else:
-            data_list: List[InitialPage] = data.__getitem__("results")
-            data_numbers_list = handler_of_task(data_list)
-        # # RUN THE TASK - Update content's counter
-        increment_content_counter.delay((data_numbers_list,))
-        return
+        cache_get = await cache.aget(caching_key)
+        return await aloads_entry(cache_get)
 
     @staticmethod
-    def task_increase_counter(response: Response):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(PageDetailView._task_get_list_of_indices(response))
+    async def get_rendered_cache(rendered_key: str) -> Tuple[dict | None, bool]:
+        """
+        :param str rendered_key: Template is 'rendered_<caching_key>'
+        :return: '(entry, is_fresh)' or '(None, False)'
+        """
+        entry = await cache.aget(rendered_key)
+        return await aloads_rendered(entry)
+
+    @staticmethod
+    def task_increase_counter(data: Initial) -> None:
+        """
+        Get lines db's indices
+        Getting indices from page's contents (audio, video) and add them to the counters's aggregator.
+        It's run by the background's executor.
+        :param data: 'Initial' or 'InitialPage' (the response's data).
+        :return:
+        """
+        data_list: List[InitialPage] = (
+            [data] if "results" not in list(data.keys()) else data.__getitem__("results")
+        )
+        # The pages without the embedded contents ('?fields=', '?include=') are not counted
+        data_list = [page for page in data_list if page.get("contents")]
+        data_numbers_list: List[dict] = handler_of_task(data_list)
+        # # Update content's counter. The deltas are collected and flushed to the db by the one task
+        counter_aggregator.add(flatten_content_keys(data_numbers_list))
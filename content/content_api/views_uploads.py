@@ -0,0 +1,197 @@
+"""
+content/content_api/views_uploads.py
+The resumable (chunked) upload of the video's and of the audio's files (see 'content/uploads.py').
+"""
+
+import io
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from adrf.viewsets import ViewSet as AsyncViewSet
+
+from content.content_api.serializers import ChunkedUploadSerializer
+from content.models import ChunkedUploadModel
+from content.uploads import (
+    UPLOAD_OFFSET_HEADER,
+    UploadBusyError,
+    UploadError,
+    UploadOffsetError,
+    append_chunk,
+    finalize_upload,
+)
+from logs import configure_logging
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+
+class ChunkedUploadView(AsyncViewSet):
+    serializer_class = ChunkedUploadSerializer
+
+    @swagger_auto_schema(
+        operation_description="Create the resumable upload of the content's file",
+        tags=["uploads"],
+        request_body=ChunkedUploadSerializer,
+        responses={201: ChunkedUploadSerializer, 400: "Error => < text of error >"},
+    )
+    async def create(self, request, *args, **kwargs) -> Response:
+        """
+        Method: Post.
+        :param HttpRequest request: '{"content_type": "video", "content_id": 5, "filename": "film.mp4", \
+            "size": 1073741824}'
+        :return: The upload with the 'id' and 'offset' = 0.
+        """
+        serializer = self.serializer_class(data=request.data)
+        if not await sync_to_async(serializer.is_valid)():
+            log.error(
+                "%s: Error => %s"
+                % (
+                    ChunkedUploadView.__name__ + "." + self.create.__name__,
+                    serializer.errors,
+                )
+            )
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        upload = await sync_to_async(serializer.save)()
+        response = Response(serializer.data, status=status.HTTP_201_CREATED)
+        response[UPLOAD_OFFSET_HEADER] = str(upload.offset)
+        return response
+
+    @swagger_auto_schema(
+        operation_description="The committed offset of the upload (the resume's point)",
+        tags=["uploads"],
+        responses={200: ChunkedUploadSerializer, 404: "Error => < text of error >"},
+    )
+    async def retrieve(self, request, pk=None, *args, **kwargs) -> Response:
+        """
+        Method: Get (and Head).
+        :param dict kwargs: '{"pk": uuid}' The upload's index.
+        :return: The upload. The header 'Upload-Offset' is the committed offset.
+        """
+        upload = await self._get_upload(pk)
+        if upload is None:
+            return self._not_found(pk)
+        response = Response(self.serializer_class(upload).data)
+        response[UPLOAD_OFFSET_HEADER] = str(upload.offset)
+        response["Cache-Control"] = "no-store"
+        return response
+
+    @swagger_auto_schema(
+        operation_description="Append the chunk (the request's body) to the upload",
+        tags=["uploads"],
+        manual_parameters=[
+            openapi.Parameter(
+                UPLOAD_OFFSET_HEADER,
+                openapi.IN_HEADER,
+                description="The offset of the chunk. It's the committed offset",
+                type=openapi.TYPE_INTEGER,
+                required=True,
+            ),
+        ],
+        responses={
+            204: "The chunk is committed. 'Upload-Offset' is the new offset",
+            409: "The offset is not the committed offset ('Upload-Offset' is the committed offset)",
+        },
+    )
+    async def partial_update(self, request, pk=None, *args, **kwargs) -> Response:
+        """
+        Method: Patch.
+        The body is the chunk's bytes ('Content-Type: application/offset+octet-stream').
+        :param dict kwargs: '{"pk": uuid}' The upload's index.
+        :return: 204 and the new offset into the header 'Upload-Offset'.
+        """
+        message = "%s: " % (
+            ChunkedUploadView.__name__ + "." + self.partial_update.__name__
+        )
+        offset = request.headers.get(UPLOAD_OFFSET_HEADER, "")
+        if not offset.isdigit():
+            log.error(message + "Error => '%s' is not valid" % UPLOAD_OFFSET_HEADER)
+            return Response(
+                message + "Error => '%s' is not valid" % UPLOAD_OFFSET_HEADER,
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            new_offset = await sync_to_async(append_chunk)(
+                pk, int(offset), request.stream or io.BytesIO()
+            )
+        except (ChunkedUploadModel.DoesNotExist, DjangoValidationError):
+            return self._not_found(pk)
+        except UploadOffsetError as error:
+            log.error(message + "Error => %s" % error)
+            response = Response(
+                message + "Error => %s" % error, status=status.HTTP_409_CONFLICT
+            )
+            response[UPLOAD_OFFSET_HEADER] = str(error.offset)
+            return response
+        except UploadError as error:
+            log.error(message + "Error => %s" % error)
+            return Response(
+                message + "Error => %s" % error, status=status.HTTP_409_CONFLICT
+            )
+        response = Response(status=status.HTTP_204_NO_CONTENT)
+        response[UPLOAD_OFFSET_HEADER] = str(new_offset)
+        return response
+
+    @swagger_auto_schema(
+        operation_description="Close the complete upload and start the file's processing",
+        tags=["uploads"],
+        request_body=openapi.Schema(type=openapi.TYPE_OBJECT),
+        responses={
+            202: ChunkedUploadSerializer,
+            409: "The upload is not complete or it's finalized already",
+            503: "The queue of the files' processing is full (the finalize is repeated later)",
+        },
+    )
+    @action(detail=True, methods=["post"], url_path="finalize")
+    async def finalize(self, request, pk=None, *args, **kwargs) -> Response:
+        """
+        Method: Post.
+        The staging file is ingested by the upload's task. The content's 'upload_status' is 'processing' \
+        until the task is completed (the subscribers get the new status - see 'content/realtime.py').
+        :param dict kwargs: '{"pk": uuid}' The upload's index.
+        :return: 202 and the closed upload. 503 when the queue of the processing is full.
+        """
+        message = "%s: " % (ChunkedUploadView.__name__ + "." + self.finalize.__name__)
+        try:
+            upload = await sync_to_async(finalize_upload)(pk)
+        except (ChunkedUploadModel.DoesNotExist, DjangoValidationError):
+            return self._not_found(pk)
+        except UploadBusyError as error:
+            log.error(message + "Error => %s" % error)
+            response = Response(
+                message + "Error => %s" % error,
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = "1"
+            return response
+        except UploadError as error:
+            log.error(message + "Error => %s" % error)
+            return Response(
+                message + "Error => %s" % error, status=status.HTTP_409_CONFLICT
+            )
+        return Response(
+            self.serializer_class(upload).data, status=status.HTTP_202_ACCEPTED
+        )
+
+    @staticmethod
+    async def _get_upload(pk) -> ChunkedUploadModel | None:
+        try:
+            return await ChunkedUploadModel.objects.filter(pk=pk).afirst()
+        except DjangoValidationError:
+            # Not valid UUID
+            return None
+
+    @staticmethod
+    def _not_found(pk) -> Response:
+        log.error(
+            "%s: Error => Upload with pk %s not found" % (ChunkedUploadView.__name__, pk)
+        )
+        return Response(
+            "%s: Error => Upload with pk %s not found" % (ChunkedUploadView.__name__, pk),
+            status=status.HTTP_404_NOT_FOUND,
+        )
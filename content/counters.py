@@ -0,0 +1,533 @@
+"""
+content/counters.py
+Write-coalescing of the content's view-counters.
+Every API request only adds '(content_type, id) -> delta' into the shared store (redis hash).
+The celery's task 'flush_content_counters' moves the collected totals to the db
+by the interval (celery beat) or when the store has reached the threshold.
+Live values of the counters are kept into the separate hash ('content_counter_totals') and are
+overlaid at response time. So the cached page's JSON is not rewritten by the read's requests.
+The live value is seeded from the db (plus the pending delta), not from the cached JSON (it can be old). \
+The data which was just loaded from the db ('loaded') has the db's values already, so it's not queried again. \
+The flush evicts the fields of the flushed contents (the next read seeds them from the db again), and \
+the hash has the TTL ('CONTENT_COUNTER_TOTALS_TTL'), so it doesn't grow without the bound and it's \
+seeded again after the redis's flush or failover.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from django.core.cache import cache
+
+from content.transactions import bulk_increment_counters
+from logs import configure_logging
+from project.settings import (
+    CONTENT_COUNTER_BACKEND,
+    CONTENT_COUNTER_FLUSH_INTERVAL,
+    CONTENT_COUNTER_FLUSH_THRESHOLD,
+    CONTENT_COUNTER_REDIS_URL,
+    CONTENT_COUNTER_TOTALS_TTL,
+)
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+CounterKey = Tuple[str, int]
+
+# Redis's keys for the pending deltas and for the deltas which is flushing now
+COUNTER_PENDING_KEY = "content_counter_pending"
+COUNTER_PROCESSING_KEY = "content_counter_processing"
+COUNTER_FLUSH_LOCK_KEY = "content_counter_flush_lock"
+# Redis's key for the live values of the counters
+COUNTER_TOTALS_KEY = "content_counter_totals"
+
+
+def flatten_content_keys(data_numbers_list: list) -> List[CounterKey]:
+    """
+    The list from 'handler_of_task' has the different nesting (a single page or the list of pages).
+    Here, we get the flat list of '(content_type, id)'.
+    :param list data_numbers_list: '[{"content_type": "video", "id": 2}, [{...}, {...}], ...]'
+    :return: '[("video", 2), ...]'
+    """
+    keys: List[CounterKey] = []
+    for view in data_numbers_list:
+        if isinstance(view, dict):
+            keys.append((str(view["content_type"]).lower(), int(view["id"])))
+        elif isinstance(view, (list, tuple)):
+            keys.extend(flatten_content_keys(list(view)))
+    return keys
+
+
+def iter_contents(data: dict) -> Iterator[dict]:
+    """
+    Get the content's items from the single page or from the paginated list of pages.
+    :param dict data: 'Initial' or 'InitialPage'
+    :return: Iterator of 'InitialContent'
+    """
+    pages = data["results"] if "results" in data else [data]
+    for page in pages:
+        for content in page.get("contents") or []:
+            yield content
+
+
+def _to_field(key: CounterKey) -> str:
+    return "%s:%s" % key
+
+
+def _from_field(field: str | bytes) -> CounterKey:
+    if isinstance(field, bytes):
+        field = field.decode("utf-8")
+    content_type, index = field.rsplit(":", 1)
+    return content_type, int(index)
+
+
+def _content_models() -> dict:
+    from content.models_content_files import AudioContentModel, VideoContentModel
+
+    return {"video": VideoContentModel, "audio": AudioContentModel}
+
+
+def _ids_by_type(fields: Iterable[str]) -> Dict[str, List[int]]:
+    ids_by_type: Dict[str, List[int]] = {}
+    for field in fields:
+        content_type, index = _from_field(field)
+        ids_by_type.setdefault(content_type, []).append(index)
+    return ids_by_type
+
+
+def db_counters(fields: Iterable[str]) -> Dict[str, int]:
+    """
+    The counters from the db (one query per table).
+    :param fields: '["video:2", "audio:3"]'
+    :return: '{"video:2": 15, ...}'. The missing content is not into the result.
+    """
+    models = _content_models()
+    counters: Dict[str, int] = {}
+    for content_type, ids in _ids_by_type(fields).items():
+        if content_type not in models:
+            continue
+        rows = models[content_type].objects.filter(pk__in=ids)
+        for index, counter in rows.values_list("id", "counter"):
+            counters[_to_field((content_type, index))] = counter
+    return counters
+
+
+async def adb_counters(fields: Iterable[str]) -> Dict[str, int]:
+    """
+    Async version of 'db_counters'.
+    :param fields: '["video:2", "audio:3"]'
+    :return: '{"video:2": 15, ...}'
+    """
+    models = _content_models()
+    counters: Dict[str, int] = {}
+    for content_type, ids in _ids_by_type(fields).items():
+        if content_type not in models:
+            continue
+        rows = models[content_type].objects.filter(pk__in=ids)
+        async for index, counter in rows.values_list("id", "counter"):
+            counters[_to_field((content_type, index))] = counter
+    return counters
+
+
+class LocalCounterBackend:
+    """
+    In-process store of the pending deltas and of the live counters.
+    It's for tests and for the local develop (the deltas are lost when the process is stopped).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, int] = {}
+        self._processing: Dict[str, int] = {}
+        self._totals: Dict[str, int] = {}
+
+    def incr_many(self, deltas: Dict[str, int]) -> int:
+        with self._lock:
+            for field, delta in deltas.items():
+                self._pending[field] = self._pending.get(field, 0) + delta
+                if field in self._totals:
+                    self._totals[field] += delta
+            return len(self._pending)
+
+    def totals_many(self, fields: List[str]) -> Dict[str, int | None]:
+        with self._lock:
+            return {field: self._totals.get(field) for field in fields}
+
+    async def atotals_many(self, fields: List[str]) -> Dict[str, int | None]:
+        return self.totals_many(fields)
+
+    def seed_many(self, values: Dict[str, int]) -> Dict[str, int]:
+        with self._lock:
+            for field, value in values.items():
+                self._totals.setdefault(field, value + self._pending.get(field, 0))
+            return {field: self._totals[field] for field in values.keys()}
+
+    async def aseed_many(self, values: Dict[str, int]) -> Dict[str, int]:
+        return self.seed_many(values)
+
+    def evict(self, fields: List[str]) -> None:
+        with self._lock:
+            for field in fields:
+                self._totals.pop(field, None)
+
+    def take(self) -> Dict[str, int]:
+        with self._lock:
+            if not self._processing:
+                self._processing, self._pending = self._pending, {}
+            return dict(self._processing)
+
+    def ack(self) -> None:
+        with self._lock:
+            self._processing = {}
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+class RedisCounterBackend:
+    """
+    Store of the pending deltas and of the live counters in the redis's hashes.
+    'HINCRBY' is atomic, so the concurrent requests (from all daphne's workers) don't lose the increments.
+    The flush renames the pending hash to the processing hash. If the flush was broken \
+    the processing hash stays in redis and is flushed by the next call.
+    """
+
+    # The live counter is increased only when it was seeded (by 'overlay_many').
+    INCR_TOTAL_SCRIPT = """
+    if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+        return redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+    end
+    return nil
+    """
+    # The live counter is seeded by the db's value plus the pending delta (only when it's not seeded).
+    # ARGV: the TTL of the hash, then the pairs '< field >, < db's value >'
+    SEED_TOTALS_SCRIPT = """
+    local result = {}
+    for i = 2, #ARGV, 2 do
+        if redis.call('HEXISTS', KEYS[1], ARGV[i]) == 0 then
+            local pending = tonumber(redis.call('HGET', KEYS[2], ARGV[i]) or '0')
+            redis.call('HSET', KEYS[1], ARGV[i], tonumber(ARGV[i + 1]) + pending)
+        end
+        result[#result + 1] = redis.call('HGET', KEYS[1], ARGV[i])
+    end
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+    return result
+    """
+
+    def __init__(self, url: str, totals_ttl: int = CONTENT_COUNTER_TOTALS_TTL):
+        import redis
+
+        self._url = url
+        self._totals_ttl = totals_ttl
+        self._client = redis.Redis.from_url(url)
+        self._incr_total = self._client.register_script(self.INCR_TOTAL_SCRIPT)
+        self._seed_totals = self._client.register_script(self.SEED_TOTALS_SCRIPT)
+        # The clients of 'redis.asyncio' (one per event loop)
+        self._aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def aclient(self):
+        import redis.asyncio
+
+        loop = asyncio.get_running_loop()
+        client = self._aclients.get(loop)
+        if client is None:
+            client = redis.asyncio.Redis.from_url(self._url)
+            self._aclients[loop] = client
+        return client
+
+    def incr_many(self, deltas: Dict[str, int]) -> int:
+        pipe = self._client.pipeline(transaction=False)
+        for field, delta in deltas.items():
+            pipe.hincrby(COUNTER_PENDING_KEY, field, delta)
+            self._incr_total(keys=[COUNTER_TOTALS_KEY], args=[field, delta], client=pipe)
+        pipe.hlen(COUNTER_PENDING_KEY)
+        return int(pipe.execute()[-1])
+
+    def totals_many(self, fields: List[str]) -> Dict[str, int | None]:
+        values = self._client.hmget(COUNTER_TOTALS_KEY, fields)
+        return {
+            field: int(value) if value is not None else None
+            for field, value in zip(fields, values)
+        }
+
+    async def atotals_many(self, fields: List[str]) -> Dict[str, int | None]:
+        values = await self.aclient.hmget(COUNTER_TOTALS_KEY, fields)
+        return {
+            field: int(value) if value is not None else None
+            for field, value in zip(fields, values)
+        }
+
+    def _seed_args(self, values: Dict[str, int]) -> list:
+        args: list = [self._totals_ttl]
+        for field, value in values.items():
+            args.extend([field, value])
+        return args
+
+    def seed_many(self, values: Dict[str, int]) -> Dict[str, int]:
+        result = self._seed_totals(
+            keys=[COUNTER_TOTALS_KEY, COUNTER_PENDING_KEY], args=self._seed_args(values)
+        )
+        return {field: int(value) for field, value in zip(values.keys(), result)}
+
+    async def aseed_many(self, values: Dict[str, int]) -> Dict[str, int]:
+        script = self.aclient.register_script(self.SEED_TOTALS_SCRIPT)
+        result = await script(
+            keys=[COUNTER_TOTALS_KEY, COUNTER_PENDING_KEY], args=self._seed_args(values)
+        )
+        return {field: int(value) for field, value in zip(values.keys(), result)}
+
+    def evict(self, fields: List[str]) -> None:
+        if fields:
+            self._client.hdel(COUNTER_TOTALS_KEY, *fields)
+
+    def take(self) -> Dict[str, int]:
+        import redis
+
+        if not self._client.exists(COUNTER_PROCESSING_KEY):
+            try:
+                self._client.rename(COUNTER_PENDING_KEY, COUNTER_PROCESSING_KEY)
+            except redis.ResponseError:
+                # The pending hash is empty (no key)
+                return {}
+        return {
+            (k.decode("utf-8") if isinstance(k, bytes) else k): int(v)
+            for k, v in self._client.hgetall(COUNTER_PROCESSING_KEY).items()
+        }
+
+    def ack(self) -> None:
+        self._client.delete(COUNTER_PROCESSING_KEY)
+
+    def size(self) -> int:
+        return int(self._client.hlen(COUNTER_PENDING_KEY))
+
+
+def apply_counter_deltas(deltas: Dict[CounterKey, int]) -> Dict[str, int]:
+    """
+    Record the collected deltas to the db (one statement per table).
+    :param dict deltas: '{("video", 2): 15, ("audio", 3): 1}'
+    :return: '{< table_db >: < quantity of the updated lines >}'
+    """
+    return bulk_increment_counters(deltas)
+
+
+class ViewCounterAggregator:
+    """
+    The aggregator of the view-counters.
+    'add' - is called by the API's views (one call per request);
+    'flush' - is called by the celery's task (one call per interval or per threshold).
+    """
+
+    def __init__(
+        self,
+        backend_name: str = CONTENT_COUNTER_BACKEND,
+        threshold: int = CONTENT_COUNTER_FLUSH_THRESHOLD,
+    ):
+        self.backend_name = backend_name
+        self.threshold = threshold
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> LocalCounterBackend | RedisCounterBackend:
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = (
+                        RedisCounterBackend(CONTENT_COUNTER_REDIS_URL)
+                        if self.backend_name == "redis"
+                        else LocalCounterBackend()
+                    )
+        return self._backend
+
+    def add(self, keys: Iterable[CounterKey]) -> None:
+        """
+        Add '+1' for each '(content_type, id)'.
+        :param keys: '[("video", 2), ...]'
+        :return: None
+        """
+        deltas: Dict[str, int] = {}
+        for key in keys:
+            field = _to_field(key)
+            deltas[field] = deltas.get(field, 0) + 1
+        if not deltas:
+            return
+        try:
+            size = self.backend.incr_many(deltas)
+        except Exception as error:
+            log.error(
+                "%s: Error => %s"
+                % (
+                    ViewCounterAggregator.__name__ + "." + self.add.__name__,
+                    error.args[0] if error.args else error,
+                )
+            )
+            return
+        if size >= self.threshold:
+            self._schedule_flush()
+
+    @staticmethod
+    def _seeds_of(contents: List[dict]) -> Dict[str, int]:
+        seeds: Dict[str, int] = {}
+        for content in contents:
+            if "counter" not in content:
+                # The sparse fieldset without the counter
+                continue
+            field = _to_field((str(content["content_type"]).lower(), int(content["id"])))
+            seeds[field] = max(seeds.get(field, 0), int(content["counter"]))
+        return seeds
+
+    @staticmethod
+    def _apply_live(contents: List[dict], live: Dict[str, int]) -> None:
+        for content in contents:
+            if "counter" not in content:
+                continue
+            field = _to_field((str(content["content_type"]).lower(), int(content["id"])))
+            content["counter"] = live[field]
+
+    def _log_error(self, method: str, error: Exception) -> None:
+        log.error(
+            "%s: Error => %s"
+            % (
+                ViewCounterAggregator.__name__ + "." + method,
+                error.args[0] if error.args else error,
+            )
+        )
+
+    def _live(
+        self, seeds: Dict[str, int], db_seeds: Dict[str, int] | None = None
+    ) -> Dict[str, int]:
+        """
+        :param dict seeds: '{"video:2": 15, ...}' The values of the cached data.
+        :param dict db_seeds: '{"video:2": 15, ...}' The values which were just loaded from the db.
+        :return: The live values. The field which is not into the store is seeded from the db \
+            (the cached value is used only when the content is not into the db).
+        """
+        live = self.backend.totals_many([*seeds.keys()])
+        missing = [field for field, value in live.items() if value is None]
+        if missing:
+            counters = dict(db_seeds or {})
+            counters.update(
+                db_counters([field for field in missing if field not in counters])
+            )
+            live.update(
+                self.backend.seed_many(
+                    {field: counters.get(field, seeds[field]) for field in missing}
+                )
+            )
+        return live
+
+    async def _alive(
+        self, seeds: Dict[str, int], db_seeds: Dict[str, int] | None = None
+    ) -> Dict[str, int]:
+        live = await self.backend.atotals_many([*seeds.keys()])
+        missing = [field for field, value in live.items() if value is None]
+        if missing:
+            counters = dict(db_seeds or {})
+            counters.update(
+                await adb_counters([field for field in missing if field not in counters])
+            )
+            live.update(
+                await self.backend.aseed_many(
+                    {field: counters.get(field, seeds[field]) for field in missing}
+                )
+            )
+        return live
+
+    def _db_seeds_of(self, loaded: Iterable[dict]) -> Dict[str, int]:
+        seeds: Dict[str, int] = {}
+        for data in loaded:
+            seeds.update(self._seeds_of(list(iter_contents(data))))
+        return seeds
+
+    def overlay(self, data: dict, loaded: Iterable[dict] = ()) -> dict:
+        """
+        Replace the counters of the page (or of the list of pages) by the live values.
+        The counter which is not into the store yet is seeded by the value from the db.
+        :param dict data: 'Initial' or 'InitialPage'. It's changed in place.
+        :param loaded: The pages (or the lists) of 'data' which were just loaded from the db (not from the cache). \
+            Their counters are the db's values, so they are not queried again.
+        :return: 'data'
+        """
+        contents = list(iter_contents(data))
+        seeds = self._seeds_of(contents)
+        if not seeds:
+            return data
+        try:
+            live = self._live(seeds, self._db_seeds_of(loaded))
+        except Exception as error:
+            self._log_error(self.overlay.__name__, error)
+            return data
+        self._apply_live(contents, live)
+        return data
+
+    async def aoverlay(self, data: dict, loaded: Iterable[dict] = ()) -> dict:
+        """
+        Async version of 'overlay' (the async redis's client and the async ORM, without the thread).
+        :param dict data: 'Initial' or 'InitialPage'. It's changed in place.
+        :param loaded: The pages (or the lists) of 'data' which were just loaded from the db.
+        :return: 'data'
+        """
+        contents = list(iter_contents(data))
+        seeds = self._seeds_of(contents)
+        if not seeds:
+            return data
+        try:
+            live = await self._alive(seeds, self._db_seeds_of(loaded))
+        except Exception as error:
+            self._log_error(self.aoverlay.__name__, error)
+            return data
+        self._apply_live(contents, live)
+        return data
+
+    async def alive_values(self, seeds: Dict[str, int]) -> Dict[str, int]:
+        """
+        The live values of the counters (without the page's data).
+        :param dict seeds: '{"video:2": 15, ...}' The values which are used when the store is not available.
+        :return: '{"video:2": 17, ...}'
+        """
+        if not seeds:
+            return {}
+        try:
+            return await self._alive(seeds)
+        except Exception as error:
+            self._log_error(self.alive_values.__name__, error)
+            return dict(seeds)
+
+    def _schedule_flush(self) -> None:
+        """Run the flush's task only one time per the interval"""
+        from content.tasks import flush_content_counters
+
+        if cache.add(COUNTER_FLUSH_LOCK_KEY, 1, timeout=CONTENT_COUNTER_FLUSH_INTERVAL):
+            flush_content_counters.delay()
+
+    def flush(self) -> Dict[CounterKey, int]:
+        """
+        Move the collected deltas to the db.
+        :return: The deltas which were recorded to the db.
+        """
+        fields = self.backend.take()
+        if not fields:
+            return {}
+        deltas: Dict[CounterKey, int] = {}
+        for field, delta in fields.items():
+            if delta:
+                deltas[_from_field(field)] = delta
+        apply_counter_deltas(deltas)
+        try:
+            # The next read seeds the live values from the db (with these deltas)
+            self.backend.evict([*fields.keys()])
+        except Exception as error:
+            # The fields are evicted by the TTL of the hash
+            self._log_error(self.flush.__name__, error)
+        # After commit only. If 'apply_counter_deltas' raised, deltas are flushed by the next call
+        self.backend.ack()
+        return deltas
+
+
+counter_aggregator = ViewCounterAggregator()
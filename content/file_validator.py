@@ -6,18 +6,48 @@ https://docs.djangoproject.com/en/4.2/ref/files/storage/#django.core.files.stora
 import os
 import hashlib
 import logging
-from typing import List, Union
+from typing import BinaryIO, List, Union
 from django.core.files.uploadedfile import UploadedFile
 from django.core.files.storage import default_storage
-from project import settings
 from logs import configure_logging
+from content.models import ContentFileHashModel
 from content.models_content_files import (VideoContentModel, AudioContentModel)
-from project.settings import DEFAULT_CHUNK_SIZE, FIELD_NAME_LIST, MEDIA_URL
+from project.settings import (
+    CONTENT_FINGERPRINT_BLOCK_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    FIELD_NAME_LIST,
+    MEDIA_URL,
+)
+
+# The files of the upload are copied by chunks of 10 MB
+UPLOAD_CHUNK_SIZE = 10 * 1024 * 1024
 
 log = logging.getLogger(__name__)
 configure_logging(logging.INFO)
 
 
+def write_with_md5(
+    source: BinaryIO,
+    destination: BinaryIO,
+    md5_hash=None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> str:
+    """
+    Copy the file by chunks and calculate the MD5 of the copied bytes at the same time.
+    So the file is not read again for the duplicate's checking.
+    :param source: The file (or the request's body) which is read.
+    :param destination: The file (staging) which is written.
+    :param md5_hash: 'hashlib.md5()' with the bytes before this copy (the previous chunks) or None.
+    :param int chunk_size: Size of one chunk.
+    :return: The MD5's hex of all bytes - '9e107d9d372bb6826bd81d3542a419d6'
+    """
+    md5_hash = md5_hash if md5_hash is not None else hashlib.md5()
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        md5_hash.update(chunk)
+        destination.write(chunk)
+    return md5_hash.hexdigest()
+
+
 class FileDuplicateChecker:
     """
     This is the class for checking of file through library hash's MD5
@@ -74,56 +104,92 @@ class FileDuplicateChecker:
                     ),
                     "rb",
                 ) as file:
-                    # for chunk in iter(lambda: file.read(size=chunk_size), b""):
-                    md5_hash.update(file.read())
+                    for chunk in iter(lambda: file.read(chunk_size), b""):
+                        md5_hash.update(chunk)
                 path_list.clear()
         return md5_hash.hexdigest()
 
+    def calculate_fingerprint(
+        self,
+        file_path: str,
+        size: int | None = None,
+        block_size: int = CONTENT_FINGERPRINT_BLOCK_SIZE,
+    ) -> str:
+        """
+        Calculate the cheap fingerprint of the file - MD5 of the size and of three blocks: \
+        the head, the middle and the tail. The small file (three blocks or less) is read whole.
+        :param str file_path: 'media/2025/07/12/video/your-file.mp4'
+        :param int size: Size of the file or None (the size is got from the file).
+        :param int block_size: Size of one block.
+        :return: '9e107d9d372bb6826bd81d3542a419d6'
+        """
+        file_path = self._media_path(file_path)
+        size = size if size is not None else os.path.getsize(file_path)
+        md5_hash = hashlib.md5(str(size).encode())
+        with open(file_path, "rb") as file:
+            if size <= 3 * block_size:
+                md5_hash.update(file.read())
+            else:
+                for offset in (0, (size - block_size) // 2, size - block_size):
+                    file.seek(offset)
+                    md5_hash.update(file.read(block_size))
+        return md5_hash.hexdigest()
+
     def check_duplicate(
         self,
         file_obj,
         model_class: Union[VideoContentModel, AudioContentModel] = None,
         field_name_list: List[str] = None,
+        file_md5: str | None = None,
+        size: int | None = None,
+        fingerprint: str | None = None,
     ) -> str | None:
         """
         This's checker - file exists into the MD5's hash or not.
         If is True it's mean returning the path to the MD5's hash.
-        :param file_obj:
-        :param Union[VideoContentModel, AudioContentModel] model_class:
-        :param List[str] field_name_list:  Value by default has 'FIELD_NAME_LIST' or '["audio_path", "audio_url", "video_url", "video_path"]'
-        :return:
+        The file is looked up by the index 'ContentFileHashModel' (the files of all contents). The candidates \
+        are narrowed step by step: by the size (one query), by the fingerprint, and only the rest of \
+        candidates are compared by the whole file's MD5. So the unique file (mostly it's the unique size \
+        or fingerprint) is not read whole.
+        :param file_obj: The path of the file ('media/< uuid >_film.mp4').
+        :param Union[VideoContentModel, AudioContentModel] model_class: Not used by the lookup (it's the old API).
+        :param List[str] field_name_list: Not used by the lookup (it's the old API).
+        :param str file_md5: The MD5 which was calculated when the file was written (see 'write_with_md5'). \
+            If it's None, the file is read for the MD5 only when it's needed.
+        :param int size: Size of the file (bytes) or None (the size is got from the file).
+        :param str fingerprint: The fingerprint of the file ('calculate_fingerprint') or None.
+        :return: The path of the existing file or None.
         """
-        field_name_list = (
-            field_name_list if field_name_list is not None else FIELD_NAME_LIST
-        )
         try:
             if isinstance(file_obj, str) and file_obj.startswith(
                 ("http://", "https://")
             ):
                 return None
-            file_md5 = self.calculate_md5(file_obj)
-            if not file_md5:
-                return None
             # Check the cache.
-            if file_md5 in self.hash_map.keys():
+            if file_md5 is not None and file_md5 in self.hash_map.keys():
                 existing_path = self.hash_map[file_md5]
                 return existing_path
-            # Check into the db.
-            for field_name in field_name_list:
-                if hasattr(model_class, field_name):
-                    existing_path = self._check_in_database(
-                        model_class, file_md5, [field_name]
-                    )
-                    if existing_path:
-                        file_path = getattr(existing_path, field_name)
-                        self.hash_map[file_md5] = file_path
-                        return file_path
-            # Check into the file's source
-            existing_path = self._check_in_storage(file_md5)
-            if existing_path:
+            file_path = (
+                self._media_path(file_obj)
+                if isinstance(file_obj, str)
+                and os.path.isfile(self._media_path(file_obj))
+                else None
+            )
+            if size is None and file_path is not None:
+                size = os.path.getsize(file_path)
+            # Check into the index.
+            if size is None:
+                # Without the size - only the whole MD5
+                if file_md5 is None:
+                    file_md5 = self.calculate_md5(file_obj)
+                existing_path = self._check_in_database(file_md5)
+            else:
+                existing_path = self._check_by_size(
+                    file_obj, file_path, size, file_md5, fingerprint
+                )
+            if existing_path and file_md5 is not None:
                 self.hash_map[file_md5] = existing_path
-                return existing_path
-            return None
+            return existing_path
         except Exception as error:
             log.error(
                 "%s: Error => %s"
@@ -136,85 +202,119 @@ class FileDuplicateChecker:
             )
             return None
 
-    def _check_in_database(
-        self,
-        model_class: Union[VideoContentModel, AudioContentModel],
-        file_md5,
-        field_name_list: List[str] = None,
-    ) -> Union[VideoContentModel, AudioContentModel, None]:
+    def _check_in_database(self, file_md5: str) -> str | None:
         """
-        Look up the files which could has the same names
-        :param Union[VideoContentModel, AudioContentModel] model_class:
-        :param List[str] field_name_list:  Value by default \
-        has 'FIELD_NAME_LIST' or '["audio_path", "audio_url", "video_url", "video_path"]'
+        Look up the file by the index '(digest, size)'.
+        The line of the removed file is deleted, and the next line is checked.
         :param str file_md5: this hash's string.
-        :return:  Returning the obj from db or None
+        :return:  Returning the file's path or None
         """
-        field_name_list = (
-            field_name_list if field_name_list is not None else FIELD_NAME_LIST
-        )
-        try:
-            obj_iter = (obj for obj in model_class.objects.all())
-            for obj in obj_iter:
-                for name in field_name_list:
-                    file_field = getattr(obj, name)
-                    return (
-                        obj
-                        if file_field
-                        and self.calculate_md5(file_field.path) == file_md5
-                        else None
-                    )
-        except Exception as error:
-            log.error(
-                "%s: Error => %s"
-                % (
-                    FileDuplicateChecker.__class__.__name__
-                    + "."
-                    + self.check_duplicate.__name__,
-                    error.args[0],
-                )
-            )
-            return None
+        queryset = ContentFileHashModel.objects.filter(digest=file_md5)
+        for index, path in queryset.order_by("pk").values_list("pk", "path"):
+            if os.path.exists(path):
+                return path
+            ContentFileHashModel.objects.filter(pk=index).delete()
+        return None
 
-    def _check_in_storage(self, file_md5) -> Union[str, None]:
+    def _check_by_size(
+        self,
+        file_obj,
+        file_path: str | None,
+        size: int,
+        file_md5: str | None = None,
+        fingerprint: str | None = None,
+    ) -> str | None:
         """
-        :param str file_md5: this hash's string.
-        :return: Returning the string's path or None
+        Size -> fingerprint -> whole MD5. The fingerprint and the MD5 of the candidate are calculated \
+        only when they are needed, and they are saved to the index for the next checks.
+        :return:  Returning the file's path or None
         """
-        # Check all the files to the MEDIA's directory
-        media_root = getattr(settings, "MEDIA_ROOT", "")
-        if not media_root:
+        candidates = [*ContentFileHashModel.objects.filter(size=size).order_by("pk")]
+        if not candidates:
             return None
-
-        for root, dirs, files in os.walk(media_root):
-            file_path_iter = (os.path.join(root, file_path) for file_path in files)
-            for file_path in file_path_iter:
-                try:
-                    file_md5_current = self.calculate_md5(file_path)
-                    if file_md5_current == file_md5:
-                        # Return pathname from django (it's old path)
-                        relative_path = os.path.relpath(file_path, media_root)
-                        return relative_path
-                except (IOError, OSError, Exception) as error:
-                    log.error(
-                        "%s: Error => %s"
-                        % (
-                            FileDuplicateChecker.__class__.__name__
-                            + "."
-                            + self.check_duplicate.__name__,
-                            error.args[0],
-                        )
+        # THE FINGERPRINT.
+        if fingerprint is None and file_path is not None:
+            fingerprint = self.calculate_fingerprint(file_path, size)
+        matched = []
+        for candidate in candidates:
+            if not os.path.exists(candidate.path):
+                candidate.delete()
+                continue
+            if fingerprint is not None:
+                if candidate.fingerprint is None:
+                    candidate.fingerprint = self.calculate_fingerprint(
+                        candidate.path, size
                     )
-                    return None
+                    candidate.save(update_fields=["fingerprint"])
+                if candidate.fingerprint != fingerprint:
+                    continue
+            matched.append(candidate)
+        if not matched:
+            return None
+        # THE WHOLE MD5.
+        if file_md5 is None:
+            file_md5 = self.calculate_md5(file_obj)
+        for candidate in matched:
+            if candidate.digest is None:
+                candidate.digest = self.calculate_md5(candidate.path)
+                candidate.save(update_fields=["digest"])
+            if candidate.digest == file_md5:
+                return candidate.path
+        return None
+
+    @staticmethod
+    def _media_path(file_path: str) -> str:
+        return (
+            file_path
+            if MEDIA_URL.lstrip("/") in file_path
+            else MEDIA_URL.lstrip("/") + file_path
+        )
 
-    def add_file_hash(self, file_path: str, file_md5: str) -> None:
+    def add_file_hash(
+        self,
+        file_path: str,
+        file_md5: str | None,
+        content_type: str | None = None,
+        content_id: int | None = None,
+        size: int | None = None,
+        fingerprint: str | None = None,
+    ) -> None:
         """
-        This is adding the itself file and him a cache to the hash
-        :param str file_md5: name from hash.
+        This is adding the itself file and him a cache to the hash.
+        When the content is given, the file is added to the index 'ContentFileHashModel' too.
+        :param str file_md5: name from hash or None (the MD5 is calculated by the check which will need it).
         :param str file_path: This path to the file's source
+        :param str content_type: 'video' or 'audio'
+        :param int content_id: Index of the content which has this file.
+        :param int size: Size of the file or None (the size is got from the file).
+        :param str fingerprint: The fingerprint of the file ('calculate_fingerprint') or None.
         :return:
         """
-        self.hash_map[file_md5] = file_path
+        if file_md5 is not None:
+            self.hash_map[file_md5] = file_path
+        if content_type is None or content_id is None:
+            return
+        try:
+            ContentFileHashModel.objects.update_or_create(
+                content_type=content_type,
+                content_id=content_id,
+                defaults={
+                    "digest": file_md5,
+                    "fingerprint": fingerprint,
+                    "size": size if size is not None else os.path.getsize(file_path),
+                    "path": file_path,
+                },
+            )
+        except Exception as error:
+            log.error(
+                "%s: Error => %s"
+                % (
+                    FileDuplicateChecker.__class__.__name__
+                    + "."
+                    + self.add_file_hash.__name__,
+                    error.args[0] if error.args else error,
+                )
+            )
 
     def clear_cache(self) -> None:
         self.hash_map.clear()
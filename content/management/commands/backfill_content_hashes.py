@@ -0,0 +1,124 @@
+"""
+content/management/commands/backfill_content_hashes.py
+Fill the index 'ContentFileHashModel' by the files of the existing contents.
+The new uploads are added to the index by the upload's tasks ('add_file_hash'), this command is run once \
+for the files which were uploaded before the index.
+The fingerprint (three blocks) of each file is saved. The whole file's MD5 is calculated by the duplicate's \
+check when it's needed, or by '--digest' now.
+```bash
+python manage.py backfill_content_hashes --batch-size 200
+python manage.py backfill_content_hashes --rehash --digest
+```
+"""
+
+import logging
+import os
+from typing import List
+
+from django.core.management.base import BaseCommand
+
+from content.file_validator import FileDuplicateChecker
+from content.models import ContentFileHashModel
+from content.models_content_files import AudioContentModel, VideoContentModel
+from logs import configure_logging
+from project.settings import MEDIA_URL
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+# '{< content_type >: (< model >, < field of the file >)}'
+CONTENT_FILES = {
+    "video": (VideoContentModel, "video_path"),
+    "audio": (AudioContentModel, "audio_path"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Add the files of the existing video and audio contents to the index of "
+        "the files' hashes (the duplicate's checking). Run it from the project's root."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Quantity of the index's lines into one insert.",
+        )
+        parser.add_argument(
+            "--digest",
+            action="store_true",
+            help="Calculate the MD5 of the whole file too (all bytes are read).",
+        )
+        parser.add_argument(
+            "--rehash",
+            action="store_true",
+            help="Hash the files which are into the index already.",
+        )
+
+    def handle(self, *args, **options):
+        checker = FileDuplicateChecker()
+        batch_size = options["batch_size"]
+        total = {"indexed": 0, "skipped": 0, "missing": 0}
+        for content_type, (model, field_name) in CONTENT_FILES.items():
+            indexed = set()
+            if not options["rehash"]:
+                indexed = set(
+                    ContentFileHashModel.objects.filter(
+                        content_type=content_type
+                    ).values_list("content_id", flat=True)
+                )
+            batch: List[ContentFileHashModel] = []
+            rows = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{field_name + "__isnull": True})
+                .values_list("id", field_name)
+                .iterator(chunk_size=batch_size)
+            )
+            for content_id, path in rows:
+                if content_id in indexed:
+                    total["skipped"] += 1
+                    continue
+                path = (
+                    path
+                    if MEDIA_URL.lstrip("/") in path
+                    else MEDIA_URL.lstrip("/") + path
+                )
+                if not os.path.isfile(path):
+                    total["missing"] += 1
+                    log.info(f"File of {content_type} {content_id} not found: {path}")
+                    continue
+                size = os.path.getsize(path)
+                digest = checker.calculate_md5(path) if options["digest"] else None
+                batch.append(
+                    ContentFileHashModel(
+                        digest=digest,
+                        fingerprint=checker.calculate_fingerprint(path, size),
+                        size=size,
+                        path=path,
+                        content_type=content_type,
+                        content_id=content_id,
+                    )
+                )
+                if len(batch) >= batch_size:
+                    total["indexed"] += self._save(batch)
+                    batch = []
+            if batch:
+                total["indexed"] += self._save(batch)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Indexed: %(indexed)s, skipped: %(skipped)s, missing files: %(missing)s"
+                % total
+            )
+        )
+
+    @staticmethod
+    def _save(batch: List[ContentFileHashModel]) -> int:
+        ContentFileHashModel.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=["content_type", "content_id"],
+            update_fields=["digest", "fingerprint", "size", "path"],
+        )
+        return len(batch)
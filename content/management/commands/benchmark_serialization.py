@@ -0,0 +1,167 @@
+"""
+content/management/commands/benchmark_serialization.py
+Compare the encoding of the cache's entries and of the response's body ('content/serialization.py') \
+with the stdlib 'json'. The timing is not checked by the tests (it depends on the machine), it's checked here.
+'--page' - compare the serializers of the page's contents too ('FastContentSerializer' with \
+'ContentPolymorphicSerializer'), by the contents of this page from the db.
+```bash
+python manage.py benchmark_serialization --number 20 --repeat 3
+python manage.py benchmark_serialization --page 2
+```
+"""
+
+import json
+import logging
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from content.serialization import HAS_MSGPACK, HAS_ORJSON, json_dumps, pack, unpack
+from logs import configure_logging
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+
+def sample_entry(pages: int = 20, contents: int = 20) -> dict:
+    """
+    :param int pages: Quantity of the pages.
+    :param int contents: Quantity of the contents of each page.
+    :return: The cache's entry of the pages' list.
+    """
+    return {
+        "data": {
+            "count": pages,
+            "next": None,
+            "previous": None,
+            "results": [
+                {
+                    "id": index,
+                    "contents": [
+                        {
+                            "id": index * contents + number,
+                            "title": "Content %s" % number,
+                            "counter": 1234,
+                            "order": number,
+                            "content_type": "video",
+                            "is_active": True,
+                            "video_path": "/media/2025/08/27/video/my_video_%s.mp4" % number,
+                            "video_url": None,
+                            "subtitles_url": None,
+                        }
+                        for number in range(contents)
+                    ],
+                    "created_at": "2025-08-27T16:39:30.072225+07:00",
+                    "updated_at": "2025-08-27T16:39:30.073226+07:00",
+                    "url": "http://dasdas.ru/freelance_django/",
+                    "title": "Страница %s" % index,
+                    "text": "Это текст страницы. " * 50,
+                }
+                for index in range(pages)
+            ],
+        },
+        "tags": {"page:%s" % index: "1756290000000000000-1a2b3c4d" for index in range(pages)},
+        "expires_at": 1756290000.0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the time and the size of the compact encoding (orjson, msgpack) "
+        "with the stdlib 'json'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number", type=int, default=20, help="Quantity of the calls into one timing."
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Quantity of the timings (the best is shown)."
+        )
+        parser.add_argument(
+            "--page",
+            type=int,
+            default=None,
+            help="The page whose contents are serialized by the fast and by the model's serializer.",
+        )
+
+    def handle(self, *args, **options):
+        entry = sample_entry()
+
+        def best(function) -> float:
+            return min(
+                timeit.repeat(function, number=options["number"], repeat=options["repeat"])
+            )
+
+        rows = [
+            (
+                "entry (pack/unpack)",
+                best(lambda: json.loads(json.dumps(entry))),
+                best(lambda: unpack(pack(entry))),
+                len(json.dumps(entry).encode("utf-8")),
+                len(pack(entry)),
+            ),
+            (
+                "body (json_dumps)",
+                best(lambda: json.dumps(entry, ensure_ascii=False).encode("utf-8")),
+                best(lambda: json_dumps(entry)),
+                len(json.dumps(entry, ensure_ascii=False).encode("utf-8")),
+                len(json_dumps(entry)),
+            ),
+        ]
+        if options["page"] is not None:
+            rows.append(self._contents_row(options["page"], best))
+        self.stdout.write("orjson: %s, msgpack: %s" % (HAS_ORJSON, HAS_MSGPACK))
+        for name, slow, fast, slow_size, fast_size in rows:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    "%s: slow %.4fs / %s bytes => %.4fs / %s bytes (x%.1f)"
+                    % (name, slow, slow_size, fast, fast_size, slow / fast)
+                )
+            )
+
+    @staticmethod
+    def _contents_row(page_id: int, best) -> tuple:
+        """
+        :param int page_id: The page's index.
+        :param best: The timing's function.
+        :return: '(name, slow, fast, slow_size, fast_size)' The model's serializer and the fast serializer.
+        """
+        from content.content_api.serializers import (
+            ContentPolymorphicSerializer,
+            fast_audio_serializer,
+            fast_video_serializer,
+        )
+        from content.models_content_files import AudioContentModel, VideoContentModel
+
+        contents = [
+            *VideoContentModel.objects.filter(page_id=page_id),
+            *AudioContentModel.objects.filter(page_id=page_id),
+        ]
+        contents.sort(key=lambda content: content.order)
+        video_rows = [
+            *VideoContentModel.objects.filter(page_id=page_id).values(
+                *fast_video_serializer.fields
+            )
+        ]
+        audio_rows = [
+            *AudioContentModel.objects.filter(page_id=page_id).values(
+                *fast_audio_serializer.fields
+            )
+        ]
+
+        def slow():
+            return ContentPolymorphicSerializer(contents, many=True).data
+
+        def fast():
+            return fast_video_serializer.to_representation_many(
+                video_rows
+            ) + fast_audio_serializer.to_representation_many(audio_rows)
+
+        return (
+            "contents of the page %s (%s)" % (page_id, len(contents)),
+            best(slow),
+            best(fast),
+            len(json_dumps(slow())),
+            len(json_dumps(fast())),
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0010_audiocontentmodel_upload_status_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pagemodel",
+            index=models.Index(
+                fields=["title", "id"], name="content_page_title_id_idx"
+            ),
+        ),
+    ]
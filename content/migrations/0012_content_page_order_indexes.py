@@ -0,0 +1,41 @@
+# Generated by Django 4.2.20 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0011_pagemodel_content_page_title_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="audiocontentmodel",
+            index=models.Index(
+                fields=["page", "order"], name="content_audio_page_order_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="audiocontentmodel",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["page", "order"],
+                name="content_audio_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="videocontentmodel",
+            index=models.Index(
+                fields=["page", "order"], name="content_video_page_order_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="videocontentmodel",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["page", "order"],
+                name="content_video_active_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0012_content_page_order_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChunkedUploadModel",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "content_type",
+                    models.CharField(
+                        choices=[("video", "Video"), ("audio", "Audio")],
+                        help_text="Content type",
+                        max_length=10,
+                        verbose_name="Content type",
+                    ),
+                ),
+                (
+                    "content_id",
+                    models.PositiveBigIntegerField(
+                        help_text="Index of the video or of the audio",
+                        verbose_name="Content",
+                    ),
+                ),
+                (
+                    "filename",
+                    models.CharField(
+                        help_text="Name of the file",
+                        max_length=255,
+                        verbose_name="File name",
+                    ),
+                ),
+                (
+                    "size",
+                    models.PositiveBigIntegerField(
+                        help_text="Size of the whole file (bytes)", verbose_name="Size"
+                    ),
+                ),
+                (
+                    "offset",
+                    models.PositiveBigIntegerField(
+                        default=0, help_text="Committed bytes", verbose_name="Offset"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("uploading", "Uploading"), ("completed", "Completed")],
+                        default="uploading",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Chunked upload",
+                "verbose_name_plural": "Chunked uploads",
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.20 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_chunkeduploadmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentFileHashModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('digest', models.CharField(help_text="MD5's hex of the file", max_length=32, verbose_name='MD5')),
+                ('size', models.PositiveBigIntegerField(help_text='Size of the file (bytes)', verbose_name='Size')),
+                ('path', models.CharField(help_text="Пример: 'media/2025/07/12/video/your-file.mp4'", max_length=255, verbose_name='Path')),
+                ('content_type', models.CharField(choices=[('video', 'Video'), ('audio', 'Audio')], help_text='Content type', max_length=10, verbose_name='Content type')),
+                ('content_id', models.PositiveBigIntegerField(help_text='Index of the video or of the audio', verbose_name='Content')),
+            ],
+            options={
+                'verbose_name': "Content file's hash",
+                'verbose_name_plural': "Content files' hashes",
+                'indexes': [models.Index(fields=['digest', 'size'], name='content_file_hash_digest_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='contentfilehashmodel',
+            constraint=models.UniqueConstraint(fields=('content_type', 'content_id'), name='content_file_hash_content_uniq'),
+        ),
+    ]
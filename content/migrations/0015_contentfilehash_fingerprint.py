@@ -0,0 +1,27 @@
+# Generated by Django 4.2.20 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_contentfilehashmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentfilehashmodel',
+            name='fingerprint',
+            field=models.CharField(blank=True, help_text="MD5's hex of the head's, middle's and tail's blocks of the file", max_length=32, null=True, verbose_name='Fingerprint'),
+        ),
+        migrations.AlterField(
+            model_name='contentfilehashmodel',
+            name='digest',
+            field=models.CharField(blank=True, help_text="MD5's hex of the file", max_length=32, null=True, verbose_name='MD5'),
+        ),
+        migrations.AddIndex(
+            model_name='contentfilehashmodel',
+            index=models.Index(fields=['size', 'fingerprint'], name='content_file_hash_size_idx'),
+        ),
+    ]
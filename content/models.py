@@ -2,6 +2,8 @@
 content/models.py
 """
 
+import uuid
+
 from django.db import models
 from django.core import validators
 from django.utils.translation import gettext_lazy as _
@@ -48,6 +50,10 @@ class PageModel(models.Model):
         verbose_name = _("Page")
         verbose_name_plural = _("Pages")
         ordering = ["title"]
+        indexes = [
+            # The seek of the cursor's pagination ('TitleCursorPagination')
+            models.Index(fields=["title", "id"], name="content_page_title_id_idx"),
+        ]
 
     def __str__(self):
         return "%s" % self.title
@@ -98,3 +104,115 @@ class ContentFileBaseModel(models.Model):
 
     def __str__(self):
         return "%s" % self.title
+
+
+class ChunkedUploadModel(models.Model):
+    """
+    The resumable upload of the content's file (see 'content/uploads.py').
+    The chunks are appended to the staging file. 'offset' is the quantity of the committed bytes, \
+    the interrupted upload is resumed from it.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    content_type = models.CharField(
+        max_length=10,
+        choices=CONTENT_TYPES_CHOICES,
+        verbose_name=_("Content type"),
+        help_text=_("Content type"),
+    )
+    content_id = models.PositiveBigIntegerField(
+        verbose_name=_("Content"), help_text=_("Index of the video or of the audio")
+    )
+    filename = models.CharField(
+        max_length=255, verbose_name=_("File name"), help_text=_("Name of the file")
+    )
+    size = models.PositiveBigIntegerField(
+        verbose_name=_("Size"), help_text=_("Size of the whole file (bytes)")
+    )
+    offset = models.PositiveBigIntegerField(
+        default=0, verbose_name=_("Offset"), help_text=_("Committed bytes")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ("uploading", "Uploading"),
+            ("completed", "Completed"),
+        ],
+        default="uploading",
+        verbose_name=_("Status"),
+    )
+
+    class Meta:
+        verbose_name = _("Chunked upload")
+        verbose_name_plural = _("Chunked uploads")
+
+    def __str__(self):
+        return "%s (%s/%s)" % (self.filename, self.offset, self.size)
+
+
+class ContentFileHashModel(models.Model):
+    """
+    The index of the content's files by their MD5 (see 'FileDuplicateChecker').
+    The line is added when the file is uploaded ('add_file_hash'), the existing files are added \
+    by the command 'python manage.py backfill_content_hashes'.
+    The candidates of the duplicate are narrowed by the size, then by 'fingerprint' (MD5 of the head's, \
+    middle's and tail's blocks), and only the rest is compared by the whole file's MD5. 'fingerprint' and \
+    'digest' are calculated once and are saved for the next checks ('digest' is None until it's needed).
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    digest = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True,
+        verbose_name=_("MD5"),
+        help_text=_("MD5's hex of the file"),
+    )
+    fingerprint = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True,
+        verbose_name=_("Fingerprint"),
+        help_text=_("MD5's hex of the head's, middle's and tail's blocks of the file"),
+    )
+    size = models.PositiveBigIntegerField(
+        verbose_name=_("Size"), help_text=_("Size of the file (bytes)")
+    )
+    path = models.CharField(
+        max_length=255,
+        verbose_name=_("Path"),
+        help_text=_("Пример: 'media/2025/07/12/video/your-file.mp4'"),
+    )
+    content_type = models.CharField(
+        max_length=10,
+        choices=CONTENT_TYPES_CHOICES,
+        verbose_name=_("Content type"),
+        help_text=_("Content type"),
+    )
+    content_id = models.PositiveBigIntegerField(
+        verbose_name=_("Content"), help_text=_("Index of the video or of the audio")
+    )
+
+    class Meta:
+        verbose_name = _("Content file's hash")
+        verbose_name_plural = _("Content files' hashes")
+        constraints = [
+            # One file for the one content
+            models.UniqueConstraint(
+                fields=["content_type", "content_id"],
+                name="content_file_hash_content_uniq",
+            ),
+        ]
+        indexes = [
+            # The lookup of the duplicate by the MD5
+            models.Index(fields=["digest", "size"], name="content_file_hash_digest_idx"),
+            # The candidates of the duplicate by the size and the fingerprint
+            models.Index(
+                fields=["size", "fingerprint"], name="content_file_hash_size_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return "%s (%s)" % (self.path, self.digest)
@@ -2,9 +2,7 @@
 content/models_content_files.py
 """
 
-import asyncio
 import os
-import threading
 import uuid
 import logging
 from datetime import datetime
@@ -12,6 +10,7 @@ from datetime import datetime
 from django.db import models, connections, transaction
 from django.core import validators
 from django.utils.translation import gettext_lazy as _
+from content.background import background
 from content.models import ContentFileBaseModel
 from content.transactions import transaction_update
 from logs import configure_logging
@@ -26,12 +25,6 @@ log = logging.getLogger(__name__)
 configure_logging(logging.INFO)
 
 
-def loop_upload(tusk_func, **kwargs):
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(asyncio.to_thread(tusk_func, **kwargs))
-
-
 def generate_filepath(instance, filename):
     from pathlib import Path
     from project.settings import MEDIA_ROOT
@@ -107,6 +100,7 @@ class VideoContentModel(ContentFileBaseModel):
         :param kwargs:
         :return:
         """
+        from content.file_validator import write_with_md5
         from content.tasks import task_process_video_upload
 
         self.content_type = "video"
@@ -125,11 +119,8 @@ class VideoContentModel(ContentFileBaseModel):
                 "file_name": file_name,
             }
 
-            threading.Thread(
-                target=loop_upload,
-                args=(task_process_video_upload,),
-                kwargs=kwargs_video,
-            ).start()
+            # 'timeout=None' - the upload is not rejected, it waits the free place
+            background.submit(task_process_video_upload, kwargs=kwargs_video, timeout=None)
 
         if hasattr(self, "video_path") and self.upload_status != "completed":
             self.upload_status = "processing"
@@ -148,17 +139,11 @@ class VideoContentModel(ContentFileBaseModel):
                     "temp_path": temp_path,
                     "file_name": file_name,
                 }
-                # create the temporary file
-                read_bool = True
+                # create the temporary file. The MD5 is calculated by the same read
                 with open(temp_path, "wb") as f:
-                    while read_bool:
-                        chunk = self._video_file.read(10 * 1024 * 1024)
-                        if chunk:
-                            f.write(chunk)
-                        else:
-                            read_bool = False
-
-                threading.Thread(target=loop_upload, args=(task_process_video_upload,), kwargs=kwargs_video).start()
+                    kwargs_video["file_md5"] = write_with_md5(self._video_file, f)
+
+                background.submit(task_process_video_upload, kwargs=kwargs_video, timeout=None)
             except Exception as error:
                 log.error("%s: ERROR => %s", (VideoContentModel.__class__.__name__
                                                   + "."
@@ -221,6 +206,16 @@ class VideoContentModel(ContentFileBaseModel):
     class Meta:
         verbose_name = _("Video Content")
         verbose_name_plural = _("Video Contents")
+        indexes = [
+            # The contents are loaded by the page and are sorted by 'order'
+            models.Index(fields=["page", "order"], name="content_video_page_order_idx"),
+            # '?is_active=true' - only the active rows are into the index
+            models.Index(
+                fields=["page", "order"],
+                condition=models.Q(is_active=True),
+                name="content_video_active_idx",
+            ),
+        ]
 
 
 class AudioContentModel(ContentFileBaseModel):
@@ -278,6 +273,7 @@ class AudioContentModel(ContentFileBaseModel):
         :param kwargs:
         :return:
         """
+        from content.file_validator import write_with_md5
         from content.tasks import task_process_audio_upload
 
         self.content_type = "video"
@@ -296,11 +292,7 @@ class AudioContentModel(ContentFileBaseModel):
                     "file_name": file_name,
                 }
 
-                threading.Thread(
-                    target=loop_upload,
-                    args=(task_process_audio_upload,),
-                    kwargs=kwargs_audio,
-                ).start()
+                background.submit(task_process_audio_upload, kwargs=kwargs_audio, timeout=None)
             if hasattr(self, "audio_path") and self.upload_status != "completed":
                 self.upload_status = "processing"
                 self.set_audio_file(self.audio_path)
@@ -315,20 +307,14 @@ class AudioContentModel(ContentFileBaseModel):
                 # Temporary file
                 temp_path = f'{MEDIA_URL.lstrip("/")}{file_name.split("/video/")[-1]}'
                 kwargs_audio = {
-                    "video_id": self.id,
+                    "audio_id": self.id,
                     "temp_path": temp_path,
                     "file_name": file_name,
                 }
-                # create the temporary file
-                read_bool = True
+                # create the temporary file. The MD5 is calculated by the same read
                 with open(temp_path, "wb") as f:
-                    while read_bool:
-                        chunk = self._audio_file.read(10 * 1024 * 1024)
-                        if chunk:
-                            f.write(chunk)
-                        else:
-                            read_bool = False
-                threading.Thread(target=loop_upload,args=(task_process_audio_upload,), kwargs=kwargs_audio).start()
+                    kwargs_audio["file_md5"] = write_with_md5(self._audio_file, f)
+                background.submit(task_process_audio_upload, kwargs=kwargs_audio, timeout=None)
         except Exception as error:
             log.error("%s: ERROR => %s", (AudioContentModel.__class__.__name__
                                           + "."
@@ -389,3 +375,13 @@ class AudioContentModel(ContentFileBaseModel):
     class Meta:
         verbose_name = _("Audio Content")
         verbose_name_plural = _("Audio Contents")
+        indexes = [
+            # The contents are loaded by the page and are sorted by 'order'
+            models.Index(fields=["page", "order"], name="content_audio_page_order_idx"),
+            # '?is_active=true' - only the active rows are into the index
+            models.Index(
+                fields=["page", "order"],
+                condition=models.Q(is_active=True),
+                name="content_audio_active_idx",
+            ),
+        ]
@@ -0,0 +1,179 @@
+"""
+content/realtime.py
+Push of the content's updates (the 'upload_status', the counters) to the subscribers.
+The events are sent to the groups of the channel's layer ('CHANNEL_LAYERS'):
+- 'content.page.< page_id >' - all updates of the page's contents;
+- 'content.< content_type >.< content_id >' - the updates of the one content.
+The subscribers are the websocket's consumer ('content/consumers.py') and the SSE's endpoint \
+('content/< pk >/events/'). The publishers are the uploads ('transaction_update') and the counter's flush.
+```json
+{"event": "upload_status", "content_type": "video", "id": 5, "page_id": 2, "upload_status": "completed"}
+{"event": "counter", "content_type": "video", "id": 5, "page_id": 2, "counter": 17}
+```
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, Iterable, List
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from content.serialization import json_dumps
+from logs import configure_logging
+from project.settings import CONTENT_EVENTS_KEEPALIVE
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+# The handler of the consumer: 'type' = "content.event" calls 'content_event'
+EVENT_TYPE = "content.event"
+# The table of the content by its type
+CONTENT_TABLES: Dict[str, str] = {
+    "video": "content_videocontentmodel",
+    "audio": "content_audiocontentmodel",
+}
+
+
+def page_group(page_id: int | str) -> str:
+    return "content.page.%s" % page_id
+
+
+def content_group(content_type: str, content_id: int | str) -> str:
+    return "content.%s.%s" % (str(content_type).lower(), content_id)
+
+
+def groups_of_event(event: dict) -> List[str]:
+    """
+    :param dict event: The event with 'content_type', 'id' and 'page_id'.
+    :return: '["content.page.2", "content.video.5"]'
+    """
+    groups = [content_group(event["content_type"], event["id"])]
+    if event.get("page_id") is not None:
+        groups.insert(0, page_group(event["page_id"]))
+    return groups
+
+
+async def apublish(events: Iterable[dict]) -> None:
+    """
+    Send the events to their groups. Without the channel's layer, the events are skipped.
+    :param events: '[{"event": "counter", "content_type": "video", "id": 5, "page_id": 2, ...}, ...]'
+    :return: None
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for event in events:
+        for group in groups_of_event(event):
+            try:
+                await channel_layer.group_send(
+                    group, {"type": EVENT_TYPE, "event": event}
+                )
+            except Exception as error:
+                log.error(
+                    "%s: Error => %s"
+                    % (apublish.__name__, error.args[0] if error.args else error)
+                )
+
+
+def publish(events: Iterable[dict]) -> None:
+    """
+    Sync version of 'apublish' (the celery's tasks, the background's executor, 'on_commit').
+    :param events: '[{"event": "upload_status", ...}, ...]'
+    :return: None
+    """
+    events = list(events)
+    if not events:
+        return
+    try:
+        async_to_sync(apublish)(events)
+    except Exception as error:
+        log.error(
+            "%s: Error => %s" % (publish.__name__, error.args[0] if error.args else error)
+        )
+
+
+async def aiter_sse(
+    groups: List[str], keepalive: float = CONTENT_EVENTS_KEEPALIVE
+) -> AsyncIterator[bytes]:
+    """
+    The body of the SSE's response. The own channel is subscribed to the groups while the client is connected.
+    :param groups: '["content.page.2"]'
+    :param float keepalive: The comment is sent when there were not events during this time (seconds).
+    :return: 'event: counter\\ndata: {"event": "counter", ...}\\n\\n'
+    """
+    channel_layer = get_channel_layer()
+    channel_name = await channel_layer.new_channel()
+    for group in groups:
+        await channel_layer.group_add(group, channel_name)
+    try:
+        # The proxy sends the headers to the client now
+        yield b": connected\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    channel_layer.receive(channel_name), timeout=keepalive
+                )
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            event = message.get("event") or {}
+            yield b"event: %s\ndata: %s\n\n" % (
+                str(event.get("event", "message")).encode("utf-8"),
+                json_dumps(event),
+            )
+    finally:
+        for group in groups:
+            await channel_layer.group_discard(group, channel_name)
+
+
+def upload_status_event(
+    table_db: str, index: int, page_id: int | None, upload_status: str
+) -> dict:
+    """
+    :param str table_db: 'content_videocontentmodel'
+    :param int index: The content's index.
+    :param int page_id: The page of the content.
+    :param str upload_status: 'processing', 'completed' or 'failed'
+    :return: '{"event": "upload_status", "content_type": "video", "id": 5, "page_id": 2, ...}'
+    """
+    content_type = next(
+        (kind for kind, table in CONTENT_TABLES.items() if table == table_db), table_db
+    )
+    return {
+        "event": "upload_status",
+        "content_type": content_type,
+        "id": index,
+        "page_id": page_id,
+        "upload_status": upload_status,
+    }
+
+
+def publish_counters(content_keys: Iterable) -> None:
+    """
+    Send the new counters (from the db) of the flushed contents.
+    :param content_keys: '[("video", 5), ("audio", 3)]' The keys of the flushed deltas.
+    :return: None
+    """
+    from content.models_content_files import AudioContentModel, VideoContentModel
+
+    models = {"video": VideoContentModel, "audio": AudioContentModel}
+    ids_by_type: Dict[str, List[int]] = {}
+    for content_type, index in content_keys:
+        ids_by_type.setdefault(content_type, []).append(index)
+    events: List[dict] = []
+    for content_type, ids in ids_by_type.items():
+        model = models.get(content_type)
+        if model is None:
+            continue
+        for row in model.objects.filter(pk__in=ids).values("id", "page_id", "counter"):
+            events.append(
+                {
+                    "event": "counter",
+                    "content_type": content_type,
+                    "id": row["id"],
+                    "page_id": row["page_id"],
+                    "counter": row["counter"],
+                }
+            )
+    publish(events)
@@ -0,0 +1,21 @@
+"""
+content/routing.py
+The websocket's routes of the content.
+"""
+
+from django.urls import path, re_path
+
+from content.consumers import ContentUpdatesConsumer
+
+websocket_urlpatterns = [
+    path(
+        "ws/content/page/<int:page_id>/",
+        ContentUpdatesConsumer.as_asgi(),
+        name="ws_content_page",
+    ),
+    re_path(
+        r"^ws/content/(?P<content_type>video|audio)/(?P<content_id>\d+)/$",
+        ContentUpdatesConsumer.as_asgi(),
+        name="ws_content_item",
+    ),
+]
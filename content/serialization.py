@@ -0,0 +1,75 @@
+"""
+content/serialization.py
+Fast encoding of the API's data and of the cache's entries.
+'orjson' and 'msgpack' are into the requirements, but they are optional. Without them, the stdlib 'json' is used.
+- 'json_dumps'/'json_loads' - the compact JSON (bytes);
+- 'pack'/'unpack' - the compact encoding of the cache's entries (msgpack, or JSON without msgpack).
+'unpack' reads both encodings, so the entries of the old format are still readable.
+"""
+
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+HAS_ORJSON = orjson is not None
+HAS_MSGPACK = msgpack is not None
+
+
+def json_dumps(data: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+    """
+    :param data: The data.
+    :param default: The encoder of the unknown types (for example: 'DjangoJSONEncoder().default').
+    :return: The compact JSON ('ensure_ascii=False').
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=default)
+    return json.dumps(
+        data, default=default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def json_loads(body: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def msgpack_dumps(data: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+    return msgpack.packb(data, default=default, use_bin_type=True)
+
+
+def msgpack_loads(body: bytes) -> Any:
+    return msgpack.unpackb(body, raw=False)
+
+
+def pack(data: dict) -> bytes:
+    """
+    The entry for the cache.
+    :param dict data: The entry (it's the dict always).
+    :return: msgpack's bytes or JSON's bytes (without msgpack).
+    """
+    if msgpack is not None:
+        return msgpack_dumps(data)
+    return json_dumps(data)
+
+
+def unpack(body: bytes | str) -> Any:
+    """
+    :param body: The bytes from 'pack' or the JSON's string of the old entry.
+    :return: The entry.
+    """
+    if isinstance(body, str):
+        return json_loads(body)
+    # The JSON's object is started by '{' (or by the space), the msgpack's map is started by 0x80-0x8f, 0xde, 0xdf
+    if msgpack is not None and body[:1] and body[0] not in b"{ \t\r\n":
+        return msgpack_loads(body)
+    return json_loads(body)
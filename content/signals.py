@@ -0,0 +1,33 @@
+"""
+content/signals.py
+Invalidation of the cached API's responses when pages or contents are changed.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from content.cache_tags import PAGES_LIST_TAG, bump_tags, content_tag, page_tag
+from content.models import PageModel
+from content.models_content_files import AudioContentModel, VideoContentModel
+
+
+@receiver(post_save, sender=PageModel)
+@receiver(post_delete, sender=PageModel)
+def invalidate_page(sender, instance: PageModel, **kwargs) -> None:
+    tags = [page_tag(instance.pk), PAGES_LIST_TAG]
+    transaction.on_commit(lambda: bump_tags(tags))
+
+
+@receiver(post_save, sender=VideoContentModel)
+@receiver(post_delete, sender=VideoContentModel)
+@receiver(post_save, sender=AudioContentModel)
+@receiver(post_delete, sender=AudioContentModel)
+def invalidate_content(
+    sender, instance: VideoContentModel | AudioContentModel, **kwargs
+) -> None:
+    tags = [
+        content_tag(instance.content_type, instance.pk),
+        page_tag(instance.page_id),
+    ]
+    transaction.on_commit(lambda: bump_tags(tags))
@@ -3,25 +3,40 @@ content/tasks.py
 """
 
 import os
+import shutil
 import logging
 from typing import List
 
 from celery.worker.control import time_limit
-from django.core.files.storage import default_storage
 from django.db import transaction, connections
 from django.db.models import F
 from celery import shared_task
+from celery.signals import worker_process_shutdown, worker_shutdown
 
+from content.background import background
 from content.views import fduplicate
 from content.models_content_files import VideoContentModel, AudioContentModel
 from project.settings import MEDIA_URL
 from logs import configure_logging
-from content.transactions import transaction_update, transaction_get
+from content.transactions import (
+    transaction_update,
+    transaction_get,
+)
 
 log = logging.getLogger(__name__)
 configure_logging(logging.INFO)
 
 
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def shutdown_background(**kwargs) -> None:
+    """
+    The explicit drain of the background's work when the worker (or its child process) stops.
+    The drain's timeout works here without the exit's hook of 'content/background.py'.
+    """
+    background.shutdown()
+
+
 @shared_task(
     name=__name__,
     bind=False,
@@ -29,78 +44,53 @@ configure_logging(logging.INFO)
 )
 def increment_content_counter(data_numbers_list: List[dict]) -> None:
     """
-    The whole difficulty is that we get both pagination-based page lists and a single page - from the database and
-     from the cache. Therefore, the structure is slightly different
-    :param data_numbers_list:
+    DEPRECATED. The views don't send this task now - they add the counters into 'counter_aggregator' \
+    ('content/counters.py'), the db is updated by 'flush_content_counters'.
+    It's kept for the messages which are queued into the broker already (they are sent by the old version). \
+    These views are added into the same aggregator, so they are not lost and are not written twice.
+    :param data_numbers_list: The pagination-based page list or the single page (from the db or the cache).
     :return:
     """
-    contents_views: list = [VideoContentModel.objects, AudioContentModel.objects]
-    list_of_content_names: List[str] = ["audio", "video"]
+    from content.counters import counter_aggregator, flatten_content_keys
+
     message = "%s: " % increment_content_counter.__name__
+    try:
+        counter_aggregator.add(flatten_content_keys(data_numbers_list))
+    except Exception as error:
+        log.error(message + f"Error => {error.args[0] if error.args else error}")
+
 
-    def handler_of_counters_of_models(
-        view: dict, model_list: list, list_content_name: List[str]
-    ) -> None:
-        for one_model in model_list:
-            for content_name in list_content_name:
-                if view.__getitem__("content_type").lower() == content_name:
-                    one_model.filter(
-                        id=view.__getitem__("id"),
-                        content_type=view.__getitem__("content_type"),
-                    ).update(counter=F("counter") + 1)
+@shared_task(
+    name=f"{__name__}.flush_content_counters",
+    bind=False,
+    ignore_result=True,
+)
+def flush_content_counters() -> None:
+    """
+    Move the view-counters which were collected by 'counter_aggregator' to the db.
+    One call of the task replaces all the requests's tasks of the interval.
+    :return:
+    """
+    from content.counters import counter_aggregator
+    from content.realtime import publish_counters
 
+    message = "%s: " % flush_content_counters.__name__
     try:
-        with transaction.atomic():
-            for content_ids in data_numbers_list:
-                # This log don't touch!
-                log.info(
-                    message
-                    + "'content_ids' Type: %s Len: %s Total len: %s"
-                    % (
-                        type(content_ids),
-                        (
-                            content_ids.__dict__
-                            if isinstance(content_ids, dict)
-                            else f"--XXX'content_ids'--{str(content_ids)}"
-                        ),
-                        len(data_numbers_list),
-                    )
-                )
-
-                result = [
-                    (
-                        handler_of_counters_of_models(
-                            content_ids, contents_views, list_of_content_names
-                        )
-                        if isinstance(content_ids, dict)
-                        else [
-                            (
-                                handler_of_counters_of_models(
-                                    content_id, contents_views, list_of_content_names
-                                )
-                                if isinstance(content_id, dict)
-                                else [
-                                    handler_of_counters_of_models(
-                                        v, contents_views, list_of_content_names
-                                    )
-                                    for v in content_id
-                                ]
-                            )
-                            for content_id in content_ids
-                        ]
-                    )
-                ]
-                log.info(message + f"RESULT: {str(result)}")
-        return
+        deltas = counter_aggregator.flush()
+        log.info(message + f"Flushed the counters of {len(deltas)} contents")
+        # THE SUBSCRIBERS. The new counters are pushed (websocket, SSE)
+        publish_counters(deltas.keys())
     except Exception as error:
-        log.error(message + f"Error => {error.args[0]}")
-        print(message + error.args[0])
-        return
+        log.error(message + f"Error => {error.args[0] if error.args else error}")
 
 
-def task_process_video_upload(video_id, temp_path, file_name) -> None:
+def task_process_video_upload(
+    video_id, temp_path, file_name, file_md5: str | None = None
+) -> None:
     """
     Background task for loading the video file
+    :param str file_md5: The MD5 which was calculated when the temporary file was written or None. \
+        Without it, the file is read for the MD5 only when other file has the same size and fingerprint.
     """
     message = "%s: " % task_process_video_upload.__name__
     try:
@@ -119,15 +109,31 @@ def task_process_video_upload(video_id, temp_path, file_name) -> None:
             else "media/" + video["video_path"]
         )
 
+        file_size = os.path.getsize(temp_path)
+        # The cheap fingerprint (three blocks). The whole MD5 is read only for the same fingerprint
+        fingerprint = fduplicate.calculate_fingerprint(temp_path, file_size)
         # check the duplacation
         duplicate_path = fduplicate.check_duplicate(
-            file_name, model_class=VideoContentModel, field_name_list=["video_path"]
+            temp_path,
+            model_class=VideoContentModel,
+            field_name_list=["video_path"],
+            file_md5=file_md5,
+            size=file_size,
+            fingerprint=fingerprint,
         )
 
         if duplicate_path:
             # If file exists we use the old file (file previously uploaded).
-            kwargs_dupl = {"video_path": duplicate_path}
+            kwargs_dupl = {"video_path": duplicate_path, "upload_status": "completed"}
             transaction_update("content_videocontentmodel", video["id"], **kwargs_dupl)
+            fduplicate.add_file_hash(
+                duplicate_path,
+                file_md5,
+                "video",
+                video["id"],
+                size=file_size,
+                fingerprint=fingerprint,
+            )
 
             # remove the temporary file
             os.remove(temp_path) if os.path.exists(temp_path) else None
@@ -139,19 +145,13 @@ def task_process_video_upload(video_id, temp_path, file_name) -> None:
             main_path = (
                 main_path.split(folder)[0] + f"{folder}/" + file_name_0
                 if file_name_1 not in file_name_0
+                # The name with the unique prefix ('< upload's id >_film.mp4') is kept
+                and not file_name_1.endswith("_" + file_name_0)
                 else main_path
             )
-            # create the basis file.
-            read_bool = True
-            with open(temp_path, "rb") as source:
-                with open(main_path, "wb") as destination:
-                    # updating the connection's state
-                    while read_bool:
-                        chunk = source.read(10 * 1024 * 1024)
-                        if chunk:
-                            destination.write(chunk)
-                        else:
-                            read_bool = False
+            # create the basis file. The temporary file is moved (renamed), it's not read again
+            os.makedirs(os.path.dirname(main_path), exist_ok=True)
+            shutil.move(temp_path, main_path)
             kwargs_new = {
                 "video_path": MEDIA_URL.lstrip("/")
                 + main_path.split(MEDIA_URL.lstrip("/"))[-1],
@@ -160,10 +160,14 @@ def task_process_video_upload(video_id, temp_path, file_name) -> None:
             # Connection to the db
             transaction_update("content_videocontentmodel", video["id"], **kwargs_new)
             # new file add to the cache of file's validation
-            fduplicate.add_file_hash(main_path, fduplicate.calculate_md5(main_path))
-
-            # remove the temporary file
-            os.remove(temp_path) if os.path.exists(temp_path) else None
+            fduplicate.add_file_hash(
+                main_path,
+                file_md5,
+                "video",
+                video["id"],
+                size=file_size,
+                fingerprint=fingerprint,
+            )
             log.info(f"File uploaded successfully: {main_path}")
 
     except Exception as e:
@@ -173,36 +177,56 @@ def task_process_video_upload(video_id, temp_path, file_name) -> None:
         raise
 
 
-def task_process_audio_upload(audio_id, temp_path: str, file_name: str) -> None:
+def task_process_audio_upload(
+    audio_id, temp_path: str, file_name: str, file_md5: str | None = None
+) -> None:
     """
     Background task for loading the audio file
+    :param str file_md5: The MD5 which was calculated when the temporary file was written or None. \
+        Without it, the file is read for the MD5 only when other file has the same size and fingerprint.
     """
+    message = "%s: " % task_process_audio_upload.__name__
     try:
-        message = "%s: " % task_process_video_upload.__name__
         # Check the file exists
         if not os.path.exists(temp_path):
             log.info(f"Source file not found: {temp_path}")
             raise FileNotFoundError(f"Source file not found: {temp_path}")
 
         kwargs = {"upload_status": "processing"}
-        transaction_update("content_videocontentmodel", audio_id, **kwargs)
-        audio = transaction_get("content_videocontentmodel", audio_id)
+        transaction_update("content_audiocontentmodel", audio_id, **kwargs)
+        audio = transaction_get("content_audiocontentmodel", audio_id)
         # create temporary file (in 'media/<file>')
         main_path = (
-            f"{audio["video_path"]}"
-            if MEDIA_URL.lstrip("/") in audio["video_path"]
-            else "media/" + audio["video_path"]
+            f"{audio["audio_path"]}"
+            if MEDIA_URL.lstrip("/") in audio["audio_path"]
+            else "media/" + audio["audio_path"]
         )
 
+        file_size = os.path.getsize(temp_path)
+        # The cheap fingerprint (three blocks). The whole MD5 is read only for the same fingerprint
+        fingerprint = fduplicate.calculate_fingerprint(temp_path, file_size)
         # check the duplacation
         duplicate_path = fduplicate.check_duplicate(
-            file_name, model_class=AudioContentModel, field_name_list=["audio_path"]
+            temp_path,
+            model_class=AudioContentModel,
+            field_name_list=["audio_path"],
+            file_md5=file_md5,
+            size=file_size,
+            fingerprint=fingerprint,
         )
 
         if duplicate_path:
             # If file exists we use the old file (file previously uploaded).
-            kwargs_dupl = {"video_path": duplicate_path}
+            kwargs_dupl = {"audio_path": duplicate_path, "upload_status": "completed"}
             transaction_update("content_audiocontentmodel", audio["id"], **kwargs_dupl)
+            fduplicate.add_file_hash(
+                duplicate_path,
+                file_md5,
+                "audio",
+                audio["id"],
+                size=file_size,
+                fingerprint=fingerprint,
+            )
 
             # Removing temporary file
             os.remove(temp_path) if os.path.exists(temp_path) else None
@@ -214,18 +238,13 @@ def task_process_audio_upload(audio_id, temp_path: str, file_name: str) -> None:
             main_path = (
                 main_path.split(folder)[0] + f"{folder}/" + file_name_0
                 if file_name_1 not in file_name_0
+                # The name with the unique prefix ('< upload's id >_film.mp4') is kept
+                and not file_name_1.endswith("_" + file_name_0)
                 else main_path
             )
-            # Create the basis file
-            with open(temp_path, "rb") as source:
-                with open(main_path, "wb") as destination:
-                    # updating the connection's state
-                    while read_bool:
-                        chunk = source.read(10 * 1024 * 1024)
-                        if chunk:
-                            destination.write(chunk)
-                        else:
-                            read_bool = False
+            # Create the basis file. The temporary file is moved (renamed), it's not read again
+            os.makedirs(os.path.dirname(main_path), exist_ok=True)
+            shutil.move(temp_path, main_path)
 
             kwargs_new = {
                 "audio_path": MEDIA_URL.lstrip("/")
@@ -236,10 +255,14 @@ def task_process_audio_upload(audio_id, temp_path: str, file_name: str) -> None:
             transaction_update("content_audiocontentmodel", audio["id"], **kwargs_new)
 
             # Adding the server's path of file to the cash of the file's validator
-            fduplicate.add_file_hash(main_path, fduplicate.calculate_md5(main_path))
-
-            # REmoving the temporary file (from 'media/<file>')
-            default_storage.delete(temp_path)
+            fduplicate.add_file_hash(
+                main_path,
+                file_md5,
+                "audio",
+                audio["id"],
+                size=file_size,
+                fingerprint=fingerprint,
+            )
             log.info(f"Audio file uploaded successfully: {main_path}")
 
     except Exception as e:
@@ -3,16 +3,19 @@ content/transactions.py
 """
 
 import logging
-from typing import Union
+from typing import Dict, Tuple, Union
 
 from django.db import transaction, connections
+from content.cache_tags import bump_tags, content_tag, page_tag
+from content.realtime import CONTENT_TABLES, publish, upload_status_event
 from logs import configure_logging
 from project.settings import ALLOWED_TABLES_CONTENT
 
 log = logging.getLogger(__name__)
 configure_logging(logging.INFO)
 
-
+# Max quantity of the lines in the one 'UPDATE' (3 parameters per line; limit of postgres is 65535)
+BULK_INCREMENT_BATCH_SIZE = 2000
 
 
 def transaction_update(table_db: str, index: int, **kwargs) -> None:
@@ -39,6 +42,24 @@ def transaction_update(table_db: str, index: int, **kwargs) -> None:
         with connections["default"].cursor() as cursor:
             try:
                 cursor.execute(query, list(kwargs.values()) + [index])
+                # THE CACHE. Entries which contain this line are invalidated after commit
+                cursor.execute(
+                    f"""SELECT page_id, content_type FROM {table_db} WHERE id = %s""",
+                    [index],
+                )
+                row = cursor.fetchone()
+                if row is not None:
+                    tags = [content_tag(row[1], index), page_tag(row[0])]
+                    transaction.on_commit(lambda: bump_tags(tags))
+                if "upload_status" in kwargs:
+                    # THE SUBSCRIBERS. The new status is pushed (websocket, SSE) after commit
+                    event = upload_status_event(
+                        table_db,
+                        index,
+                        row[0] if row is not None else None,
+                        kwargs["upload_status"],
+                    )
+                    transaction.on_commit(lambda: publish([event]))
             except Exception as error:
                 log.error(message + f"ERROR => {error.args[0]}")
             finally:
@@ -72,3 +93,78 @@ def transaction_get(table_db: str, index: int) -> Union[dict, None]:
                 log.error(message + f"ERROR => {error.args[0]}")
             finally:
                 cursor.close()
+
+
+def transaction_bulk_increment(
+    table_db: str, deltas: Dict[int, int], column: str = "counter"
+) -> int:
+    """
+    This is function for increasing the column of many lines in db by one statement.
+    ```sql
+    UPDATE content_videocontentmodel SET counter = counter + CASE
+        WHEN id = 2 THEN 15
+        WHEN id = 3 THEN 1
+        ELSE 0 END
+    WHERE id IN (2, 3)
+    ```
+    :param str table_db: Name table from db
+    :param dict deltas: '{< index >: < delta >, ...}' The lines of this table only.
+    :param str column: Name of the column which we want to increase.
+    :return: Quantity of the lines which was matched by 'id'.
+    """
+    message = "%s: " % transaction_bulk_increment.__name__
+    if table_db not in ALLOWED_TABLES_CONTENT:
+        log.error(message + f"ERROR => 'ALLOWED_TABLES' not valid - {table_db}")
+        return 0
+    if not column.replace("_", "").isalnum():
+        log.error(message + f"ERROR => is not correct the column name - {column}")
+        return 0
+    if not deltas:
+        return 0
+    # SQL
+    case_clause = " ".join(["WHEN id = %s THEN %s" for _ in deltas.keys()])
+    in_clause = ", ".join(["%s"] * len(deltas))
+    query = f"""UPDATE {table_db} SET {column} = {column} + CASE {case_clause} ELSE 0 END WHERE id IN ({in_clause})"""
+    params: list = []
+    for index, delta in deltas.items():
+        params.extend([index, delta])
+    params.extend(deltas.keys())
+
+    with connections["default"].cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.rowcount
+
+
+def bulk_increment_counters(
+    deltas: Dict[Tuple[str, int], int], column: str = "counter"
+) -> Dict[str, int]:
+    """
+    Increase the counters of the contents (audio, video). It's one statement for each table.
+    The deltas are split by 'content_type' of the key: the line is updated only into the table of its kind \
+    (the column 'content_type' is not compared - 'AudioContentModel.save' records it as "video").
+    :param dict deltas: '{("video", 2): 15, ("audio", 3): 1}'
+    :param str column: Name of the column which we want to increase.
+    :return: '{< table_db >: < quantity of the updated lines >}'
+    """
+    message = "%s: " % bulk_increment_counters.__name__
+    result: Dict[str, int] = {table_db: 0 for table_db in ALLOWED_TABLES_CONTENT}
+    deltas_by_table: Dict[str, Dict[int, int]] = {}
+    for (content_type, index), delta in deltas.items():
+        if not delta:
+            continue
+        table_db = CONTENT_TABLES.get(str(content_type).lower())
+        if table_db is None:
+            log.error(message + f"ERROR => unknown content_type - {content_type}")
+            continue
+        table_deltas = deltas_by_table.setdefault(table_db, {})
+        table_deltas[int(index)] = table_deltas.get(int(index), 0) + int(delta)
+    with transaction.atomic():
+        for table_db, table_deltas in deltas_by_table.items():
+            items = [*table_deltas.items()]
+            for start in range(0, len(items), BULK_INCREMENT_BATCH_SIZE):
+                result[table_db] += transaction_bulk_increment(
+                    table_db,
+                    dict(items[start : start + BULK_INCREMENT_BATCH_SIZE]),
+                    column,
+                )
+    return result
@@ -0,0 +1,248 @@
+"""
+content/uploads.py
+The resumable (chunked) upload of the content's files.
+Protocol (see 'content/content_api/views_uploads.py'):
+1. 'POST uploads/' - '{"content_type": "video", "content_id": 5, "filename": "film.mp4", "size": 1073741824}'. \
+The response has the upload's 'id' and 'offset' = 0.
+2. 'PATCH uploads/< id >/' with the header 'Upload-Offset: < offset >' and the bytes of the chunk. \
+The chunk is appended to the staging file and the new offset is returned by the header 'Upload-Offset'. \
+The chunk with other offset is 409 - the client gets the committed offset ('HEAD uploads/< id >/') and resumes.
+3. 'POST uploads/< id >/finalize/' - when all bytes are uploaded, the staging file is ingested \
+by the upload's task ('task_process_video_upload', 'task_process_audio_upload').
+The chunk is read by buffers of 'CONTENT_UPLOAD_BUFFER_SIZE' bytes, so the memory doesn't depend on the file's size.
+The MD5 of the file is calculated while the chunks are written (the state of 'hashlib.md5' is kept by the process \
+for the next chunk), and it's passed to the task. So the uploaded bytes are not read again for the duplicate's \
+checking. When the next chunk came to other process, the staging file is hashed once by 'finalize_upload'.
+The state of the abandoned upload is dropped after 'CONTENT_UPLOAD_MD5_STATE_TTL' seconds.
+The content's file is named '< upload's id >_film.mp4', so the uploads of the same name don't overwrite each other.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from datetime import datetime
+from typing import BinaryIO, Dict
+
+from django.db import transaction
+
+from content.background import background
+from content.models import ChunkedUploadModel
+from content.realtime import CONTENT_TABLES
+from content.transactions import transaction_get, transaction_update
+from logs import configure_logging
+from project.settings import (
+    CONTENT_UPLOAD_BUFFER_SIZE,
+    CONTENT_UPLOAD_DIR,
+    CONTENT_UPLOAD_MD5_STATE_TTL,
+    CONTENT_UPLOAD_SUBMIT_TIMEOUT,
+    MEDIA_PATH_TEMPLATE_AUDIO,
+    MEDIA_PATH_TEMPLATE_VIDEO,
+    MEDIA_URL,
+)
+
+log = logging.getLogger(__name__)
+configure_logging(logging.INFO)
+
+UPLOAD_OFFSET_HEADER = "Upload-Offset"
+MEDIA_PATH_TEMPLATES = {
+    "video": MEDIA_PATH_TEMPLATE_VIDEO,
+    "audio": MEDIA_PATH_TEMPLATE_AUDIO,
+}
+# '{< upload's id >: (< committed offset >, < md5 of the bytes before the offset >, < time of the chunk >)}'
+_md5_states: Dict[str, tuple] = {}
+
+
+class UploadError(Exception):
+    """The upload can't accept this request"""
+
+
+class UploadOffsetError(UploadError):
+    """The chunk's offset is not the committed offset"""
+
+    def __init__(self, offset: int):
+        super().__init__("The committed offset is %s" % offset)
+        self.offset = offset
+
+
+class UploadBusyError(UploadError):
+    """The queue of the background's work is full, the finalize is repeated later"""
+
+
+def staging_path(upload: ChunkedUploadModel) -> str:
+    """
+    :param ChunkedUploadModel upload:
+    :return: 'media/uploads/< upload's id >_film.mp4'. The name after the first '_' is the file's name \
+        (the upload's task gets the name by it).
+    """
+    return "%s%s%s_%s" % (
+        MEDIA_URL.lstrip("/"),
+        CONTENT_UPLOAD_DIR,
+        upload.pk.hex,
+        upload.filename,
+    )
+
+
+def append_chunk(upload_id, offset: int, stream: BinaryIO) -> int:
+    """
+    Append the chunk to the staging file and commit the new offset.
+    The bytes after the committed offset (the rest of the interrupted chunk) are truncated first.
+    :param upload_id: The upload's index.
+    :param int offset: The request's 'Upload-Offset'.
+    :param stream: The request's body.
+    :return: The new committed offset.
+    :raise UploadOffsetError: 'offset' is not the committed offset.
+    :raise UploadError: The upload is finalized or the chunk is out of the file's size.
+    """
+    _evict_md5_states()
+    with transaction.atomic():
+        # The chunks of one upload are written one by one
+        upload = ChunkedUploadModel.objects.select_for_update().get(pk=upload_id)
+        if upload.status != "uploading":
+            _md5_states.pop(upload.pk.hex, None)
+            raise UploadError("The upload is %s" % upload.status)
+        if offset != upload.offset:
+            raise UploadOffsetError(upload.offset)
+        path = staging_path(upload)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        md5_hash = _md5_state(upload)
+        written = 0
+        with open(path, "ab") as destination:
+            destination.seek(offset)
+            destination.truncate()
+            while True:
+                buffer = stream.read(CONTENT_UPLOAD_BUFFER_SIZE)
+                if not buffer:
+                    break
+                if offset + written + len(buffer) > upload.size:
+                    raise UploadError("The chunk is out of the size %s" % upload.size)
+                destination.write(buffer)
+                if md5_hash is not None:
+                    md5_hash.update(buffer)
+                written += len(buffer)
+        upload.offset = offset + written
+        upload.save(update_fields=["offset", "updated_at"])
+        if md5_hash is not None:
+            _md5_states[upload.pk.hex] = (upload.offset, md5_hash, time.monotonic())
+        return upload.offset
+
+
+def _evict_md5_states() -> None:
+    """
+    Drop the states of MD5 of the abandoned uploads (the last chunk is older than 'CONTENT_UPLOAD_MD5_STATE_TTL').
+    :return: None
+    """
+    expired_at = time.monotonic() - CONTENT_UPLOAD_MD5_STATE_TTL
+    for upload_id, (_, _, updated_at) in [*_md5_states.items()]:
+        if updated_at < expired_at:
+            _md5_states.pop(upload_id, None)
+
+
+def _md5_state(upload: ChunkedUploadModel):
+    """
+    :param ChunkedUploadModel upload: The upload before the chunk.
+    :return: The copy of the MD5's state of the committed bytes (the failed chunk doesn't change the state), \
+        or None when the previous chunks were written by other process.
+    """
+    if upload.offset == 0:
+        return hashlib.md5()
+    offset, md5_hash, _ = _md5_states.get(upload.pk.hex, (None, None, None))
+    return md5_hash.copy() if offset == upload.offset else None
+
+
+def upload_md5(upload: ChunkedUploadModel) -> str:
+    """
+    :param ChunkedUploadModel upload: The complete upload.
+    :return: The MD5's hex of the staging file. The file is read only when the state was not kept by this process.
+    """
+    offset, md5_hash, _ = _md5_states.pop(upload.pk.hex, (None, None, None))
+    if md5_hash is None or offset != upload.offset:
+        md5_hash = hashlib.md5()
+        with open(staging_path(upload), "rb") as file:
+            for buffer in iter(lambda: file.read(CONTENT_UPLOAD_BUFFER_SIZE), b""):
+                md5_hash.update(buffer)
+    return md5_hash.hexdigest()
+
+
+def finalize_upload(upload_id) -> ChunkedUploadModel:
+    """
+    Close the upload and ingest the staging file by the upload's task.
+    The content's path is set now, the status is 'processing' until the task is completed.
+    When the ingest is failed (or rejected), the upload is 'uploading' again - the finalize can be repeated.
+    :param upload_id: The upload's index.
+    :return: The closed upload.
+    :raise UploadError: The upload is finalized already or it's not complete.
+    :raise UploadBusyError: The queue of the background's work is full (the upload is not closed).
+    """
+    with transaction.atomic():
+        upload = ChunkedUploadModel.objects.select_for_update().get(pk=upload_id)
+        if upload.status != "uploading":
+            raise UploadError("The upload is %s" % upload.status)
+        if upload.offset != upload.size:
+            raise UploadError(
+                "The upload is not complete: %s of %s bytes" % (upload.offset, upload.size)
+            )
+        upload.status = "completed"
+        upload.save(update_fields=["status", "updated_at"])
+    try:
+        ingest_upload(upload)
+    except Exception:
+        upload.status = "uploading"
+        upload.save(update_fields=["status", "updated_at"])
+        raise
+    return upload
+
+
+def ingest_upload(upload: ChunkedUploadModel) -> None:
+    """
+    Hand the staging file to the existing upload's task (the same way as the model's 'save').
+    The content's file is '< date's template >< upload's id >_film.mp4' - the unique name.
+    When the work is rejected (or the submit is failed), the content is returned back.
+    :param ChunkedUploadModel upload: The complete upload.
+    :return: None
+    :raise UploadBusyError: The queue of the background's work is full.
+    """
+    from content.tasks import task_process_audio_upload, task_process_video_upload
+
+    kind = upload.content_type
+    path_column = "%s_path" % kind
+    file_path = "%s%s%s_%s" % (
+        MEDIA_URL.lstrip("/"),
+        datetime.now().strftime(MEDIA_PATH_TEMPLATES[kind]),
+        upload.pk.hex,
+        upload.filename,
+    )
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    temp_path = staging_path(upload)
+    if kind == "video":
+        task, kwargs = task_process_video_upload, {"video_id": upload.content_id}
+    else:
+        task, kwargs = task_process_audio_upload, {"audio_id": upload.content_id}
+    # Before the content's update: the failed hashing doesn't change the content
+    kwargs.update(
+        {"temp_path": temp_path, "file_name": temp_path, "file_md5": upload_md5(upload)}
+    )
+    previous = transaction_get(CONTENT_TABLES[kind], upload.content_id) or {}
+    transaction_update(
+        CONTENT_TABLES[kind],
+        upload.content_id,
+        **{path_column: file_path, "upload_status": "processing"},
+    )
+    submitted = False
+    try:
+        # The bounded waiting - it's run by the shared thread of 'sync_to_async'
+        submitted = background.submit(
+            task, kwargs=kwargs, timeout=CONTENT_UPLOAD_SUBMIT_TIMEOUT
+        )
+    finally:
+        if not submitted and previous:
+            transaction_update(
+                CONTENT_TABLES[kind],
+                upload.content_id,
+                **{
+                    path_column: previous[path_column],
+                    "upload_status": previous["upload_status"],
+                },
+            )
+    if not submitted:
+        raise UploadBusyError("The queue of the files' processing is full")
@@ -5,9 +5,11 @@ content/urls_api.py
 from django.urls import path, include
 from rest_framework import routers
 from content.content_api.views_api import PageDetailView
+from content.content_api.views_uploads import ChunkedUploadView
 
 router = routers.DefaultRouter()
 router.register(r"content", PageDetailView, basename="contents")
+router.register(r"uploads", ChunkedUploadView, basename="uploads")
 
 urlpatterns = [
     path("", include(router.urls), name="api_main_content_keys"),
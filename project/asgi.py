@@ -20,9 +20,14 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
 #         "http": django_asing_app,
 #     }
 # )
+# The apps are loaded before the import of the consumers
+django_asgi_app = get_asgi_application()
+
+from content.routing import websocket_urlpatterns  # noqa: E402
+
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    # "websocket": AuthMiddlewareStack(
-    #     #URLRouter()
-    # ),
+    "http": django_asgi_app,
+    "websocket": AuthMiddlewareStack(
+        URLRouter(websocket_urlpatterns)
+    ),
 })
\ No newline at end of file
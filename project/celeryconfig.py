@@ -2,6 +2,8 @@
 project/celeryconfig.py
 """
 
+from project.settings import CONTENT_COUNTER_FLUSH_INTERVAL
+
 broker_url = "redis://83.166.245.209:6381/0"
 result_backend = "redis://83.166.245.209:6381/0"
 
@@ -22,6 +24,15 @@ broker_transport_options = {
 }
 
 
+# '''BEAT'''
+# The view-counters are flushed to the db by the interval
+beat_schedule = {
+    "flush-content-counters": {
+        "task": "content.tasks.flush_content_counters",
+        "schedule": float(CONTENT_COUNTER_FLUSH_INTERVAL),
+    },
+}
+
 # THe True when need the sync
 # task_always_eager = False
 
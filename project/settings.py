@@ -10,13 +10,14 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from django.utils.translation import gettext_lazy as _
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 from dotenv_ import (POSTGRES_HOST, POSTGRES_PORT, DB_ENGINE, SECRET_KEY_DJ, DB_TO_REMOTE_HOST,
                      DATABASE_LOCAL, DATABASE_ENGINE_LOCAL, APP_TIME_ZONE, POSTGRES_DB, POSTGRES_USER,
-                     POSTGRES_PASSWORD, DB_TO_RADIS_HOST, DB_TO_RADIS_PORT)
+                     POSTGRES_PASSWORD, DB_TO_RADIS_HOST, DB_TO_RADIS_PORT, REDIS_LOCATION_URL)
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -54,6 +55,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # The compression of the API's bodies (the static files are compressed by WhiteNoise)
+    "content.content_api.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     'corsheaders.middleware.CorsMiddleware',
     "django.middleware.common.CommonMiddleware",
@@ -114,6 +117,117 @@ DATABASES = {
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 
+# '''CACHE'''
+# Redis for the cache & the counters (the db '0' is used by celery)
+CACHE_REDIS_URL = (
+    REDIS_LOCATION_URL
+    if REDIS_LOCATION_URL
+    else f"redis://{DB_TO_RADIS_HOST}:{DB_TO_RADIS_PORT}/1"
+)
+# Two-tier cache: L1 - in-process LRU (short TTL), L2 - the shared redis.
+# 'L1_MAX_ENTRIES = 0' is switching off the L1.
+CACHES = {
+    "default": {
+        "BACKEND": "content.cache_backends.TwoTierCache",
+        "TIMEOUT": 60 * 60 * 24,
+        "OPTIONS": {
+            "L2_ALIAS": "shared",
+            "L1_MAX_ENTRIES": 512,
+            "L1_TIMEOUT": 5,  # seconds
+        },
+    },
+    "shared": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": CACHE_REDIS_URL,
+        "TIMEOUT": 60 * 60 * 24,
+        "KEY_PREFIX": "kontinent",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SOCKET_CONNECT_TIMEOUT": 5,
+            "SOCKET_TIMEOUT": 5,
+        },
+    },
+}
+
+# '''API'S CACHE'''
+# The entry of the page (or the list of pages) is fresh during this time (seconds)
+CONTENT_CACHE_TIMEOUT = 60 * 60 * 24
+# After it, the stale entry is served while the one caller (per key) rebuilds it
+CONTENT_CACHE_STALE_TIMEOUT = 60 * 5
+# The lock of the rebuilding into the shared cache (single-flight)
+CONTENT_CACHE_LOCK_TIMEOUT = 10
+# The page's JSON is rendered once at write time and the cache's hit returns these bytes directly.
+# Note: the counters into the body are values at the rendering time (the live counters are not overlaid).
+CONTENT_API_PRERENDERED = False
+# The pre-rendered body is compressed once (gzip and brotli, if 'brotli' is installed) when it's cached.
+# The other API's bodies are compressed by 'CompressionMiddleware' for each response.
+# The variant is selected by 'Accept-Encoding'. The smaller bodies (bytes) are not compressed.
+CONTENT_API_COMPRESS_MIN_SIZE = 1024
+CONTENT_API_GZIP_LEVEL = 6
+CONTENT_API_BROTLI_QUALITY = 5
+# The ETag of the API's responses.
+# False - the strong ETag (the page's versions and the counters). Each view changes the counters, so the ETag too.
+# True - the weak ETag ('W/"..."') ignores the counter's drift, it's changed by the page's (content's) saving only.
+CONTENT_API_ETAG_WEAK = False
+# The batch's endpoint ('content/batch/?ids=1,2,3') returns this quantity of pages or less per request
+CONTENT_API_BATCH_MAX_IDS = 100
+# The streaming export ('content/export/') reads and renders the pages by chunks of this size
+CONTENT_API_EXPORT_CHUNK_SIZE = 500
+
+# '''CONTENT'S COUNTERS'''
+# The view-counters are collected into the shared store (redis's hash) and are flushed to the db by one task.
+# 'redis' or 'local' ('local' - it's the in-process store for tests and the develop).
+CONTENT_COUNTER_BACKEND = "redis"
+CONTENT_COUNTER_REDIS_URL = CACHE_REDIS_URL
+# Interval (in seconds) of the flush (celery beat)
+CONTENT_COUNTER_FLUSH_INTERVAL = 10
+# The flush is started early when the store has this quantity of the content's keys
+CONTENT_COUNTER_FLUSH_THRESHOLD = 1000
+# TTL (in seconds) of the live values' hash. The values are seeded from the db again after it
+CONTENT_COUNTER_TOTALS_TTL = 60 * 60
+
+# '''CHANNELS'''
+# The layer of the content's updates (websocket, SSE - see 'content/realtime.py').
+# 'channels_redis' - the layer is shared by daphne's and celery's workers. Without it, the in-memory \
+# layer is used (one process only: the tests and the develop).
+CHANNEL_LAYERS = {
+    "default": (
+        {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [CACHE_REDIS_URL]},
+        }
+        if find_spec("channels_redis")
+        else {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+    )
+}
+# The SSE's endpoint sends the comment (keep-alive) when there were not events during this time (seconds)
+CONTENT_EVENTS_KEEPALIVE = 15
+
+# '''UPLOADS'''
+# The resumable (chunked) uploads of the content's files (see 'content/uploads.py').
+# The staging files are into 'MEDIA_ROOT/< CONTENT_UPLOAD_DIR >'
+CONTENT_UPLOAD_DIR = "uploads/"
+# The chunk's body is read and is written by buffers of this size (bytes)
+CONTENT_UPLOAD_BUFFER_SIZE = 1024 * 1024
+# Max size of the uploaded file (bytes)
+CONTENT_UPLOAD_MAX_SIZE = 20 * 1024 * 1024 * 1024
+# The finalize waits the free place into the background's queue during this time (seconds), after it \
+# the finalize is 503 and the client repeats it
+CONTENT_UPLOAD_SUBMIT_TIMEOUT = 1
+# The state of MD5 of the abandoned upload is dropped after this time (seconds)
+CONTENT_UPLOAD_MD5_STATE_TTL = 60 * 60
+
+# '''BACKGROUND'S WORK'''
+# Fire-and-forget work of the views and of the models (counters, uploads) is run by the one bounded pool
+BACKGROUND_MAX_WORKERS = 8
+# Quantity of the work which is waiting a free worker. When the queue is full, 'submit' waits
+# 'BACKGROUND_SUBMIT_TIMEOUT' seconds and after it, the work is rejected
+BACKGROUND_QUEUE_SIZE = 1000
+BACKGROUND_SUBMIT_TIMEOUT = 0.1
+# At the process's exit, the queued work is completed during this time (seconds). After it, the queued work
+# is cancelled (the running work is completed). The async views don't wait the free place ('submit_nowait')
+BACKGROUND_DRAIN_TIMEOUT = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -222,6 +336,18 @@ CORS_ALLOW_HEADERS = [
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # JSON by 'orjson' (if it's installed) and 'application/msgpack' (if 'msgpack' is installed)
+    'DEFAULT_RENDERER_CLASSES': [
+        'content.content_api.renderers.FastJSONRenderer',
+        *(['content.content_api.renderers.MsgPackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'content.content_api.renderers.FastJSONParser',
+        *(['content.content_api.renderers.MsgPackParser'] if find_spec('msgpack') else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 SECURE_SSL_REDIRECT = False # т.к. запуск на http:
@@ -289,6 +415,8 @@ CONTENT_TYPES_CHOICES = [
     ]
 # Separating of file by chunk and after read the file and yield chunks of ``chunk_size`` bytes
 DEFAULT_CHUNK_SIZE = 8192
+# The fingerprint of the file (the duplicate's checking) is MD5 of three blocks: head, middle, tail
+CONTENT_FINGERPRINT_BLOCK_SIZE = 64 * 1024
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5 MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5 MB